@@ -0,0 +1,314 @@
+"""
+Verifică acuratețea căilor rapide față de calculul de referință Skyfield (de421), fără display și fără rețea.
+
+Pentru --observers observatori aleși aleator (latitudine, longitudine, altitudine) și --samples momente
+aleatoare din următorii --years ani, compară:
+  position      - calculate_moon_position (moment cu moment) cu PeakFinder.positions (vectorial, ca
+                  motorul 'vector') și cu LunarModel (filtrul motorului 'analytic'); separarea în grade
+  distance      - calculate_moon_distance_at cu calculul vectorial din SampleSeries și cu LunarModel; în km
+  rise          - calculate_moon_times cu compute_rise_set_state (răsăritul afișat); în secunde
+  opportunities - scanarea cu motorul 'vector' (cel folosit de compute_opportunities) cu motorul 'analytic',
+                  pe --scenes scene aleatoare per observator; capetele intervalelor și momentul optim, în secunde
+
+Pentru fiecare motor se raportează eroarea maximă și percentilele 50/95/99, plus de câte ori e mai rapid
+decât referința. Motorul 'sample' lipsește: iluminarea lui vine de la serviciul farmsense.
+Codul de ieșire e 1 dacă vreo eroare depășește toleranța din TOLERANCES (înmulțită cu --tolerance-scale).
+
+    python bench/accuracy_harness.py --data-dir /cale/date --observers 8 --samples 200 --output accuracy.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.insert(0, ROOT_DIR)
+
+# Eroarea maximă acceptată pentru fiecare (mărime, motor), în unitatea mărimii
+TOLERANCES = {
+    ('position', 'vector'): 1e-6,
+    # Completată în main() din LunarModel.MAX_ERROR_DEGREES
+    ('position', 'analytic'): None,
+    ('distance', 'vector'): 1e-3,
+    # LunarModel dă distanța geometrică; referința e astrometrică (cu timpul-lumină), deci până la ~50 km
+    ('distance', 'analytic'): 60.0,
+    ('rise', 'rise_set_state'): 1.0,
+    ('opportunities', 'analytic'): 0.0,
+}
+
+
+def summary(errors):
+    """Maximul și percentilele unei liste de erori absolute"""
+    if not len(errors):
+        return {'count': 0}
+    errors = np.asarray(errors, dtype=float)
+    return {
+        'count': int(errors.size),
+        'max': float(errors.max()),
+        'p50': float(np.percentile(errors, 50)),
+        'p95': float(np.percentile(errors, 95)),
+        'p99': float(np.percentile(errors, 99)),
+    }
+
+
+def separation(alt1, az1, alt2, az2):
+    """Distanța unghiulară (grade) între două poziții alt/az; nu depinde de azimut lângă zenit"""
+    alt1, az1, alt2, az2 = (np.radians(np.asarray(value, dtype=float)) for value in (alt1, az1, alt2, az2))
+    # Haversine: arccos pierde precizia (~1e-6°) exact la erorile mici care ne interesează
+    haversine = (np.sin((alt2 - alt1) / 2) ** 2 +
+                 np.cos(alt1) * np.cos(alt2) * np.sin((az2 - az1) / 2) ** 2)
+    return np.degrees(2 * np.arcsin(np.sqrt(np.clip(haversine, 0, 1))))
+
+
+def random_observers(mh, ts, eph, rng, count):
+    """Observatori aleatori (fără regiunile polare, unde Luna poate să nu răsară zile întregi)"""
+    from timezonefinder import TimezoneFinder
+
+    finder = TimezoneFinder()
+    observers = []
+    for _ in range(count):
+        latitude = float(np.degrees(np.arcsin(rng.uniform(np.sin(np.radians(-60)), np.sin(np.radians(65))))))
+        longitude = float(rng.uniform(-180, 180))
+        elevation = float(rng.uniform(0, 2500))
+        timezone = mh.pytz.timezone(finder.timezone_at(lat=latitude, lng=longitude) or 'UTC')
+        location = mh.Topos(latitude_degrees=latitude, longitude_degrees=longitude, elevation_m=elevation)
+        observers.append(mh.MoonSky(ts, eph, location, timezone))
+    return observers
+
+
+def random_scene(mh, rng, index):
+    """Scenă aleatoare: cutie de azimut (poate trece prin nord), de elevație, fereastră și iluminare"""
+    scene = mh.Scene(f"Aleatoare {index}", "gps", {})
+    center = rng.uniform(0, 360)
+    width = rng.uniform(30, 140)
+    scene.azimuth_min, scene.azimuth_max = round((center - width / 2) % 360), round((center + width / 2) % 360)
+    low = rng.uniform(-2, 45)
+    scene.elevation_min, scene.elevation_max = round(low), round(low + rng.uniform(8, 35))
+    start_hour = int(rng.integers(0, 24))
+    end_hour = start_hour + int(rng.integers(3, 10))
+    scene.time_start = f"{start_hour:02d}:00"
+    scene.time_end = f"{end_hour % 24:02d}:00"
+    scene.time_end_next_day = end_hour >= 24
+    scene.min_illumination = int(rng.integers(0, 80))
+    return scene
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def compare_positions(mh, sky, moments, report):
+    """Poziția: moment cu moment (referința) față de calculul vectorial și de LunarModel"""
+    def reference():
+        positions = []
+        for moment in moments:
+            sky.timeshift_ts = sky.ts.from_datetime(moment)
+            positions.append(sky.calculate_moon_position())
+        del sky.timeshift_ts
+        return np.array(positions).T
+
+    (alt, az), reference_s = timed(reference)
+    (vector_alt, vector_az), vector_s = timed(mh.PeakFinder(sky, mh.Scene("", "gps", {})).positions, moments)
+    model = mh.LunarModel.for_location(sky.location)
+    (model_alt, model_az), model_s = timed(lambda: model.altaz(sky.ts.from_datetimes(moments)))
+
+    report.add('position', 'vector', separation(alt, az, vector_alt, vector_az), reference_s, vector_s)
+    report.add('position', 'analytic', separation(alt, az, model_alt, model_az), reference_s, model_s)
+
+
+def compare_distances(mh, sky, moments, report):
+    """Distanța Pământ-Lună: calculate_moon_distance_at față de calculul vectorial și de LunarModel"""
+    t = sky.ts.from_datetimes(moments)
+
+    def reference():
+        return np.array([sky.calculate_moon_distance_at(t[k])['distance'] for k in range(len(moments))])
+
+    def vector():
+        # Același calcul ca SampleSeries (regula distance_rating)
+        return sky.eph['earth'].at(t).observe(sky.eph['moon']).distance().km
+
+    distances, reference_s = timed(reference)
+    vector_distances, vector_s = timed(vector)
+    model_distances, model_s = timed(lambda: mh.LunarModel.geocentric(t.tt)[2])
+
+    for engine, values, seconds in (('vector', vector_distances, vector_s), ('analytic', model_distances, model_s)):
+        report.add('distance', engine, np.abs(values - distances), reference_s, seconds,
+                   rating_mismatches=int(np.sum(mh.MoonSky.distance_rating(values) !=
+                                                mh.MoonSky.distance_rating(distances))))
+
+
+def compare_rises(sky, moments, report):
+    """Răsăritul: calculate_moon_times (24 de ore) față de compute_rise_set_state (48 de ore)"""
+    errors = []
+    reference_s = engine_s = 0.0
+    for moment in moments:
+        local = moment.astimezone(sky.current_timezone)
+        sky.timeshift_datetime = local
+        (rise, _), seconds = timed(sky.calculate_moon_times)
+        reference_s += seconds
+        state, seconds = timed(sky.compute_rise_set_state, local)
+        engine_s += seconds
+        # Comparăm doar răsăriturile găsite de ambele căi, în primele 24 de ore
+        if rise and state['next_rise_time'] and rise - local < timedelta(hours=24):
+            errors.append(abs((state['next_rise_time'] - rise).total_seconds()))
+    del sky.timeshift_datetime
+    report.add('rise', 'rise_set_state', errors, reference_s, engine_s)
+
+
+def compare_opportunities(mh, sky, scenes, days, start_times, report):
+    """Oportunitățile: motorul 'analytic' față de motorul 'vector'; intervale diferite = nepotriviri"""
+    errors = []
+    mismatches = 0
+    reference_s = engine_s = 0.0
+    for scene, start_time in zip(scenes, start_times):
+        runs = {}
+        for engine in ('vector', 'analytic'):
+            scanner = mh.OpportunityScanner(sky, days, engine=engine)
+            runs[engine], seconds = timed(
+                lambda: list(scanner.iter_opportunities(scene, start_time=start_time)))
+            if engine == 'vector':
+                reference_s += seconds
+            else:
+                engine_s += seconds
+        if len(runs['vector']) != len(runs['analytic']):
+            mismatches += 1
+            continue
+        for expected, actual in zip(runs['vector'], runs['analytic']):
+            for field in ('start_datetime', 'end_datetime', 'best_datetime'):
+                errors.append(abs((actual[field] - expected[field]).total_seconds()))
+    report.add('opportunities', 'analytic', errors, reference_s, engine_s, count_mismatches=mismatches)
+
+
+class AccuracyReport:
+    """Erorile adunate pe (mărime, motor), cu timpii referinței și ai motorului"""
+    UNITS = {'position': 'deg', 'distance': 'km', 'rise': 's', 'opportunities': 's'}
+
+    def __init__(self):
+        self.errors = {}
+        self.seconds = {}
+        self.extra = {}
+
+    def add(self, quantity, engine, errors, reference_s, engine_s, **extra):
+        key = (quantity, engine)
+        self.errors.setdefault(key, []).extend(np.ravel(errors).tolist())
+        reference_total, engine_total = self.seconds.get(key, (0.0, 0.0))
+        self.seconds[key] = (reference_total + reference_s, engine_total + engine_s)
+        for name, value in extra.items():
+            self.extra.setdefault(key, {}).setdefault(name, 0)
+            self.extra[key][name] += value
+
+    def results(self, tolerances):
+        """{mărime: {motor: rezultat}} și lista de depășiri (mărime, motor, motiv)"""
+        results = {}
+        violations = []
+        for (quantity, engine), errors in self.errors.items():
+            reference_s, engine_s = self.seconds[(quantity, engine)]
+            result = summary(errors)
+            result.update(self.extra.get((quantity, engine), {}))
+            result['unit'] = self.UNITS[quantity]
+            result['reference_s'] = reference_s
+            result['engine_s'] = engine_s
+            result['speedup'] = reference_s / engine_s if engine_s else None
+            tolerance = tolerances.get((quantity, engine))
+            result['tolerance'] = tolerance
+            if tolerance is not None and result.get('max', 0) > tolerance:
+                violations.append((quantity, engine, f"max {result['max']:.6g} {result['unit']} > {tolerance:.6g}"))
+            if result.get('count_mismatches'):
+                violations.append((quantity, engine, f"{result['count_mismatches']} scanări cu alt număr de intervale"))
+            results.setdefault(quantity, {})[engine] = result
+        return results, violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Acuratețea căilor rapide Moon Hunter față de referința Skyfield")
+    parser.add_argument('--data-dir', default=ROOT_DIR, help="director cu de421.bsp")
+    parser.add_argument('--observers', type=int, default=6)
+    parser.add_argument('--samples', type=int, default=200, help="momente aleatoare per observator")
+    parser.add_argument('--rises', type=int, default=10, help="momente per observator pentru răsărit")
+    parser.add_argument('--scenes', type=int, default=3, help="scene aleatoare per observator")
+    parser.add_argument('--days', type=int, default=60, help="orizontul scanărilor de oportunități")
+    parser.add_argument('--years', type=float, default=10, help="momentele sunt alese din următorii ani")
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--tolerance-scale', type=float, default=1.0, help="înmulțește toate toleranțele")
+    parser.add_argument('--output', help="fișier JSON pentru rezultate (implicit stdout)")
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    os.environ.setdefault('MOONHUNTER_LOG', 'WARNING')
+    os.chdir(args.data_dir)
+
+    import moonhunter as mh
+    mh.configure_logging()
+
+    ts = mh.load.timescale()
+    eph = mh.load('de421.bsp')
+    rng = np.random.default_rng(args.seed)
+    now = datetime.now(mh.pytz.UTC).replace(microsecond=0)
+    horizon_s = args.years * 365.25 * 86400
+
+    def random_moments(count):
+        return [now + timedelta(seconds=float(offset)) for offset in np.sort(rng.uniform(0, horizon_s, count))]
+
+    tolerances = dict(TOLERANCES)
+    tolerances[('position', 'analytic')] = mh.LunarModel.MAX_ERROR_DEGREES
+    tolerances = {key: value * args.tolerance_scale for key, value in tolerances.items()}
+
+    report = AccuracyReport()
+    for index, sky in enumerate(random_observers(mh, ts, eph, rng, args.observers)):
+        print(f"Observator {index + 1}/{args.observers}: {sky.location.latitude.degrees:.2f}°, "
+              f"{sky.location.longitude.degrees:.2f}°, {sky.location.elevation.m:.0f} m, "
+              f"{sky.current_timezone}", file=sys.stderr)
+        compare_positions(mh, sky, random_moments(args.samples), report)
+        compare_distances(mh, sky, random_moments(args.samples), report)
+        compare_rises(sky, random_moments(args.rises), report)
+        scenes = [random_scene(mh, rng, k) for k in range(args.scenes)]
+        compare_opportunities(mh, sky, scenes, args.days, random_moments(args.scenes), report)
+
+    results, violations = report.results(tolerances)
+    output = json.dumps({
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'observers': args.observers,
+            'samples': args.samples,
+            'rises': args.rises,
+            'scenes': args.scenes,
+            'days': args.days,
+            'years': args.years,
+            'seed': args.seed,
+        },
+        'results': results,
+        'violations': [f"{quantity}.{engine}: {reason}" for quantity, engine, reason in violations],
+    }, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    for quantity, engines in results.items():
+        for engine, result in engines.items():
+            if not result['count']:
+                print(f"{quantity + '.' + engine:<28} fără eșantioane", file=sys.stderr)
+                continue
+            speedup = f"x{result['speedup']:.1f}" if result['speedup'] else "-"
+            print(f"{quantity + '.' + engine:<28} n={result['count']:<6} max={result['max']:<10.4g} "
+                  f"p95={result['p95']:<10.4g} p99={result['p99']:<10.4g} {result['unit']:<4} {speedup}",
+                  file=sys.stderr)
+    for quantity, engine, reason in violations:
+        print(f"TOLERANȚĂ DEPĂȘITĂ {quantity}.{engine}: {reason}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
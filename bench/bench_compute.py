@@ -0,0 +1,271 @@
+"""
+Benchmark-uri pentru căile de calcul costisitoare, fără display și fără rețea.
+
+Acoperă scanarea oportunităților (inclusiv un orizont de un an, raportat în zile/s, cu motorul
+implicit și cu cel analitic),
+rating-urile lunilor pline, calculul unui tick update_all,
+încărcarea MeteoDataManager și salvarea/încărcarea a 10/100/1000 de scene în ambele stocări.
+Serviciul farmsense e înlocuit de bench/farmsense_stub.py.
+
+    python bench/bench_compute.py                       # rulează și compară cu bench/baselines.json
+    python bench/bench_compute.py --only scan --days 10
+    python bench/bench_compute.py --update-baseline     # rescrie baseline-ul cu rezultatele curente
+
+Directorul de date (--data-dir, implicit rădăcina proiectului) trebuie să conțină de421.bsp
+și lista_localitati_cu_statii.csv. Codul de ieșire e 1 dacă vreun benchmark depășește
+baseline-ul cu mai mult decât toleranța.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baselines.json')
+
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from farmsense_stub import FarmsenseStub
+
+STORE_SIZES = (10, 100, 1000)
+HORIZON_DAYS = 365
+
+
+def representative_scenes(Scene):
+    """Scene tipice: răsărit la est, Lună sus spre sud, fereastră peste miezul nopții spre nord"""
+    east_rise = Scene("Răsărit est", "romania", {'judet': 'Cluj', 'localitate': 'Cluj-Napoca'})
+    east_rise.azimuth_min, east_rise.azimuth_max = 60, 130
+    east_rise.elevation_min, east_rise.elevation_max = 0, 15
+    east_rise.time_start, east_rise.time_end = "17:00", "23:00"
+    east_rise.min_illumination = 80
+
+    south_high = Scene("Sud sus", "romania", {'judet': 'Cluj', 'localitate': 'Cluj-Napoca'})
+    south_high.azimuth_min, south_high.azimuth_max = 150, 210
+    south_high.elevation_min, south_high.elevation_max = 30, 70
+    south_high.time_start, south_high.time_end = "20:00", "04:00"
+    south_high.time_end_next_day = True
+    south_high.min_illumination = 40
+
+    north_wrap = Scene("Peste nord", "romania", {'judet': 'Cluj', 'localitate': 'Cluj-Napoca'})
+    north_wrap.azimuth_min, north_wrap.azimuth_max = 300, 60
+    north_wrap.elevation_min, north_wrap.elevation_max = 0, 30
+    north_wrap.time_start, north_wrap.time_end = "00:00", "23:45"
+    north_wrap.min_illumination = 10
+
+    return {'east_rise': east_rise, 'south_high': south_high, 'north_wrap': north_wrap}
+
+
+def synthetic_scenes(Scene, count, timezone):
+    """Scene generate, fiecare cu trei oportunități, pentru testele de stocare"""
+    start = datetime.now(timezone).replace(microsecond=0)
+    scenes = []
+    for i in range(count):
+        scene = Scene(f"Scena {i}", "romania", {'judet': 'Alba', 'localitate': 'Alba Iulia'})
+        scene.azimuth_min, scene.azimuth_max = i % 360, (i + 90) % 360
+        scene.min_illumination = i % 100
+        for k in range(3):
+            begin = start + timedelta(days=i % 90 + k * 29, hours=k)
+            scene.opportunities.append({
+                'start_datetime': begin,
+                'end_datetime': begin + timedelta(minutes=45),
+                'elevation_min': 5.0, 'elevation_max': 12.5,
+                'azimuth_min': 95.0, 'azimuth_max': 104.0,
+                'illumination': 91.0, 'max_illumination': 97.5,
+            })
+        scenes.append(scene)
+    return scenes
+
+
+def measure(func, repeat, setup=None):
+    """Rulează func de repeat ori (setup, dacă există, nu e cronometrat)"""
+    runs = []
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        func(argument) if setup else func()
+        runs.append(time.perf_counter() - start)
+    return {
+        'median_s': statistics.median(runs),
+        'min_s': min(runs),
+        'max_s': max(runs),
+        'runs': len(runs),
+    }
+
+
+def build_benchmarks(mh, sky, days, workdir):
+    """Întoarce {nume: (funcție, setup)}; numele sunt cheile din baseline"""
+    benchmarks = {}
+
+    for name, scene in representative_scenes(mh.Scene).items():
+        def scan(scene=scene):
+            mh.OpportunityScanner(sky, days_to_check=days).scan(scene)
+        benchmarks[f'scan.{name}'] = (scan, None)
+
+    # Orizont lung: toate oportunitățile dintr-un an, pentru debitul în zile/s
+    east_rise = representative_scenes(mh.Scene)['east_rise']
+    benchmarks['scan.horizon.east_rise'] = (
+        lambda: mh.OpportunityScanner(sky, days_to_check=HORIZON_DAYS).scan(east_rise, num_opportunities=10 ** 6),
+        None)
+    # Același orizont cu filtrul analitic (LunarModel) și verificarea exactă doar lângă limite
+    benchmarks['scan.horizon.east_rise.analytic'] = (
+        lambda: mh.OpportunityScanner(sky, days_to_check=HORIZON_DAYS, engine='analytic').scan(
+            east_rise, num_opportunities=10 ** 6),
+        None)
+
+    benchmarks['full_moon_ratings'] = (lambda: sky.calculate_full_moon_ratings(force_recalc=True), None)
+
+    def update_all_tick():
+        # Ce calculează o împrospătare completă: toate nivelurile, inclusiv cererea pentru fază
+        reference_time = sky.reference_time()
+        sky.compute_sky_state(reference_time)
+        mh.fetch_moon_phase(int(reference_time.timestamp()))
+    benchmarks['update_all_tick'] = (update_all_tick, None)
+
+    benchmarks['meteo_load'] = (lambda: mh.MeteoDataManager(), None)
+
+    counter = iter(range(10 ** 9))
+
+    def store_paths(kind):
+        path = os.path.join(workdir, f'{kind}_{next(counter)}')
+        os.makedirs(path)
+        return {
+            'json_path': os.path.join(path, 'moon_scenes.json'),
+            'settings_file': os.path.join(path, 'moon_settings.json'),
+        }
+
+    def open_store(kind, paths):
+        if kind == 'sqlite':
+            return mh.SceneStore(db_path=os.path.join(os.path.dirname(paths['json_path']), 'moon_data.db'),
+                                 **paths)
+        return mh.JournalSceneStore(
+            ratings_path=os.path.join(os.path.dirname(paths['json_path']), 'moon_ratings.json'), **paths)
+
+    for kind in ('sqlite', 'journal'):
+        for size in STORE_SIZES:
+            scenes = synthetic_scenes(mh.Scene, size, sky.current_timezone)
+
+            def save_setup(kind=kind):
+                return open_store(kind, store_paths(kind))
+
+            def save(store, scenes=scenes):
+                store.save_scenes(scenes)
+                store.close()
+
+            def load_setup(kind=kind, scenes=scenes):
+                paths = store_paths(kind)
+                store = open_store(kind, paths)
+                store.save_scenes(scenes)
+                store.close()
+                return paths
+
+            def load(paths, kind=kind):
+                store = open_store(kind, paths)
+                store.load_scenes()
+                store.close()
+
+            benchmarks[f'store.{kind}.save.{size}'] = (save, save_setup)
+            benchmarks[f'store.{kind}.load.{size}'] = (load, load_setup)
+
+    return benchmarks
+
+
+def compare(results, baseline, tolerance):
+    """Întoarce lista de regresii: (nume, mediană curentă, mediană baseline, raport)"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get('results', {}).get(name)
+        if not reference:
+            continue
+        ratio = result['median_s'] / reference['median_s'] if reference['median_s'] else 1.0
+        result['baseline_median_s'] = reference['median_s']
+        result['ratio'] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append((name, result['median_s'], reference['median_s'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark-uri Moon Hunter fără display și fără rețea")
+    parser.add_argument('--data-dir', default=ROOT_DIR, help="director cu de421.bsp și lista de localități")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--days', type=int, default=30, help="zile scanate de benchmark-urile scan.*")
+    parser.add_argument('--only', action='append', default=[], help="rulează doar benchmark-urile cu acest prefix")
+    parser.add_argument('--output', help="fișier JSON pentru rezultate (implicit stdout)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="creștere relativă a medianei acceptată față de baseline (0.5 = +50%%)")
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    os.environ.setdefault('MOONHUNTER_LOG', 'WARNING')
+    os.chdir(args.data_dir)
+
+    with FarmsenseStub() as stub, tempfile.TemporaryDirectory() as workdir:
+        os.environ['MOONHUNTER_FARMSENSE_URL'] = stub.url
+        import moonhunter as mh
+        mh.configure_logging()
+
+        ts = mh.load.timescale()
+        eph = mh.load('de421.bsp')
+        store = mh.SceneStore(db_path=os.path.join(workdir, 'ratings.db'),
+                              json_path=os.path.join(workdir, 'moon_scenes.json'),
+                              settings_file=os.path.join(workdir, 'moon_settings.json'))
+        sky = mh.MoonSky(ts, eph, mh.Topos('46.7712 N', '23.6236 E'), store=store)
+
+        results = {}
+        for name, (func, setup) in build_benchmarks(mh, sky, args.days, workdir).items():
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            results[name] = measure(func, args.repeat, setup)
+            if name.startswith('scan.horizon.'):
+                results[name]['days_per_s'] = HORIZON_DAYS / results[name]['median_s']
+            print(f"{name:<32}{results[name]['median_s'] * 1000:>12.2f} ms", file=sys.stderr)
+        store.close()
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'days': args.days,
+        },
+        'results': results,
+    }
+
+    regressions = []
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('days') != args.days:
+            print("Atenție: baseline-ul a fost măsurat cu alt --days; scan.* nu sunt comparabile",
+                  file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    for name, current, reference, ratio in regressions:
+        print(f"REGRESIE {name}: {current * 1000:.2f} ms față de {reference * 1000:.2f} ms (x{ratio:.2f})",
+              file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
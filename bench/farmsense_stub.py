@@ -0,0 +1,98 @@
+"""
+Înlocuitor local pentru api.farmsense.net/v1/moonphases, folosit de benchmark-uri.
+
+Răspunde cu același format ca serviciul real ([{"Illumination": ..., "Age": ...}]),
+calculat determinist dintr-o lună sinodică medie, fără acces la rețea.
+
+    python bench/farmsense_stub.py --port 8765
+    MOONHUNTER_FARMSENSE_URL=http://127.0.0.1:8765/v1/moonphases/ python moonhunter.py
+"""
+import argparse
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SYNODIC_MONTH = 29.530588853
+REFERENCE_NEW_MOON = 947182440  # 2000-01-06 18:14 UTC
+
+
+def moon_phase(timestamp):
+    """Vârsta (zile) și iluminarea (0-1) aproximate pentru un timestamp unix"""
+    age = ((timestamp - REFERENCE_NEW_MOON) / 86400) % SYNODIC_MONTH
+    illumination = (1 - math.cos(2 * math.pi * age / SYNODIC_MONTH)) / 2
+    return age, illumination
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            timestamp = int(query.get('d', ['0'])[0])
+        except ValueError:
+            self.send_error(400, "parametrul d trebuie să fie un timestamp unix")
+            return
+        age, illumination = moon_phase(timestamp)
+        body = json.dumps([{
+            'Error': 0,
+            'TargetDate': str(timestamp),
+            'Age': age,
+            'Illumination': illumination,
+            'Phase': 'Waning' if age > SYNODIC_MONTH / 2 else 'Waxing',
+        }]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FarmsenseStub:
+    """Server HTTP local pe un port liber; se folosește ca context manager"""
+    def __init__(self, host='127.0.0.1', port=0):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/v1/moonphases/'
+
+    def start(self):
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server local care imită API-ul farmsense")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    stub = FarmsenseStub(args.host, args.port)
+    print(f"MOONHUNTER_FARMSENSE_URL={stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+Măsoară latența firului UI pe fereastra reală MoonPhaseWindow, sub platforma Qt offscreen.
+
+Rețeaua e înlocuită de bench/farmsense_stub.py, iar fereastra rulează într-un director temporar
+(setările, baza de date și profilurile utilizatorului nu sunt atinse). Scenariul:
+  1. ticks     - timer-ul ferestrei rulează --ticks tick-uri ale RefreshScheduler la --tick-ms
+  2. timeshift - apply_timeshift pe --timeshifts momente diferite
+  3. location  - update_location_from_combos pe --locations localități
+  4. profile   - load_selected_profile alternând între două profiluri
+
+Pentru fiecare fază se raportează stall-ul buclei de evenimente (întârzierea unui timer heartbeat),
+distribuția duratelor (tick-uri sau operații) și numărul de repaint-uri pe tip de widget.
+
+    python bench/gui_harness.py --ticks 50 --output gui.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from farmsense_stub import FarmsenseStub
+
+ASSETS = ('de421.bsp', 'lista_localitati_cu_statii.csv', 'lista_localitati_cu_statii.xlsx',
+          'compass.png', 'poze_cer')
+
+
+def prepare_workdir(data_dir, workdir):
+    """Leagă (sau copiază) resursele read-only în directorul temporar"""
+    for name in ASSETS:
+        source = os.path.join(data_dir, name)
+        if not os.path.exists(source):
+            continue
+        target = os.path.join(workdir, name)
+        try:
+            os.symlink(source, target, target_is_directory=os.path.isdir(source))
+        except OSError:
+            if os.path.isdir(source):
+                shutil.copytree(source, target)
+            else:
+                shutil.copy2(source, target)
+
+
+def distribution(values):
+    """Sumar în milisecunde pentru o listă de durate în secunde"""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': statistics.mean(ordered) * 1000,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+class GuiHarness:
+    def __init__(self, mh, window, args):
+        from PyQt5.QtCore import QObject, QEvent, QTimer
+
+        self.mh = mh
+        self.window = window
+        self.args = args
+        self.phase = 'startup'
+        self.stalls = {}
+        self.durations = {}
+        self.repaints = {}
+        self.ticks_left = args.ticks
+        self.done = False
+
+        harness = self
+
+        class PaintCounter(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Paint:
+                    harness.repaints.setdefault(harness.phase, Counter())[type(obj).__name__] += 1
+                return False
+
+        self.paint_counter = PaintCounter()
+
+        # Heartbeat: orice întârziere peste interval înseamnă că bucla de evenimente a fost blocată
+        self.heartbeat = QTimer()
+        self.heartbeat.setInterval(args.heartbeat_ms)
+        self.heartbeat.timeout.connect(self.on_heartbeat)
+        self.last_beat = None
+
+        # Înlocuim conexiunea timer-ului ferestrei cu una cronometrată
+        window.timer.stop()
+        window.timer.timeout.disconnect()
+        window.timer.timeout.connect(self.on_tick)
+        window.timer.setInterval(args.tick_ms)
+
+    def on_heartbeat(self):
+        now = time.perf_counter()
+        if self.last_beat is not None:
+            lateness = now - self.last_beat - self.args.heartbeat_ms / 1000
+            if lateness > 0:
+                self.stalls.setdefault(self.phase, []).append(lateness)
+        self.last_beat = now
+
+    def timed(self, func, *args):
+        start = time.perf_counter()
+        try:
+            func(*args)
+        finally:
+            self.durations.setdefault(self.phase, []).append(time.perf_counter() - start)
+
+    def on_tick(self):
+        self.timed(self.window.refresh_scheduler.tick)
+        self.ticks_left -= 1
+        if self.ticks_left <= 0:
+            self.window.timer.stop()
+            self.next_phase()
+
+    def operations(self):
+        """Fazele 2-4 ca listă de (fază, funcție, argumente)"""
+        window = self.window
+        now = datetime.now(window.current_timezone)
+        operations = [('timeshift', window.apply_timeshift, (now + timedelta(hours=7 * k),))
+                      for k in range(1, self.args.timeshifts + 1)]
+
+        judete = window.data_manager.get_judete()[:self.args.locations]
+
+        def switch_location(judet):
+            window.judet_combo.setCurrentText(judet)
+            window.update_location_from_combos()
+
+        operations += [('location', switch_location, (judet,)) for judet in judete]
+
+        profiles = [self.mh.LocationProfile('Harness Cluj', 46.7712, 23.6236, 'Europe/Bucharest'),
+                    self.mh.LocationProfile('Harness Constanța', 44.1598, 28.6348, 'Europe/Bucharest')]
+        for profile in profiles:
+            window.profile_manager.add_profile(profile)
+        window.update_profile_list()
+
+        def switch_profile(name):
+            window.profile_combo.setCurrentText(name)
+            window.load_selected_profile()
+
+        operations += [('profile', switch_profile, (profiles[k % 2].name,))
+                       for k in range(self.args.profiles)]
+        return operations
+
+    def next_phase(self):
+        from PyQt5.QtCore import QTimer
+
+        if self.phase == 'ticks':
+            self.pending = self.operations()
+        if not self.pending:
+            self.finish()
+            return
+        self.phase, func, args = self.pending.pop(0)
+
+        def run():
+            self.timed(func, *args)
+            # Lăsăm bucla de evenimente să proceseze repaint-urile înainte de operația următoare
+            QTimer.singleShot(self.args.gap_ms, self.next_phase)
+
+        QTimer.singleShot(0, run)
+
+    def start(self):
+        from PyQt5.QtWidgets import QApplication
+
+        QApplication.instance().installEventFilter(self.paint_counter)
+        self.phase = 'ticks'
+        self.heartbeat.start()
+        self.window.timer.start()
+
+    def finish(self):
+        from PyQt5.QtWidgets import QApplication
+
+        self.heartbeat.stop()
+        QApplication.instance().removeEventFilter(self.paint_counter)
+        self.done = True
+        QApplication.instance().quit()
+
+    def report(self):
+        phases = {}
+        for phase in ('ticks', 'timeshift', 'location', 'profile'):
+            stalls = self.stalls.get(phase, [])
+            phases[phase] = {
+                'durations': distribution(self.durations.get(phase, [])),
+                'stall': {
+                    'total_ms': sum(stalls) * 1000,
+                    'max_ms': max(stalls, default=0) * 1000,
+                    'over_50ms': sum(1 for stall in stalls if stall > 0.05),
+                },
+                'repaints': dict(self.repaints.get(phase, Counter()).most_common()),
+                'repaints_total': sum(self.repaints.get(phase, Counter()).values()),
+            }
+        return phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harness pentru latența UI a ferestrei Moon Hunter")
+    parser.add_argument('--data-dir', default=ROOT_DIR, help="director cu de421.bsp, lista de localități și imagini")
+    parser.add_argument('--ticks', type=int, default=30)
+    parser.add_argument('--tick-ms', type=int, default=100, help="intervalul timer-ului ferestrei în harness")
+    parser.add_argument('--timeshifts', type=int, default=10)
+    parser.add_argument('--locations', type=int, default=10)
+    parser.add_argument('--profiles', type=int, default=6)
+    parser.add_argument('--heartbeat-ms', type=int, default=5)
+    parser.add_argument('--gap-ms', type=int, default=50, help="pauză între operații, pentru repaint-uri")
+    parser.add_argument('--output', help="fișier JSON pentru rezultate (implicit stdout)")
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    os.environ.setdefault('MOONHUNTER_LOG', 'WARNING')
+    data_dir = os.path.abspath(args.data_dir)
+
+    with FarmsenseStub() as stub, tempfile.TemporaryDirectory() as workdir:
+        os.environ['MOONHUNTER_FARMSENSE_URL'] = stub.url
+        prepare_workdir(data_dir, workdir)
+        os.chdir(workdir)
+
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication(sys.argv[:1])
+        app.setStyle('Fusion')
+        import moonhunter as mh
+        mh.configure_logging()
+
+        start = time.perf_counter()
+        window = mh.MoonPhaseWindow()
+        window.show()
+        app.processEvents()
+        startup_s = time.perf_counter() - start
+
+        harness = GuiHarness(mh, window, args)
+        harness.start()
+        app.exec_()
+
+        report = {
+            'meta': {
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'qpa': os.environ.get('QT_QPA_PLATFORM'),
+                'ticks': args.ticks,
+                'tick_ms': args.tick_ms,
+                'heartbeat_ms': args.heartbeat_ms,
+            },
+            'startup_ms': startup_s * 1000,
+            'phases': harness.report(),
+        }
+        window.timer.stop()
+        window.store.close()
+        os.chdir(ROOT_DIR)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    for phase, stats in report['phases'].items():
+        durations = stats['durations']
+        if durations.get('count'):
+            print(f"{phase:<10} n={durations['count']:<4} p50={durations['p50_ms']:8.1f} ms  "
+                  f"p95={durations['p95_ms']:8.1f} ms  max={durations['max_ms']:8.1f} ms  "
+                  f"stall={stats['stall']['total_ms']:8.1f} ms  repaints={stats['repaints_total']}",
+                  file=sys.stderr)
+    return 0 if harness.done else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,32 +5,355 @@ from datetime import datetime, timedelta
 import pytz
 import os
 import pandas as pd
+import numpy as np
+import functools
+import copy
+import heapq
+import itertools
 import json
+import logging
+import logging.handlers
+import re
+import shutil
+import sqlite3
+import threading
+import uuid
 from timezonefinder import TimezoneFinder
-from PyQt5.QtWidgets import (QCheckBox, QComboBox, QDateTimeEdit, QDialog, QDialogButtonBox, 
-                             QFormLayout, QGridLayout, QGroupBox, QHBoxLayout, QLabel, 
-                             QLineEdit, QMainWindow, QMessageBox, QProgressDialog, QPushButton, 
-                             QApplication, QScrollArea, QSpinBox, QTimeEdit, QVBoxLayout, QWidget)
-from PyQt5.QtCore import Qt, QTimer, QPointF, QDateTime, QTime
-from PyQt5.QtGui import QPixmap, QFont, QPalette, QPainter, QBrush, QColor
+from PyQt5.QtWidgets import (QAction, QCheckBox, QComboBox, QDateTimeEdit, QDialog, QDialogButtonBox, 
+                             QFileDialog, QFormLayout, QGridLayout, QGroupBox, QHBoxLayout, QLabel, 
+                             QLineEdit, QListView, QMainWindow, QMessageBox, QProgressDialog, QPushButton, 
+                             QApplication, QScrollArea, QSpinBox, QStyledItemDelegate, QTimeEdit, QVBoxLayout, QWidget)
+from PyQt5.QtCore import (Qt, QAbstractListModel, QDateTime, QEasingCurve, QEvent, QModelIndex, QObject,
+                          QPointF, QRect, QSize, QTime, QTimer, QVariantAnimation, pyqtSignal)
+from PyQt5.QtGui import (QPixmap, QFont, QFontMetrics, QImage, QPalette, QPainter, QPen, QBrush, QColor,
+                         QRegion)
 import math
-from skyfield.api import load, Topos
+from skyfield.api import load, load_file, Topos
 from skyfield import almanac
 
+# Categorii de logging, fiecare cu nivelul ei; mesajele folosesc formatare lazy (%s)
+# ca pe nivelurile dezactivate să nu coste nici formatare, nici I/O
+LOG_CATEGORIES = ('SCAN', 'NET', 'EPHEMERIS', 'UI', 'PERSIST', 'TRACE')
+scan_log = logging.getLogger('moonhunter.scan')
+net_log = logging.getLogger('moonhunter.net')
+ephemeris_log = logging.getLogger('moonhunter.ephemeris')
+ui_log = logging.getLogger('moonhunter.ui')
+persist_log = logging.getLogger('moonhunter.persist')
+trace_log = logging.getLogger('moonhunter.trace')
+
+# MOONHUNTER_FARMSENSE_URL permite un serviciu local (ex. bench/farmsense_stub.py) în locul celui public
+FARMSENSE_URL = os.environ.get('MOONHUNTER_FARMSENSE_URL', 'https://api.farmsense.net/v1/moonphases/')
+
+def fetch_moon_phase(timestamp):
+    """Cere faza Lunii pentru un timestamp unix; întoarce (iluminare %, vârsta în zile)"""
+    net_log.debug("GET %s?d=%d", FARMSENSE_URL, timestamp)
+    with tracer.span('net.moon_phase'):
+        response = requests.get(f'{FARMSENSE_URL}?d={timestamp}')
+    data = response.json()[0]
+    return float(data['Illumination']) * 100, float(data['Age'])
+
+class ConsecutiveDuplicateFilter(logging.Filter):
+    """Suprimă mesajele identice consecutive pentru aceeași etichetă de eveniment"""
+    def __init__(self):
+        super().__init__()
+        self.last_messages = {}
+
+    def filter(self, record):
+        event = getattr(record, 'event', None)
+        if event is None:
+            return True
+        message = record.getMessage()
+        if self.last_messages.get(event) == message:
+            return False
+        self.last_messages[event] = message
+        return True
+
+def configure_logging(levels=None, log_file=None, max_bytes=1024 * 1024, backup_count=3):
+    """
+    Configurează nivelurile pe categorii și destinația mesajelor.
+    
+    Args:
+        levels (dict): nivel per categorie, ex. {'SCAN': 'DEBUG', 'NET': 'WARNING'}
+        log_file (str): dacă e setat, mesajele merg într-un fișier rotativ în loc de consolă
+    
+    Variabilele de mediu au prioritate: MOONHUNTER_LOG ("DEBUG" sau "SCAN=DEBUG,NET=INFO")
+    și MOONHUNTER_LOG_FILE. Categoriile necunoscute sunt ignorate, iar un nivel necunoscut
+    devine INFO, cu un avertisment; configurarea greșită nu oprește pornirea aplicației.
+    """
+    levels = {category: 'INFO' for category in LOG_CATEGORIES} | dict(levels or {})
+    env_levels = os.environ.get('MOONHUNTER_LOG', '')
+    for item in filter(None, (part.strip() for part in env_levels.split(','))):
+        if '=' in item:
+            category, level = item.split('=', 1)
+            levels[category.strip().upper()] = level.strip().upper()
+        else:
+            levels = {category: item.upper() for category in LOG_CATEGORIES}
+    ignored = sorted(str(category) for category in levels if category not in LOG_CATEGORIES)
+    invalid = {}
+    for category in LOG_CATEGORIES:
+        level = levels.get(category, 'INFO')
+        if not isinstance(level, int):
+            level = str(level).upper()
+            # getLevelName întoarce numărul nivelului pentru un nume cunoscut, altfel un text
+            if not isinstance(logging.getLevelName(level), int):
+                invalid[category] = level
+                level = 'INFO'
+        levels[category] = level
+    log_file = os.environ.get('MOONHUNTER_LOG_FILE', log_file)
+
+    root = logging.getLogger('moonhunter')
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    if log_file:
+        handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s'))
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+    root.addHandler(handler)
+    if ignored:
+        root.warning("Logging: categorii necunoscute ignorate: %s (cunoscute: %s)",
+                     ", ".join(ignored), ", ".join(LOG_CATEGORIES))
+    if invalid:
+        root.warning("Logging: niveluri necunoscute, folosim INFO: %s",
+                     ", ".join(f"{category}={level}" for category, level in invalid.items()))
+
+    for category in LOG_CATEGORIES:
+        logger = logging.getLogger(f'moonhunter.{category.lower()}')
+        logger.setLevel(levels.get(category, 'INFO'))
+        if not any(isinstance(f, ConsecutiveDuplicateFilter) for f in logger.filters):
+            logger.addFilter(ConsecutiveDuplicateFilter())
+
+class _NullSpan:
+    """Span folosit când profilarea e oprită; nu face nimic"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = unix_time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, unix_time.perf_counter(), self.args)
+        return False
+
+class SpanTracer:
+    """
+    Profiler de tip tracing: înregistrează intervale (span-uri) cu nume pentru etapele costisitoare.
+    Oprit implicit; când e oprit, un span costă doar verificarea unui atribut.
+    Rezultatele se exportă ca trace Chrome/Perfetto (JSON) și ca sumar p50/p95/max pe etape.
+    """
+    MAX_EVENTS = 200000
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_path = None
+        self._lock = threading.Lock()
+        self._origin = unix_time.perf_counter()
+        self.events = []
+        self.durations = {}
+
+    def enable(self, trace_path=None):
+        self.trace_path = trace_path or self.trace_path
+        self.enabled = True
+        trace_log.info("Profilare activată%s", f" (trace: {self.trace_path})" if self.trace_path else "")
+
+    def disable(self):
+        self.enabled = False
+        trace_log.info("Profilare oprită")
+
+    def configure_from_env(self):
+        """MOONHUNTER_TRACE=<fișier.json> pornește profilarea și scrie trace-ul la închidere"""
+        trace_path = os.environ.get('MOONHUNTER_TRACE')
+        if trace_path:
+            self.enable(trace_path)
+
+    def reset(self):
+        with self._lock:
+            self._origin = unix_time.perf_counter()
+            self.events = []
+            self.durations = {}
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def traced(self, name):
+        """Decorator: întreaga funcție devine un span"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = unix_time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, start, unix_time.perf_counter())
+            return wrapper
+        return decorator
+
+    def record(self, name, start, end, args=None):
+        duration = end - start
+        event = {
+            'name': name,
+            'cat': name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': (start - self._origin) * 1e6,
+            'dur': duration * 1e6,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = {key: str(value) for key, value in args.items()}
+        with self._lock:
+            if len(self.events) < self.MAX_EVENTS:
+                self.events.append(event)
+            self.durations.setdefault(name, []).append(duration)
+
+    def summary(self):
+        """Întoarce {etapă: {'count', 'total_ms', 'p50_ms', 'p95_ms', 'max_ms'}}"""
+        def percentile(values, fraction):
+            return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self.durations.items()}
+        return {
+            name: {
+                'count': len(values),
+                'total_ms': sum(values) * 1000,
+                'p50_ms': percentile(values, 0.50) * 1000,
+                'p95_ms': percentile(values, 0.95) * 1000,
+                'max_ms': values[-1] * 1000,
+            }
+            for name, values in durations.items()
+        }
+
+    def format_summary(self):
+        rows = sorted(self.summary().items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        lines = [f"{'Etapă':<32}{'nr':>8}{'total ms':>12}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+        for name, stats in rows:
+            lines.append(f"{name:<32}{stats['count']:>8}{stats['total_ms']:>12.1f}"
+                         f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path=None):
+        """Scrie trace-ul în format Chrome Trace Event (se deschide în Perfetto sau chrome://tracing)"""
+        path = path or self.trace_path
+        if not path:
+            return None
+        with self._lock:
+            events = list(self.events)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        trace_log.info("Trace salvat în %s (%d span-uri)", path, len(events))
+        return path
+
+tracer = SpanTracer()
+
+# Temele ferestrei principale: diferă doar culorile. Stylesheet-ul e construit o singură dată,
+# cu reguli pe proprietatea dinamică 'theme'; schimbarea temei nu mai re-parsează stylesheet-ul
+THEMES = {
+    'normal': {'background': '#2b2b2b', 'border': '#404040', 'input': '#404040', 'input_border': '#505050'},
+    'future': {'background': '#2b2b3b', 'border': '#404050', 'input': '#404050', 'input_border': '#505060'},
+    'past': {'background': '#2b2b20', 'border': '#404030', 'input': '#404030', 'input_border': '#505040'},
+}
+
+def build_theme_stylesheet():
+    """Regulile de bază cu culorile temei normale, plus suprascrieri pe [theme=...] pentru celelalte"""
+    normal = THEMES['normal']
+    stylesheet = f"""
+        QMainWindow, QWidget {{
+            background-color: {normal['background']};
+        }}
+        QGroupBox {{
+            border: 2px solid {normal['border']};
+            border-radius: 6px;
+            margin-top: 12px;
+            padding-top: 10px;
+            color: white;
+            font-size: 13px;
+            font-weight: bold;
+        }}
+        QLabel, QCheckBox {{
+            color: white;
+            font-size: 13px;
+        }}
+        QComboBox, QLineEdit {{
+            background-color: {normal['input']};
+            color: white;
+            border: 1px solid {normal['input_border']};
+            border-radius: 4px;
+            padding: 5px;
+            min-height: 25px;
+            font-size: 13px;
+        }}
+        QPushButton {{
+            background-color: #0d47a1;
+            color: white;
+            border: none;
+            border-radius: 4px;
+            padding: 8px 15px;
+            font-size: 13px;
+        }}
+        QPushButton:hover {{
+            background-color: #1565c0;
+        }}
+    """
+    for name, colors in THEMES.items():
+        if name == 'normal':
+            continue
+        window = f'QMainWindow[theme="{name}"]'
+        stylesheet += f"""
+        {window}, {window} QWidget {{
+            background-color: {colors['background']};
+        }}
+        {window} QGroupBox {{
+            border: 2px solid {colors['border']};
+        }}
+        {window} QComboBox, {window} QLineEdit {{
+            background-color: {colors['input']};
+            border: 1px solid {colors['input_border']};
+        }}
+    """
+    return stylesheet
+
+THEME_STYLESHEET = build_theme_stylesheet()
+
 class MeteoDataManager:
     def __init__(self, excel_path: str = "lista_localitati_cu_statii.xlsx"):
         self.excel_path = excel_path
         self.csv_path = excel_path.replace('.xlsx', '.csv')
         self.data = self._load_data()
         
+    @tracer.traced('meteo.load_data')
     def _load_data(self):
         try:
             if os.path.exists(self.csv_path):
                 df = pd.read_csv(self.csv_path, encoding='utf-8-sig')
-                print(f"Încărcat {df.shape[0]} localități din CSV")
+                persist_log.info("Încărcat %d localități din CSV", df.shape[0])
             else:
                 df = pd.read_excel(self.excel_path)
-                print("Date încărcate din Excel")
+                persist_log.info("Date încărcate din Excel")
 
             required_columns = ['Județ', 'Localitate', 'administrare', 'Latitudine N', 'Longitudine E']
             missing_columns = [col for col in required_columns if col not in df.columns]
@@ -54,18 +377,20 @@ class MeteoDataManager:
                 if judet not in data_dict:
                     data_dict[judet] = {}
                     
+                altitude = row.get('Altitudine (m)')
                 data_dict[judet][localitate] = {
                     "latitude": float(row['Latitudine N']) if pd.notna(row['Latitudine N']) else 0,
                     "longitude": float(row['Longitudine E']) if pd.notna(row['Longitudine E']) else 0,
+                    "altitude": float(altitude) if pd.notna(altitude) else 0,
                     "administrare": administrare.lower()
                 }
             
-            print(f"\nDate încărcate cu succes:")
+            persist_log.info("Date încărcate cu succes: %d județe", len(data_dict))
         
             return data_dict
                 
         except Exception as e:
-            print(f"Eroare la încărcarea datelor: {str(e)}")
+            persist_log.error("Eroare la încărcarea datelor: %s", e)
             return {}
     
     def get_judete(self) -> list:
@@ -82,58 +407,192 @@ class MeteoDataManager:
         location_data = self.data.get(judet, {}).get(localitate, {})
         return location_data.get('latitude', 0), location_data.get('longitude', 0)
 
+    def get_altitude(self, judet: str, localitate: str) -> float:
+        """Altitudinea în metri (coloana opțională 'Altitudine (m)'); 0 dacă nu se cunoaște"""
+        return self.data.get(judet, {}).get(localitate, {}).get('altitude', 0)
+
 class CompassWidget(QLabel):
-    def __init__(self, parent=None):
+    """
+    Busola pe două straturi: fundalul (compass.png), încărcat o singură dată și păstrat în cache
+    la rezoluția ecranului (device pixel ratio), și markerii Lunii desenați peste el.
+    Când un marker se mută, se redesenează doar dreptunghiurile vechi și noi ale markerilor.
+    """
+    BACKGROUND_PATH = "compass.png"
+    MARKER_RADIUS = 8
+    ANIMATION_MS = 400
+    _background_cache = {}
+
+    def __init__(self, parent=None, animate=False):
         super().__init__(parent)
         self.setMinimumSize(384, 384)
         self.setMaximumSize(384, 384)
         self.current_azimuth = 0
+        self.displayed_azimuth = 0
         self.rise_azimuth = 0
         self.moon_visible = False
         self.distance_color = "#FFC107"  # default galben
         
+        # Animație opțională a markerului între poziții, la rata de refresh a ecranului
+        self.animation = None
+        if animate:
+            self.animation = QVariantAnimation(self)
+            self.animation.setDuration(self.ANIMATION_MS)
+            self.animation.setEasingCurve(QEasingCurve.InOutQuad)
+            self.animation.valueChanged.connect(self._on_animation_step)
+
+    @classmethod
+    def background(cls, width, height, device_pixel_ratio):
+        """Stratul de fundal, scalat o singură dată pentru dimensiunea și DPR-ul dat"""
+        key = (cls.BACKGROUND_PATH, width, height, device_pixel_ratio)
+        pixmap = cls._background_cache.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(cls.BACKGROUND_PATH)
+            if not pixmap.isNull():
+                target = QSize(round(width * device_pixel_ratio), round(height * device_pixel_ratio))
+                if pixmap.size() != target:
+                    pixmap = pixmap.scaled(target, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                pixmap.setDevicePixelRatio(device_pixel_ratio)
+            cls._background_cache[key] = pixmap
+        return pixmap
+
+    def azimuth_to_xy(self, azimuth):
+        center = self.rect().center()
+        radius = min(self.width(), self.height()) / 2 - 20
+        angle = math.radians(90 - azimuth)
+        x = center.x() + radius * math.cos(angle)
+        y = center.y() - radius * math.sin(angle)
+        return QPointF(x, y)
+
+    def marker_rect(self, azimuth):
+        """Dreptunghiul (cu margine pentru antialiasing) acoperit de un marker"""
+        point = self.azimuth_to_xy(azimuth)
+        size = self.MARKER_RADIUS + 2
+        return QRect(int(point.x()) - size, int(point.y()) - size, 2 * size + 1, 2 * size + 1)
+
+    def markers_region(self):
+        region = QRegion(self.marker_rect(self.displayed_azimuth))
+        if not self.moon_visible:
+            region = region.united(QRegion(self.marker_rect(self.rise_azimuth)))
+        return region
+
     def update_position(self, current_azimuth, rise_azimuth, is_visible, distance_color="#FFC107"):
-        self.current_azimuth = current_azimuth
+        dirty = self.markers_region()
         self.rise_azimuth = rise_azimuth
         self.moon_visible = is_visible
         self.distance_color = distance_color
-        self.update()
+        self.current_azimuth = current_azimuth
+        
+        if self.animation is not None and self.isVisible():
+            # Pe drumul cel mai scurt, inclusiv peste Nord
+            start = self.displayed_azimuth
+            delta = (current_azimuth - start + 180) % 360 - 180
+            self.animation.stop()
+            self.animation.setStartValue(float(start))
+            self.animation.setEndValue(float(start + delta))
+            self.animation.start()
+        else:
+            self.displayed_azimuth = current_azimuth
+        self.update(dirty.united(self.markers_region()))
+
+    def _on_animation_step(self, value):
+        dirty = QRegion(self.marker_rect(self.displayed_azimuth))
+        self.displayed_azimuth = value % 360
+        self.update(dirty.united(QRegion(self.marker_rect(self.displayed_azimuth))))
         
     def paintEvent(self, event):
         super().paintEvent(event)
-        pixmap = QPixmap("compass.png")
-        if not pixmap.isNull():
-            self.setPixmap(pixmap)
-            
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        center = self.rect().center()
-        radius = min(self.width(), self.height()) / 2 - 20
+        background = self.background(self.width(), self.height(), self.devicePixelRatioF())
+        if not background.isNull():
+            painter.drawPixmap(0, 0, background)
         
-        def azimuth_to_xy(azimuth):
-            angle = math.radians(90 - azimuth)
-            x = center.x() + radius * math.cos(angle)
-            y = center.y() - radius * math.sin(angle)
-            return QPointF(x, y)
-        
-        current_pos = azimuth_to_xy(self.current_azimuth)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        current_pos = self.azimuth_to_xy(self.displayed_azimuth)
         
         if self.moon_visible:
-            painter.setPen(Qt.NoPen)
             painter.setBrush(QBrush(QColor(self.distance_color)))
-            painter.drawEllipse(current_pos, 8, 8)
+            painter.drawEllipse(current_pos, self.MARKER_RADIUS, self.MARKER_RADIUS)
         else:
-            painter.setPen(Qt.NoPen)
             painter.setBrush(QBrush(QColor("#0d47a1")))
-            painter.drawEllipse(current_pos, 8, 8)
+            painter.drawEllipse(current_pos, self.MARKER_RADIUS, self.MARKER_RADIUS)
             
-            rise_pos = azimuth_to_xy(self.rise_azimuth)
+            rise_pos = self.azimuth_to_xy(self.rise_azimuth)
             painter.setBrush(QBrush(QColor(self.distance_color)))
-            painter.drawEllipse(rise_pos, 8, 8)
+            painter.drawEllipse(rise_pos, self.MARKER_RADIUS, self.MARKER_RADIUS)
         
         painter.end()
 
+class PhaseImageAtlas:
+    """
+    Imaginile fazelor (poze_cer/luna_N.png) decodate o singură dată și ținute în memorie după index.
+    Decodarea poate rula pe un fir separat la pornire (QImage e sigur în afara firului UI);
+    conversia în QPixmap se face pe firul UI, o singură dată pentru fiecare index.
+    Un index lipsă e înlocuit cu cel mai apropiat cadru disponibil, pe ciclul fazelor.
+    """
+    FILE_PREFIX = 'luna_'
+
+    def __init__(self, directory='poze_cer'):
+        self.directory = directory
+        self.paths = {}
+        self.images = {}
+        self.pixmaps = {}
+        self._lock = threading.Lock()
+        self._loader = None
+        try:
+            names = os.listdir(directory)
+        except OSError as e:
+            ui_log.error("EROARE: Nu s-a putut citi directorul de imagini %s: %s", directory, e)
+            names = []
+        for name in names:
+            stem, extension = os.path.splitext(name)
+            if extension.lower() == '.png' and stem.startswith(self.FILE_PREFIX):
+                index = stem[len(self.FILE_PREFIX):]
+                if index.isdigit():
+                    self.paths[int(index)] = os.path.join(directory, name)
+        self.cycle = max(self.paths) + 1 if self.paths else 0
+
+    def preload(self, background=True):
+        """Decodează toate imaginile; cu background=True, pe un fir daemon"""
+        if background:
+            self._loader = threading.Thread(target=self._decode_all, name='phase-atlas', daemon=True)
+            self._loader.start()
+        else:
+            self._decode_all()
+
+    def _decode_all(self):
+        for index in sorted(self.paths):
+            self._image(index)
+        ui_log.debug("Atlas faze: %d imagini decodate", len(self.images))
+
+    def _image(self, index):
+        with self._lock:
+            image = self.images.get(index)
+            if image is None:
+                image = QImage(self.paths[index])
+                self.images[index] = image
+            return image
+
+    def nearest_index(self, index):
+        """Cel mai apropiat index disponibil (distanță circulară pe ciclul fazelor); None dacă nu există imagini"""
+        if not self.paths:
+            return None
+        if index in self.paths:
+            return index
+        return min(self.paths, key=lambda available: (
+            min((index - available) % self.cycle, (available - index) % self.cycle), available))
+
+    def file_name(self, index):
+        return os.path.basename(self.paths[index])
+
+    def pixmap(self, index):
+        """QPixmap pentru un index existent (vezi nearest_index); se apelează doar pe firul UI"""
+        pixmap = self.pixmaps.get(index)
+        if pixmap is None:
+            pixmap = QPixmap.fromImage(self._image(index))
+            self.pixmaps[index] = pixmap
+        return pixmap
+
 class MoonProgressDialog(QProgressDialog):
     def __init__(self, title, parent=None):
         super().__init__(parent)
@@ -343,12 +802,22 @@ class LocationProfile:
         )
 
 class ProfileManager:
-    def __init__(self, settings_file='moon_settings.json'):
+    """
+    Profilurile de locație. Cu un store, profilurile se citesc și se modifică doar prin el;
+    moon_settings.json rămâne calea de import (la prima pornire cu SQLite) și de export
+    (save_settings scrie acolo o copie), dar nu mai e rescris la fiecare modificare.
+    Fără store, fișierul JSON e singura stocare.
+    """
+    def __init__(self, settings_file='moon_settings.json', store=None):
         self.settings_file = settings_file
+        self.store = store
         self.profiles = {}
         self.load_profiles()
 
     def load_profiles(self):
+        if self.store:
+            self.profiles = self.store.load_profiles()
+            return
         try:
             with open(self.settings_file, 'r') as f:
                 data = json.load(f)
@@ -376,12 +845,18 @@ class ProfileManager:
 
     def add_profile(self, profile):
         self.profiles[profile.name] = profile
-        self.save_profiles()
+        if self.store:
+            self.store.save_profile(profile)
+        else:
+            self.save_profiles()
 
     def remove_profile(self, name):
         if name in self.profiles:
             del self.profiles[name]
-            self.save_profiles()
+            if self.store:
+                self.store.delete_profile(name)
+            else:
+                self.save_profiles()
 
     def get_profile(self, name):
         return self.profiles.get(name)
@@ -513,155 +988,37 @@ class TimeshiftWidget(QGroupBox):
         if hasattr(self.parent, 'timeshift_ts'):
             delattr(self.parent, 'timeshift_ts')
             
-        # Resetăm stylesheet-ul la original
-        self.parent.setStyleSheet("""
-            QMainWindow, QWidget {
-                background-color: #2b2b2b;
-            }
-            QGroupBox {
-                border: 2px solid #404040;
-                border-radius: 6px;
-                margin-top: 12px;
-                padding-top: 10px;
-                color: white;
-                font-size: 13px;
-                font-weight: bold;
-            }
-            QLabel, QCheckBox {
-                color: white;
-                font-size: 13px;
-            }
-            QComboBox, QLineEdit {
-                background-color: #404040;
-                color: white;
-                border: 1px solid #505050;
-                border-radius: 4px;
-                padding: 5px;
-                min-height: 25px;
-                font-size: 13px;
-            }
-            QPushButton {
-                background-color: #0d47a1;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 8px 15px;
-                font-size: 13px;
-            }
-            QPushButton:hover {
-                background-color: #1565c0;
-            }
-        """)
+        self.parent.apply_theme('normal')
         
-        self.parent.update_moon_data()
-        self.parent.print_moon_status()
+        self.parent.update_all()
         
     def on_timeshift(self):
         try:
             selected_datetime = self.datetime_picker.dateTime().toPyDateTime()
             current_datetime = QDateTime.currentDateTime().toPyDateTime()
             
-            print("\n=== DEBUG TIMESHIFT COLORS ===")
-            print(f"Current time: {current_datetime}")
-            print(f"Selected time: {selected_datetime}")
-            print(f"Going to: {'FUTURE' if selected_datetime > current_datetime else 'PAST'}")
+            ui_log.debug("Timeshift: current=%s selected=%s direction=%s",
+                         current_datetime, selected_datetime,
+                         'FUTURE' if selected_datetime > current_datetime else 'PAST')
             
             # Aplicăm timeshift
             self.parent.apply_timeshift(selected_datetime)
             
-            # Definim stylesheet-ul pentru timeshift
-            if selected_datetime > current_datetime:
-                # Mov pentru viitor
-                self.parent.setStyleSheet("""
-                    QMainWindow, QWidget {
-                        background-color: #2b2b3b;
-                    }
-                    QGroupBox {
-                        border: 2px solid #404050;
-                        border-radius: 6px;
-                        margin-top: 12px;
-                        padding-top: 10px;
-                        color: white;
-                        font-size: 13px;
-                        font-weight: bold;
-                    }
-                    QLabel, QCheckBox {
-                        color: white;
-                        font-size: 13px;
-                    }
-                    QComboBox, QLineEdit {
-                        background-color: #404050;
-                        color: white;
-                        border: 1px solid #505060;
-                        border-radius: 4px;
-                        padding: 5px;
-                        min-height: 25px;
-                        font-size: 13px;
-                    }
-                    QPushButton {
-                        background-color: #0d47a1;
-                        color: white;
-                        border: none;
-                        border-radius: 4px;
-                        padding: 8px 15px;
-                        font-size: 13px;
-                    }
-                    QPushButton:hover {
-                        background-color: #1565c0;
-                    }
-                """)
-            else:
-                # Sepia pentru trecut
-                self.parent.setStyleSheet("""
-                    QMainWindow, QWidget {
-                        background-color: #2b2b20;
-                    }
-                    QGroupBox {
-                        border: 2px solid #404030;
-                        border-radius: 6px;
-                        margin-top: 12px;
-                        padding-top: 10px;
-                        color: white;
-                        font-size: 13px;
-                        font-weight: bold;
-                    }
-                    QLabel, QCheckBox {
-                        color: white;
-                        font-size: 13px;
-                    }
-                    QComboBox, QLineEdit {
-                        background-color: #404030;
-                        color: white;
-                        border: 1px solid #505040;
-                        border-radius: 4px;
-                        padding: 5px;
-                        min-height: 25px;
-                        font-size: 13px;
-                    }
-                    QPushButton {
-                        background-color: #0d47a1;
-                        color: white;
-                        border: none;
-                        border-radius: 4px;
-                        padding: 8px 15px;
-                        font-size: 13px;
-                    }
-                    QPushButton:hover {
-                        background-color: #1565c0;
-                    }
-                """)
+            # Tema: mov pentru viitor, sepia pentru trecut
+            self.parent.apply_theme('future' if selected_datetime > current_datetime else 'past')
                 
             self.is_timeshifted = True
             self.error_label.hide()
             
         except Exception as e:
-            print(f"TIMESHIFT ERROR: {str(e)}")
+            ui_log.error("TIMESHIFT ERROR: %s", e)
             self.error_label.setText(f"Eroare: {str(e)}")
             self.error_label.show()
 
 class Scene:
     """Reprezintă o scenă fotografică cu toate condițiile necesare"""
     def __init__(self, name, location_type, location_data):
+        self.id = uuid.uuid4().hex
         self.name = name
         self.location_type = location_type
         self.location_data = location_data
@@ -671,45 +1028,88 @@ class Scene:
         self.elevation_min = 0
         self.elevation_max = 90
         
+        # Limitele stricte (fereastra „perfectă” din interiorul celei largi); None = nefolosite
+        self.strict_azimuth_min = None
+        self.strict_azimuth_max = None
+        self.strict_elevation_min = None
+        self.strict_elevation_max = None
+        
         self.time_start = "20:00"
         self.time_end = "23:00"
         self.time_end_next_day = False
         self.min_illumination = 0
+        # Reguli suplimentare în limbajul SceneConstraint ("" = niciuna)
+        self.constraint = ""
+        # Scorul după care se alege cel mai bun moment al fiecărei oportunități (PeakFinder.SCORES)
+        self.peak_score = 'illumination'
+        # Motorul scanărilor acestei scene (OpportunityScanner.SCENE_ENGINES)
+        self.scan_engine = 'vector'
+        # Căutarea: orizontul în zile și numărul de oportunități păstrate
+        self.search_days = 90
+        self.num_opportunities = 3
         self.opportunities = []
         self.current_opportunity_index = 0
+        # De unde continuă căutarea după ultima oportunitate găsită (datetime UTC, None = necunoscut)
+        self.scan_position = None
+
+    # Câmpurile datetime ale unei oportunități, salvate ca string-uri UTC
+    DATETIME_FIELDS = ('start_datetime', 'peak_datetime', 'end_datetime', 'best_datetime')
+    STRICT_FIELDS = ('strict_azimuth_min', 'strict_azimuth_max', 'strict_elevation_min', 'strict_elevation_max')
+
+    def has_strict_boundaries(self):
+        return all(getattr(self, field) is not None for field in self.STRICT_FIELDS)
+
+    @staticmethod
+    def utc_string(value):
+        """datetime -> string UTC pentru JSON (datetime-urile naive sunt considerate UTC)"""
+        if value.tzinfo is None:
+            value = pytz.UTC.localize(value)
+        return value.astimezone(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S %z')
+
+    @staticmethod
+    def parse_utc_string(text):
+        """Inversul lui utc_string"""
+        return pytz.UTC.localize(datetime.strptime(text.split('+')[0].strip(), '%Y-%m-%d %H:%M:%S'))
+
+    @staticmethod
+    def opportunity_to_dict(opp):
+        """Convertește datele unei oportunități în string-uri UTC pentru JSON"""
+        opp_dict = opp.copy()
+        
+        for field in Scene.DATETIME_FIELDS:
+            if isinstance(opp_dict.get(field), datetime):
+                opp_dict[field] = Scene.utc_string(opp_dict[field])
+        if 'strict_intervals' in opp_dict:
+            opp_dict['strict_intervals'] = [Scene.opportunity_to_dict(sub) for sub in opp_dict['strict_intervals']]
+        if persist_log.isEnabledFor(logging.DEBUG):
+            persist_log.debug("  Oportunitate: %s - %s", opp.get('start_datetime'),
+                              opp.get('end_datetime'))
+        return opp_dict
+
+    @staticmethod
+    def opportunity_from_dict(opp):
+        """Reconstruiește datele unei oportunități (datetime UTC) din JSON"""
+        opp_dict = opp.copy()
+        
+        for field in Scene.DATETIME_FIELDS:
+            if field not in opp_dict:
+                continue
+            try:
+                opp_dict[field] = Scene.parse_utc_string(opp_dict[field])
+            except Exception as e:
+                persist_log.error("EROARE la parsare %s %r: %s", field, opp_dict[field], e)
+        if 'strict_intervals' in opp_dict:
+            opp_dict['strict_intervals'] = [Scene.opportunity_from_dict(sub) for sub in opp_dict['strict_intervals']]
+        return opp_dict
     
     def to_dict(self):
-        print("\n=== DEBUG Scene.to_dict() ===")
-        print(f"Salvare scenă: {self.name}")
-        print(f"Număr oportunități de salvat: {len(self.opportunities)}")
+        persist_log.debug("Salvare scenă: %s (%d oportunități)", self.name, len(self.opportunities))
         
         # Convert datetime objects to strings for JSON
-        opportunities = []
-        for i, opp in enumerate(self.opportunities):
-            print(f"\nOportunitatea {i+1}:")
-            opp_dict = opp.copy()
-            print(f"  Original start: {opp_dict.get('start_datetime')}")
-            print(f"  Original end: {opp_dict.get('end_datetime')}")
-            
-            if 'start_datetime' in opp_dict:
-                if opp_dict['start_datetime'].tzinfo is None:
-                    print("  Start datetime nu are timezone, adăugăm UTC")
-                    opp_dict['start_datetime'] = pytz.UTC.localize(opp_dict['start_datetime'])
-                formatted_start = opp_dict['start_datetime'].astimezone(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S %z')
-                print(f"  Formatted start: {formatted_start}")
-                opp_dict['start_datetime'] = formatted_start
-                
-            if 'end_datetime' in opp_dict:
-                if opp_dict['end_datetime'].tzinfo is None:
-                    print("  End datetime nu are timezone, adăugăm UTC")
-                    opp_dict['end_datetime'] = pytz.UTC.localize(opp_dict['end_datetime'])
-                formatted_end = opp_dict['end_datetime'].astimezone(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S %z')
-                print(f"  Formatted end: {formatted_end}")
-                opp_dict['end_datetime'] = formatted_end
-                
-            opportunities.append(opp_dict)
+        opportunities = [self.opportunity_to_dict(opp) for opp in self.opportunities]
         
         data = {
+            'id': self.id,
             'name': self.name,
             'location_type': self.location_type,
             'location_data': self.location_data,
@@ -717,198 +1117,2198 @@ class Scene:
             'azimuth_max': self.azimuth_max,
             'elevation_min': self.elevation_min,
             'elevation_max': self.elevation_max,
+            'strict_azimuth_min': self.strict_azimuth_min,
+            'strict_azimuth_max': self.strict_azimuth_max,
+            'strict_elevation_min': self.strict_elevation_min,
+            'strict_elevation_max': self.strict_elevation_max,
             'time_start': self.time_start,
             'time_end': self.time_end,
             'time_end_next_day': self.time_end_next_day,
             'min_illumination': self.min_illumination,
+            'constraint': self.constraint,
+            'peak_score': self.peak_score,
+            'scan_engine': self.scan_engine,
+            'search_days': self.search_days,
+            'num_opportunities': self.num_opportunities,
             'opportunities': opportunities,
-            'current_opportunity_index': self.current_opportunity_index
+            'current_opportunity_index': self.current_opportunity_index,
+            'scan_position': self.utc_string(self.scan_position) if self.scan_position else None
         }
-        print("\nDate finale pentru salvare:")
-        print(f"Număr oportunități: {len(opportunities)}")
-        print("=" * 50)
         return data
 
     @classmethod
     def from_dict(cls, data):
         """Creează o scenă din dicționar"""
-        print("\n=== DEBUG Scene.from_dict() ===")
-        print(f"Încărcare scenă: {data['name']}")
-        print(f"Număr oportunități de încărcat: {len(data.get('opportunities', []))}")
+        persist_log.debug("Încărcare scenă: %s (%d oportunități)",
+                          data['name'], len(data.get('opportunities', [])))
         
         scene = cls(data['name'], data['location_type'], data['location_data'])
         for key, value in data.items():
             if key == 'opportunities':
-                print("\nProcesare oportunități:")
-                opportunities = []
-                for i, opp in enumerate(value):
-                    print(f"\nOportunitatea {i+1}:")
-                    opp_dict = opp.copy()
-                    
-                    if 'start_datetime' in opp_dict:
-                        print(f"  Loading start: {opp_dict['start_datetime']}")
-                        try:
-                            # Parsăm data și timezone-ul
-                            dt_str = opp_dict['start_datetime'].split('+')[0].strip()
-                            dt = datetime.strptime(dt_str, '%Y-%m-%d %H:%M:%S')
-                            dt_utc = pytz.UTC.localize(dt)
-                            opp_dict['start_datetime'] = dt_utc
-                            print(f"  Parsed start: {dt_utc}")
-                        except Exception as e:
-                            print(f"  !!! EROARE la parsare start_datetime: {e}")
-                            
-                    if 'end_datetime' in opp_dict:
-                        print(f"  Loading end: {opp_dict['end_datetime']}")
-                        try:
-                            dt_str = opp_dict['end_datetime'].split('+')[0].strip()
-                            dt = datetime.strptime(dt_str, '%Y-%m-%d %H:%M:%S')
-                            dt_utc = pytz.UTC.localize(dt)
-                            opp_dict['end_datetime'] = dt_utc
-                            print(f"  Parsed end: {dt_utc}")
-                        except Exception as e:
-                            print(f"  !!! EROARE la parsare end_datetime: {e}")
-                    
-                    opportunities.append(opp_dict)
-                
-                print(f"\nTotal oportunități încărcate: {len(opportunities)}")
-                scene.opportunities = opportunities
+                scene.opportunities = [cls.opportunity_from_dict(opp) for opp in value]
+            elif key == 'scan_position':
+                scene.scan_position = cls.parse_utc_string(value) if value else None
             else:
                 setattr(scene, key, value)
-        
-        print("\nÎncărcare completă")
-        print("=" * 50)
         return scene
 
-class SceneEditorWindow(QMainWindow):
-    """Fereastra pentru editarea scenelor fotografice"""
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.parent = parent
-        self.setWindowTitle("Scene Editor")
-        self.setMinimumSize(800, 600)
-        self.scenes = []
-        self.opportunity_labels = {}
-        self.use_strict_checkbox = QCheckBox("Use strict boundaries for opportunity calculation")
-        self.use_strict_checkbox.setChecked(False)
-        
-        # Setăm stylesheet-ul pentru această fereastră
-        self.setStyleSheet("""
-            QMainWindow, QWidget {
-                background-color: #2b2b2b;
-            }
-            QGroupBox {
-                border: 2px solid #404040;
-                border-radius: 6px;
-                margin-top: 12px;
-                padding-top: 10px;
-                color: white;
-                font-size: 13px;
-                font-weight: bold;
-            }
-            QLabel {
-                color: white;
-            }
-            QPushButton {
-                background-color: #0d47a1;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 8px 15px;
-            }
-        """)
-        
-        # Widget central și layout principal
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        layout = QVBoxLayout()
-        central_widget.setLayout(layout)
-        
-        # Header cu buton New Scene
-        header = QHBoxLayout()
-        self.new_scene_btn = QPushButton("New Scene")
-        self.new_scene_btn.clicked.connect(self.create_new_scene)
-        header.addWidget(self.new_scene_btn)
-        header.addStretch()
-        layout.addLayout(header)
-        
-        # Zonă scrollabilă pentru scene
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        
-        self.scenes_container = QWidget()
-        self.scenes_layout = QVBoxLayout()
-        self.scenes_container.setLayout(self.scenes_layout)
-        scroll.setWidget(self.scenes_container)
-        layout.addWidget(scroll)
-        
-        # Încarcă scenele salvate
-        try:
-            self.load_scenes()
-        except Exception as e:
-            print(f"Eroare la încărcarea scenelor în constructor: {e}")
-            self.scenes = []
+class SceneStore:
+    """
+    Bază de date SQLite pentru scene, oportunități, rating-uri de lună plină și profiluri.
+    Fiecare modificare scrie doar rândurile afectate (upsert), nu tot fișierul.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS scenes (
+            id TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            location_type TEXT NOT NULL,
+            params TEXT NOT NULL,
+            current_opportunity_index INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_scenes_position ON scenes(position);
+        CREATE TABLE IF NOT EXISTS opportunities (
+            scene_id TEXT NOT NULL REFERENCES scenes(id) ON DELETE CASCADE,
+            idx INTEGER NOT NULL,
+            start_utc REAL NOT NULL,
+            end_utc REAL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (scene_id, idx)
+        );
+        CREATE INDEX IF NOT EXISTS idx_opportunities_start ON opportunities(start_utc);
+        CREATE INDEX IF NOT EXISTS idx_opportunities_scene ON opportunities(scene_id, start_utc);
+        CREATE TABLE IF NOT EXISTS full_moon_ratings (
+            date_utc REAL PRIMARY KEY,
+            date TEXT NOT NULL,
+            rating INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS profiles (
+            name TEXT PRIMARY KEY,
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL,
+            timezone TEXT
+        );
+    """
 
-    def get_current_location_data(self):
-        """Obține datele locației curente"""
-        print("\n=== DEBUG GET_CURRENT_LOCATION_DATA ===")
-        try:
-            print(f"Active view: {self.parent.settings['active_view']}")
-            if self.parent.settings['active_view'] == 'romania':
-                data = {
-                    'judet': self.parent.judet_combo.currentText(),
-                    'localitate': self.parent.localitate_combo.currentText(),
-                    'lat': self.parent.location.latitude.degrees,
-                    'lon': self.parent.location.longitude.degrees
-                }
-                print(f"Date România: {data}")
-                return data
-            elif self.parent.settings['active_view'] == 'profile':
-                profile = self.parent.profile_manager.get_profile(
-                    self.parent.profile_combo.currentText())
-                data = {
-                    'name': profile.name,
-                    'lat': profile.latitude,
-                    'lon': profile.longitude,
-                    'timezone': profile.timezone
-                }
-                print(f"Date profil: {data}")
-                return data
-            else:  # gps
-                coords = self.parent.gps_input.text().strip().split()
-                data = {
-                    'lat': float(coords[0]),
-                    'lon': float(coords[1])
-                }
-                print(f"Date GPS: {data}")
-                return data
-        except Exception as e:
-            print(f"EROARE la obținerea datelor locației: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            raise
+    def __init__(self, db_path='moon_data.db', json_path='moon_scenes.json',
+                 settings_file='moon_settings.json'):
+        self.db_path = db_path
+        self.json_path = json_path
+        self.settings_file = settings_file
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(self.SCHEMA)
+        self._import_legacy_files()
 
-    def create_new_scene(self, scene_to_edit=None):
-        """Creează sau editează o scenă"""
-        print("\n=== DEBUG CREATE_NEW_SCENE ===")
-        print(f"Scene to edit: {scene_to_edit}")
-        
-        try:
-            dialog = QDialog(self)
-            print("Dialog creat")
-            dialog.setWindowTitle("New Scene" if not scene_to_edit else "Edit Scene")
-            dialog.setStyleSheet("""
-                QDialog {
-                    background-color: #2b2b2b;
-                }
-                QLabel {
-                    color: white;
-                }
-                QGroupBox {
-                    color: white;
-                }
-                QSpinBox {
-                    background-color: #404040;
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT INTO meta(key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def _import_legacy_files(self):
+        """La prima pornire, preluăm datele din fișierele JSON existente"""
+        if not self._get_meta('json_imported'):
+            if os.path.exists(self.json_path):
+                try:
+                    count = self.import_json(self.json_path)
+                    persist_log.info("Importate %d scene din %s", count, self.json_path)
+                except Exception as e:
+                    persist_log.warning("Nu s-au putut importa scenele din JSON: %s", e)
+            with self.conn:
+                self._set_meta('json_imported', '1')
+
+        if not self._get_meta('settings_imported'):
+            try:
+                with open(self.settings_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for profile_data in data.get('profiles', {}).values():
+                    self.save_profile(LocationProfile.from_dict(profile_data))
+                ratings = [{
+                    'date': datetime.strptime(rating['date'], '%Y-%m-%d %H:%M:%S %z'),
+                    'rating': rating['rating']
+                } for rating in data.get('full_moon_ratings', [])]
+                if ratings:
+                    self.save_full_moon_ratings(ratings)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+            except Exception as e:
+                persist_log.warning("Nu s-au putut importa setările în baza de date: %s", e)
+            with self.conn:
+                self._set_meta('settings_imported', '1')
+
+    @staticmethod
+    def _utc_seconds(value):
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = pytz.UTC.localize(value)
+            return value.timestamp()
+        return None
+
+    def _upsert_scene(self, scene):
+        data = scene.to_dict()
+        opportunities = data.pop('opportunities')
+        self.conn.execute(
+            """
+            INSERT INTO scenes(id, position, name, location_type, params, current_opportunity_index)
+            VALUES (?, (SELECT COALESCE(MAX(position) + 1, 0) FROM scenes), ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                name = excluded.name,
+                location_type = excluded.location_type,
+                params = excluded.params,
+                current_opportunity_index = excluded.current_opportunity_index
+            """,
+            (scene.id, scene.name, scene.location_type,
+             json.dumps(data, ensure_ascii=False), scene.current_opportunity_index))
+
+        for idx, (opp, opp_dict) in enumerate(zip(scene.opportunities, opportunities)):
+            self.conn.execute(
+                """
+                INSERT INTO opportunities(scene_id, idx, start_utc, end_utc, data)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(scene_id, idx) DO UPDATE SET
+                    start_utc = excluded.start_utc,
+                    end_utc = excluded.end_utc,
+                    data = excluded.data
+                """,
+                (scene.id, idx, self._utc_seconds(opp.get('start_datetime')),
+                 self._utc_seconds(opp.get('end_datetime')),
+                 json.dumps(opp_dict, ensure_ascii=False)))
+        self.conn.execute("DELETE FROM opportunities WHERE scene_id = ? AND idx >= ?",
+                          (scene.id, len(scene.opportunities)))
+
+    def save_scene(self, scene):
+        """Salvează (insert sau update) o singură scenă împreună cu oportunitățile ei"""
+        with self.conn:
+            self._upsert_scene(scene)
+
+    def save_scenes(self, scenes):
+        """Salvează mai multe scene într-o singură tranzacție"""
+        with self.conn:
+            for scene in scenes:
+                self._upsert_scene(scene)
+
+    def save_scene_state(self, scene):
+        """Salvează doar indexul oportunității curente (folosit la navigare)"""
+        with self.conn:
+            self.conn.execute("UPDATE scenes SET current_opportunity_index = ? WHERE id = ?",
+                              (scene.current_opportunity_index, scene.id))
+
+    def delete_scene(self, scene):
+        """Șterge o scenă; oportunitățile ei sunt șterse în cascadă"""
+        with self.conn:
+            self.conn.execute("DELETE FROM scenes WHERE id = ?", (scene.id,))
+
+    def load_scenes(self):
+        """Încarcă toate scenele în ordinea în care au fost create"""
+        opportunities = {}
+        for row in self.conn.execute(
+                "SELECT scene_id, data FROM opportunities ORDER BY scene_id, idx"):
+            opportunities.setdefault(row['scene_id'], []).append(json.loads(row['data']))
+
+        scenes = []
+        for row in self.conn.execute(
+                "SELECT id, params, current_opportunity_index FROM scenes ORDER BY position"):
+            data = json.loads(row['params'])
+            data['id'] = row['id']
+            # save_scene_state (navigarea) actualizează doar coloana, nu și params
+            data['current_opportunity_index'] = row['current_opportunity_index']
+            data['opportunities'] = opportunities.get(row['id'], [])
+            scenes.append(Scene.from_dict(data))
+        return scenes
+
+    def upcoming_opportunities(self, after, limit=3):
+        """Următoarele oportunități din toate scenele, folosind indexul pe timpul de start"""
+        rows = self.conn.execute(
+            """
+            SELECT s.id AS scene_id, s.name AS scene_name, o.data AS data
+            FROM opportunities o JOIN scenes s ON s.id = o.scene_id
+            WHERE o.start_utc > ?
+            ORDER BY o.start_utc
+            LIMIT ?
+            """,
+            (self._utc_seconds(after), limit))
+        return [{
+            'scene_id': row['scene_id'],
+            'scene_name': row['scene_name'],
+            'opportunity': Scene.opportunity_from_dict(json.loads(row['data']))
+        } for row in rows]
+
+    def import_json(self, path):
+        """Importă scenele dintr-un fișier moon_scenes.json"""
+        with open(path, 'r', encoding='utf-8') as f:
+            raw_scenes = json.load(f).get('scenes', [])
+        scenes = [Scene.from_dict(scene_data) for scene_data in raw_scenes]
+        self.save_scenes(scenes)
+        return len(scenes)
+
+    def export_json(self, path=None):
+        """Exportă toate scenele în formatul moon_scenes.json (cu backup)"""
+        path = path or self.json_path
+        data = {
+            'scenes': [scene.to_dict() for scene in self.load_scenes()]
+        }
+        if os.path.exists(path):
+            try:
+                shutil.copy2(path, path + '.bak')
+            except Exception as e:
+                persist_log.warning("Nu s-a putut crea backup: %s", e)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return len(data['scenes'])
+
+    def load_full_moon_ratings(self):
+        return [{
+            'date': datetime.strptime(row['date'], '%Y-%m-%d %H:%M:%S %z'),
+            'rating': row['rating']
+        } for row in self.conn.execute(
+            "SELECT date, rating FROM full_moon_ratings ORDER BY date_utc")]
+
+    def save_full_moon_ratings(self, ratings):
+        """Înlocuiește setul de rating-uri (următoarele luni pline) într-o tranzacție"""
+        with self.conn:
+            self.conn.execute("DELETE FROM full_moon_ratings")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO full_moon_ratings(date_utc, date, rating) VALUES (?, ?, ?)",
+                [(rating['date'].timestamp(),
+                  rating['date'].strftime('%Y-%m-%d %H:%M:%S %z'),
+                  rating['rating']) for rating in ratings])
+
+    def load_profiles(self):
+        return {
+            row['name']: LocationProfile(row['name'], row['latitude'],
+                                         row['longitude'], row['timezone'])
+            for row in self.conn.execute(
+                "SELECT name, latitude, longitude, timezone FROM profiles ORDER BY rowid")
+        }
+
+    def save_profile(self, profile):
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO profiles(name, latitude, longitude, timezone) VALUES (?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    latitude = excluded.latitude,
+                    longitude = excluded.longitude,
+                    timezone = excluded.timezone
+                """,
+                (profile.name, profile.latitude, profile.longitude, profile.timezone))
+
+    def delete_profile(self, name):
+        with self.conn:
+            self.conn.execute("DELETE FROM profiles WHERE name = ?", (name,))
+
+    def close(self):
+        self.conn.close()
+
+class JournalSceneStore:
+    """
+    Stocare pe fișiere pentru scene: un snapshot (moon_scenes.json) plus un jurnal
+    append-only (moon_scenes.journal) cu câte o înregistrare mică pentru fiecare
+    modificare. Când jurnalul depășește pragul, compactarea rescrie snapshot-ul
+    în fundal (tot prin .tmp + .bak).
+    """
+    COMPACT_THRESHOLD = 256 * 1024
+
+    def __init__(self, json_path='moon_scenes.json', settings_file='moon_settings.json',
+                 ratings_path='moon_ratings.json', compact_threshold=None):
+        self.json_path = json_path
+        self.journal_path = json_path.replace('.json', '.journal')
+        self.sealed_path = self.journal_path + '.sealed'
+        self.settings_file = settings_file
+        self.ratings_path = ratings_path
+        self.compact_threshold = compact_threshold or self.COMPACT_THRESHOLD
+        self._state = {}
+        self._lock = threading.Lock()
+        self._compaction = None
+        without_id = self._replay()
+        if os.path.exists(self.sealed_path):
+            # Compactare întreruptă: starea reconstituită devine noul snapshot
+            self._write_snapshot(self.json_path, list(self._state.values()))
+            os.remove(self.sealed_path)
+        elif without_id:
+            # Id-urile generate pentru scenele vechi se scriu o dată în snapshot, ca să rămână stabile
+            self._write_snapshot(self.json_path, list(self._state.values()))
+            persist_log.info("Id-uri noi salvate pentru %d scene vechi", len(without_id))
+        self._trim_torn_tail()
+        self._journal = open(self.journal_path, 'ab')
+
+    def _read_snapshot(self):
+        for path in (self.json_path, self.json_path + '.bak'):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f).get('scenes', [])
+            except FileNotFoundError:
+                continue
+            except json.JSONDecodeError:
+                persist_log.warning("Snapshot-ul %s este corupt, încercăm backup-ul", path)
+        return []
+
+    def _read_journal(self, path):
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return []
+        records = []
+        for line in content.split(b'\n')[:-1]:  # ultima bucată e goală sau scrisă pe jumătate
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                persist_log.warning("Înregistrare coruptă ignorată în %s", path)
+        return records
+
+    def _trim_torn_tail(self):
+        """Elimină o ultimă înregistrare scrisă pe jumătate, ca noile adăugări să fie valide"""
+        try:
+            with open(self.journal_path, 'rb+') as f:
+                content = f.read()
+                if content and not content.endswith(b'\n'):
+                    f.truncate(content.rfind(b'\n') + 1)
+        except FileNotFoundError:
+            pass
+
+    def _apply(self, record):
+        op = record['op']
+        if op == 'upsert':
+            self._state[record['scene']['id']] = record['scene']
+        elif op == 'delete':
+            self._state.pop(record['id'], None)
+        elif op == 'index' and record['id'] in self._state:
+            # Copy-on-write: snapshot-ul din compactare poate citi vechiul dicționar
+            scene_data = dict(self._state[record['id']])
+            scene_data['current_opportunity_index'] = record['index']
+            self._state[record['id']] = scene_data
+
+    def _replay(self):
+        """
+        Snapshot + jurnalul sigilat (compactare întreruptă) + jurnalul activ.
+        Întoarce scenele din snapshot care nu aveau id (primesc unul nou, încă nesalvat).
+        """
+        without_id = []
+        for scene_data in self._read_snapshot():
+            if 'id' not in scene_data:
+                scene_data['id'] = uuid.uuid4().hex
+                without_id.append(scene_data)
+            self._state[scene_data['id']] = scene_data
+        # Înregistrările sunt idempotente, deci re-aplicarea după snapshot e sigură
+        for path in (self.sealed_path, self.journal_path):
+            for record in self._read_journal(path):
+                self._apply(record)
+        return without_id
+
+    def _append(self, records):
+        with self._lock:
+            for record in records:
+                self._apply(record)
+            self._journal.write(b''.join(
+                json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+                for record in records))
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            should_compact = (self._journal.tell() >= self.compact_threshold
+                              and self._compaction is None)
+            if should_compact:
+                self._start_compaction()
+
+    def _start_compaction(self):
+        """Sigilează jurnalul curent și rescrie snapshot-ul pe un thread separat"""
+        self._journal.close()
+        os.replace(self.journal_path, self.sealed_path)
+        self._journal = open(self.journal_path, 'ab')
+        snapshot = list(self._state.values())
+        self._compaction = threading.Thread(target=self._compact, args=(snapshot,),
+                                            daemon=True)
+        self._compaction.start()
+
+    def _compact(self, snapshot):
+        try:
+            self._write_snapshot(self.json_path, snapshot)
+            os.remove(self.sealed_path)
+            persist_log.info("Compactare jurnal finalizată (%d scene)", len(snapshot))
+        except Exception:
+            persist_log.exception("EROARE la compactarea jurnalului")
+        finally:
+            with self._lock:
+                self._compaction = None
+
+    @staticmethod
+    def _write_snapshot(path, scenes):
+        if os.path.exists(path):
+            try:
+                shutil.copy2(path, path + '.bak')
+            except Exception as e:
+                persist_log.warning("Nu s-a putut crea backup: %s", e)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'scenes': scenes}, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def save_scene(self, scene):
+        self._append([{'op': 'upsert', 'scene': scene.to_dict()}])
+
+    def save_scenes(self, scenes):
+        self._append([{'op': 'upsert', 'scene': scene.to_dict()} for scene in scenes])
+
+    def save_scene_state(self, scene):
+        self._append([{'op': 'index', 'id': scene.id, 'index': scene.current_opportunity_index}])
+
+    def delete_scene(self, scene):
+        self._append([{'op': 'delete', 'id': scene.id}])
+
+    def load_scenes(self):
+        with self._lock:
+            scenes_data = list(self._state.values())
+        return [Scene.from_dict(scene_data) for scene_data in scenes_data]
+
+    def upcoming_opportunities(self, after, limit=3):
+        with self._lock:
+            scenes_data = list(self._state.values())
+        candidates = []
+        for scene_data in scenes_data:
+            for opp_data in scene_data.get('opportunities', []):
+                opp = Scene.opportunity_from_dict(opp_data)
+                if opp['start_datetime'] > after:
+                    candidates.append((opp['start_datetime'], scene_data, opp))
+        return [{
+            'scene_id': scene_data['id'],
+            'scene_name': scene_data['name'],
+            'opportunity': opp
+        } for _, scene_data, opp in heapq.nsmallest(limit, candidates, key=lambda c: c[0])]
+
+    def import_json(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            raw_scenes = json.load(f).get('scenes', [])
+        scenes = [Scene.from_dict(scene_data) for scene_data in raw_scenes]
+        self.save_scenes(scenes)
+        return len(scenes)
+
+    def export_json(self, path=None):
+        with self._lock:
+            scenes_data = list(self._state.values())
+        self._write_snapshot(path or self.json_path, scenes_data)
+        return len(scenes_data)
+
+    def load_full_moon_ratings(self):
+        try:
+            with open(self.ratings_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return []
+        return [{
+            'date': datetime.strptime(rating['date'], '%Y-%m-%d %H:%M:%S %z'),
+            'rating': rating['rating']
+        } for rating in data.get('full_moon_ratings', [])]
+
+    def save_full_moon_ratings(self, ratings):
+        json_ratings = [{
+            'date': rating['date'].strftime('%Y-%m-%d %H:%M:%S %z'),
+            'rating': rating['rating']
+        } for rating in ratings]
+        with open(self.ratings_path, 'w', encoding='utf-8') as f:
+            json.dump({'full_moon_ratings': json_ratings}, f, indent=4, ensure_ascii=False)
+
+    def load_profiles(self):
+        try:
+            with open(self.settings_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return {
+            name: LocationProfile.from_dict(profile_data)
+            for name, profile_data in data.get('profiles', {}).items()
+        }
+
+    def _update_profiles(self, update):
+        """Citește profilurile din moon_settings.json, aplică update(profiles) și rescrie atomic fișierul"""
+        try:
+            with open(self.settings_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        update(data.setdefault('profiles', {}))
+        temp_path = self.settings_file + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, self.settings_file)
+
+    def save_profile(self, profile):
+        self._update_profiles(lambda profiles: profiles.__setitem__(profile.name, profile.to_dict()))
+
+    def delete_profile(self, name):
+        self._update_profiles(lambda profiles: profiles.pop(name, None))
+
+    def close(self):
+        compaction = self._compaction
+        if compaction:
+            compaction.join()
+        self._journal.close()
+
+
+def localize_naive(timezone, naive):
+    """Ora locală naivă -> datetime cu fus orar (pytz localize, sau tzinfo direct pentru alte fusuri)"""
+    if hasattr(timezone, 'localize'):
+        return timezone.localize(naive)
+    return naive.replace(tzinfo=timezone)
+
+def local_window_intervals(time_start, time_end, ends_next_day, timezone, first_date, days, not_before=None):
+    """
+    Fereastra orară locală a unei scene (HH:MM - HH:MM, eventual până a doua zi) ca intervale UTC
+    pentru fiecare din cele days zile de la first_date: listă de (zi, început, sfârșit).
+
+    Orele locale trec prin tabela de tranziții a fusului (pytz localize), deci fereastra rămâne la
+    aceeași oră locală și după schimbarea orei, iar o noapte care traversează schimbarea are durata
+    reală. O oră din golul de primăvară e luată cu decalajul de iarnă, ora dublă de toamnă e cea de
+    iarnă. Semantica e cea din OpportunityScanner.is_time_in_window; not_before taie începutul.
+    """
+    def minutes(text):
+        hour, minute = map(int, text.split(':'))
+        return hour * 60 + minute
+
+    start_minutes, end_minutes = minutes(time_start), minutes(time_end)
+    if end_minutes < start_minutes:
+        if not ends_next_day:
+            return []
+        end_minutes += 24 * 60
+
+    intervals = []
+    for day in range(days):
+        midnight = datetime.combine(first_date + timedelta(days=day), datetime.min.time())
+        start = localize_naive(timezone, midnight + timedelta(minutes=start_minutes)).astimezone(pytz.UTC)
+        end = localize_naive(timezone, midnight + timedelta(minutes=end_minutes)).astimezone(pytz.UTC)
+        if not_before is not None:
+            if end < not_before:
+                continue
+            start = max(start, not_before)
+        intervals.append((day, start, end))
+    return intervals
+
+def open_scene_store(settings):
+    """Alege stocarea scenelor: 'sqlite' (implicit) sau 'journal' (doar fișiere)"""
+    if settings.get('scene_storage') == 'journal':
+        return JournalSceneStore()
+    return SceneStore()
+
+class ConstraintError(ValueError):
+    """Expresie de constrângere invalidă; mesajul indică poziția din text"""
+
+class SampleSeries:
+    """
+    Seria de momente evaluată de o constrângere: poziția (alt/az) și iluminarea vin din scanare,
+    restul mărimilor (Soare, fază, distanță, zi, dată) se calculează doar dacă expresia le cere,
+    o singură dată pentru toată seria.
+    """
+    def __init__(self, sky, t, times, elevations, azimuths, illuminations):
+        self.sky = sky
+        self.t = t
+        self.times = times
+        self._values = {'alt': elevations, 'az': azimuths, 'illumination': illuminations}
+
+    def __getitem__(self, name):
+        if name not in self._values:
+            self._values[name] = getattr(self, f'_compute_{name}')()
+        return self._values[name]
+
+    def _compute_sun_alt(self):
+        observer = self.sky.eph['earth'] + self.sky.location
+        alt, _, _ = observer.at(self.t).observe(self.sky.eph['sun']).apparent().altaz()
+        return alt.degrees
+
+    def _compute_waxing(self):
+        # Unghiul de fază crește de la 0° (lună nouă) la 180° (lună plină)
+        return almanac.moon_phase(self.sky.eph, self.t).degrees < 180
+
+    def _compute_distance_rating(self):
+        distance = self.sky.eph['earth'].at(self.t).observe(self.sky.eph['moon']).distance().km
+        return MoonSky.distance_rating(distance)
+
+    def _compute_weekday(self):
+        return np.array([moment.weekday() for moment in self.times])
+
+    def _compute_date(self):
+        return np.array([moment.toordinal() for moment in self.times])
+
+class SceneConstraint:
+    """
+    Limbajul de constrângeri al scenelor, compilat o dată în operații NumPy pe seria scanării.
+
+        alt between 5 and 20 and az between 300 and 60
+        illumination >= 85 and waxing and not weekday in (mon, tue)
+        (sun_alt < -6 or distance_rating >= 8) and date between 2026-12-01 and 2027-02-28
+
+    Mărimi numerice: alt, az, illumination, sun_alt, distance_rating, comparate cu < <= > >= = !=
+    sau cu between (pentru az, un interval peste nord, ca 300..60, e acceptat). waxing și waning
+    sunt condiții simple; weekday (mon..sun) acceptă = != și in (...); date (AAAA-LL-ZZ, ora
+    locală) acceptă comparații și between. Operatorii logici sunt and, or, not și parantezele.
+    """
+    NUMERIC = ('alt', 'az', 'illumination', 'sun_alt', 'distance_rating')
+    WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+    COMPARISONS = {
+        '<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+        '=': np.equal, '==': np.equal, '!=': np.not_equal,
+    }
+    TOKEN = re.compile(r"\s*(?:(\d{4}-\d{2}-\d{2})|(-?\d+(?:\.\d+)?)|([A-Za-z_]\w*)|(<=|>=|==|!=|<|>|=|\(|\)|,))")
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = self._tokenize(text)
+        self._position = 0
+        self.predicate = self._parse_or()
+        if self._peek() is not None:
+            self._fail(f"termen neașteptat „{self._peek()[1]}”")
+
+    def __call__(self, series):
+        """Masca booleană a momentelor din serie care respectă constrângerea"""
+        return np.asarray(self.predicate(series), dtype=bool)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def compile(text):
+        """Constrângerea compilată pentru un text (rezultatele sunt refolosite între scanări)"""
+        return SceneConstraint(text)
+
+    # --- Analiza lexicală și sintactică
+
+    def _tokenize(self, text):
+        tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = self.TOKEN.match(text, position)
+            if not match:
+                raise ConstraintError(f"Caracter neașteptat la poziția {position + 1}: „{text[position:].strip()[:10]}”")
+            date, number, word, symbol = match.groups()
+            if date:
+                tokens.append(('date', date, position))
+            elif number:
+                tokens.append(('number', float(number), position))
+            elif word:
+                tokens.append(('word', word.lower(), position))
+            else:
+                tokens.append(('symbol', symbol, position))
+            position = match.end()
+        return tokens
+
+    def _fail(self, message):
+        token = self._peek()
+        where = f" (poziția {token[2] + 1})" if token else " (la sfârșit)"
+        raise ConstraintError(f"Constrângere invalidă: {message}{where}")
+
+    def _peek(self):
+        return self.tokens[self._position] if self._position < len(self.tokens) else None
+
+    def _accept(self, value):
+        token = self._peek()
+        if token and token[0] in ('word', 'symbol') and token[1] == value:
+            self._position += 1
+            return True
+        return False
+
+    def _expect(self, value):
+        if not self._accept(value):
+            self._fail(f"se aștepta „{value}”")
+
+    def _next(self, kind, description):
+        token = self._peek()
+        if token is None or token[0] != kind:
+            self._fail(f"se aștepta {description}")
+        self._position += 1
+        return token[1]
+
+    def _parse_or(self):
+        terms = [self._parse_and()]
+        while self._accept('or'):
+            terms.append(self._parse_and())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda series: functools.reduce(np.logical_or, (term(series) for term in terms))
+
+    def _parse_and(self):
+        terms = [self._parse_not()]
+        while self._accept('and'):
+            terms.append(self._parse_not())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda series: functools.reduce(np.logical_and, (term(series) for term in terms))
+
+    def _parse_not(self):
+        if self._accept('not'):
+            term = self._parse_not()
+            return lambda series: np.logical_not(term(series))
+        return self._parse_atom()
+
+    def _parse_atom(self):
+        if self._accept('('):
+            term = self._parse_or()
+            self._expect(')')
+            return term
+        name = self._next('word', "o mărime sau o condiție")
+        if name == 'waxing':
+            return lambda series: series['waxing']
+        if name == 'waning':
+            return lambda series: np.logical_not(series['waxing'])
+        if name in self.NUMERIC:
+            return self._parse_range(name, 'number', "un număr")
+        if name == 'date':
+            return self._parse_range(name, 'date', "o dată AAAA-LL-ZZ", self._date_ordinal)
+        if name == 'weekday':
+            return self._parse_weekday()
+        self._position -= 1
+        self._fail(f"mărime necunoscută „{name}”")
+
+    def _date_ordinal(self, text):
+        """Data AAAA-LL-ZZ ca număr de zi; o dată inexistentă (ex: 2026-02-30) e o eroare de constrângere"""
+        try:
+            return datetime.strptime(text, '%Y-%m-%d').toordinal()
+        except ValueError:
+            # Eroarea arată poziția datei, nu a simbolului de după ea
+            self._position -= 1
+            self._fail(f"dată inexistentă „{text}”")
+
+    def _parse_range(self, name, kind, description, convert=lambda value: value):
+        if self._accept('between'):
+            low = convert(self._next(kind, description))
+            self._expect('and')
+            high = convert(self._next(kind, description))
+            if name == 'az':
+                return lambda series: OpportunityScanner.azimuth_mask(series['az'], low, high)
+            return lambda series: (series[name] >= low) & (series[name] <= high)
+        token = self._peek()
+        if token is None or token[0] != 'symbol' or token[1] not in self.COMPARISONS:
+            self._fail("se aștepta un operator de comparație sau between")
+        self._position += 1
+        operation = self.COMPARISONS[token[1]]
+        value = convert(self._next(kind, description))
+        return lambda series: operation(series[name], value)
+
+    def _parse_weekday(self):
+        def weekday():
+            day = self._next('word', "o zi (mon..sun)")
+            if day not in self.WEEKDAYS:
+                self._position -= 1
+                self._fail(f"zi necunoscută „{day}”")
+            return self.WEEKDAYS.index(day)
+
+        if self._accept('in'):
+            self._expect('(')
+            days = [weekday()]
+            while self._accept(','):
+                days.append(weekday())
+            self._expect(')')
+            return lambda series: np.isin(series['weekday'], days)
+        if self._accept('=') or self._accept('=='):
+            day = weekday()
+            return lambda series: series['weekday'] == day
+        if self._accept('!='):
+            day = weekday()
+            return lambda series: series['weekday'] != day
+        self._fail("se aștepta in (...), = sau !=")
+
+class PeakFinder:
+    """
+    Cel mai bun moment dintr-o oportunitate, după scorul ales în scenă (scene.peak_score).
+    Un profil grosier (PROFILE_POINTS momente, un singur apel vectorial) găsește zona maximului,
+    apoi o căutare de tip secțiune de aur în jurul lui coboară la TOLERANCE_SECONDS;
+    în total câteva zeci de evaluări ale efemeridelor pe oportunitate.
+    """
+    SCORES = {
+        'illumination': "Maximum illumination",
+        'azimuth_center': "Closest to azimuth center",
+        'elevation_center': "Closest to elevation center",
+        'elevation_max': "Highest moon",
+    }
+    PROFILE_POINTS = 9
+    TOLERANCE_SECONDS = 30
+    GOLDEN = (math.sqrt(5) - 1) / 2
+
+    def __init__(self, sky, scene):
+        self.sky = sky
+        self.scene = scene
+        self.name = scene.peak_score if scene.peak_score in self.SCORES else 'illumination'
+        self.evaluations = 0
+        # Limitele stricte, dacă există, sunt ținta; altfel cele largi
+        if scene.has_strict_boundaries():
+            azimuth_range = (scene.strict_azimuth_min, scene.strict_azimuth_max)
+            elevation_range = (scene.strict_elevation_min, scene.strict_elevation_max)
+        else:
+            azimuth_range = (scene.azimuth_min, scene.azimuth_max)
+            elevation_range = (scene.elevation_min, scene.elevation_max)
+        self.azimuth_center = (azimuth_range[0] + ((azimuth_range[1] - azimuth_range[0]) % 360) / 2) % 360
+        self.elevation_center = sum(elevation_range) / 2
+
+    def positions(self, times):
+        """(elevații, azimuturi) pentru o listă de momente, într-un singur apel Skyfield"""
+        t = self.sky.ts.from_datetimes(times)
+        alt, az, _ = (self.sky.eph['earth'] + self.sky.location).at(t).observe(self.sky.eph['moon']).apparent().altaz()
+        return alt.degrees, az.degrees
+
+    def scores(self, times):
+        """Scorurile pentru o listă de momente; se calculează doar ce cere scorul ales"""
+        self.evaluations += len(times)
+        if self.name == 'illumination':
+            return almanac.fraction_illuminated(self.sky.eph, 'moon', self.sky.ts.from_datetimes(times)) * 100
+        elevations, azimuths = self.positions(times)
+        if self.name == 'azimuth_center':
+            # Distanța unghiulară până la centru, cu semn schimbat (mai aproape = scor mai mare)
+            scores = -np.abs((azimuths - self.azimuth_center + 180) % 360 - 180)
+        elif self.name == 'elevation_center':
+            scores = -np.abs(elevations - self.elevation_center)
+        else:
+            scores = elevations
+        return scores
+
+    def refine(self, opportunity):
+        """Completează oportunitatea cu best_datetime/best_score/best_elevation/best_azimuth și score_profile"""
+        start = opportunity['start_datetime']
+        span = max((opportunity['end_datetime'] - start).total_seconds(), 0)
+        offsets = np.linspace(0, span, self.PROFILE_POINTS if span else 1)
+        scores = self.scores([start + timedelta(seconds=float(x)) for x in offsets])
+        k = int(np.argmax(scores))
+        best = (float(offsets[k]), float(scores[k]))
+
+        # Secțiunea de aur pe intervalul dintre vecinii celui mai bun punct din profil
+        low, high = float(offsets[max(k - 1, 0)]), float(offsets[min(k + 1, len(offsets) - 1)])
+
+        def evaluate(x):
+            return x, float(self.scores([start + timedelta(seconds=x)])[0])
+
+        if high - low > self.TOLERANCE_SECONDS:
+            left = evaluate(high - self.GOLDEN * (high - low))
+            right = evaluate(low + self.GOLDEN * (high - low))
+            while high - low > self.TOLERANCE_SECONDS:
+                if left[1] >= right[1]:
+                    high, right = right[0], left
+                    left = evaluate(high - self.GOLDEN * (high - low))
+                else:
+                    low, left = left[0], right
+                    right = evaluate(low + self.GOLDEN * (high - low))
+            best = max(best, left, right, key=lambda candidate: candidate[1])
+
+        offset, score = best
+        best_datetime = start + timedelta(seconds=round(offset))
+        elevations, azimuths = self.positions([best_datetime])
+        opportunity['peak_score'] = self.name
+        opportunity['best_datetime'] = best_datetime
+        opportunity['best_score'] = score
+        opportunity['best_elevation'] = float(elevations[0])
+        opportunity['best_azimuth'] = float(azimuths[0])
+        # Profilul: [minute de la start, scor], pentru afișare și comparații
+        opportunity['score_profile'] = [[round(float(x) / 60, 1), round(float(value), 3)]
+                                        for x, value in zip(offsets, scores)]
+        return opportunity
+
+class LunarModel:
+    """
+    Model analitic al Lunii (seriile trunchiate ELP-2000/82 din Meeus, „Astronomical Algorithms”,
+    cap. 47), vectorial: poziția topocentrică (altitudine, azimut) pentru multe momente deodată,
+    fără efemeride. Include nutația principală și paralaxa observatorului (cu altitudinea lui);
+    nu include refracția, ca apparent().altaz() fără presiune. Eroarea față de de421 e de ordinul
+    miimilor de grad (vezi MAX_ERROR_DEGREES); folosit de motorul 'analytic' doar ca filtru.
+    """
+    # Eroarea maximă a poziției față de de421, măsurată pe 2025-2035 (în azimut: înmulțită cu cos altitudine)
+    MAX_ERROR_DEGREES = 0.01
+    EARTH_RADIUS_KM = 6378.14
+    EARTH_FLATTENING = 0.99664719
+
+    # Longitudine și distanță: multiplii lui D, M, M', F; Σl (1e-6 grade); Σr (1e-3 km)
+    LONGITUDE_DISTANCE_TERMS = np.array([
+        (0, 0, 1, 0, 6288774, -20905355), (2, 0, -1, 0, 1274027, -3699111),
+        (2, 0, 0, 0, 658314, -2955968), (0, 0, 2, 0, 213618, -569925),
+        (0, 1, 0, 0, -185116, 48888), (0, 0, 0, 2, -114332, -3149),
+        (2, 0, -2, 0, 58793, 246158), (2, -1, -1, 0, 57066, -152138),
+        (2, 0, 1, 0, 53322, -170733), (2, -1, 0, 0, 45758, -204586),
+        (0, 1, -1, 0, -40923, -129620), (1, 0, 0, 0, -34720, 108743),
+        (0, 1, 1, 0, -30383, 104755), (2, 0, 0, -2, 15327, 10321),
+        (0, 0, 1, 2, -12528, 0), (0, 0, 1, -2, 10980, 79661),
+        (4, 0, -1, 0, 10675, -34782), (0, 0, 3, 0, 10034, -23210),
+        (4, 0, -2, 0, 8548, -21636), (2, 1, -1, 0, -7888, 24208),
+        (2, 1, 0, 0, -6766, 30824), (1, 0, -1, 0, -5163, -8379),
+        (1, 1, 0, 0, 4987, -16675), (2, -1, 1, 0, 4036, -12831),
+        (2, 0, 2, 0, 3994, -10445), (4, 0, 0, 0, 3861, -11650),
+        (2, 0, -3, 0, 3665, 14403), (0, 1, -2, 0, -2689, -7003),
+        (2, 0, -1, 2, -2602, 0), (2, -1, -2, 0, 2390, 10056),
+        (1, 0, 1, 0, -2348, 6322), (2, -2, 0, 0, 2236, -9884),
+        (0, 1, 2, 0, -2120, 5751), (0, 2, 0, 0, -2069, 0),
+        (2, -2, -1, 0, 2048, -4950), (2, 0, 1, -2, -1773, 4130),
+        (2, 0, 0, 2, -1595, 0), (4, -1, -1, 0, 1215, -3958),
+        (0, 0, 2, 2, -1110, 0), (3, 0, -1, 0, -892, 3258),
+        (2, 1, 1, 0, -810, 2616), (4, -1, -2, 0, 759, -1897),
+        (0, 2, -1, 0, -713, -2117), (2, 2, -1, 0, -700, 2354),
+        (2, 1, -2, 0, 691, 0), (2, -1, 0, -2, 596, 0),
+        (4, 0, 1, 0, 549, -1423), (0, 0, 4, 0, 537, -1117),
+        (4, -1, 0, 0, 520, -1571), (1, 0, -2, 0, -487, -1739),
+        (2, 1, 0, -2, -399, 0), (0, 0, 2, -2, -381, -4421),
+        (1, 1, 1, 0, 351, 0), (3, 0, -2, 0, -340, 0),
+        (4, 0, -3, 0, 330, 0), (2, -1, 2, 0, 327, 0),
+        (0, 2, 1, 0, -323, 1165), (1, 1, -1, 0, 299, 0),
+        (2, 0, 3, 0, 294, 0), (2, 0, -1, -2, 0, 8752),
+    ], dtype=float)
+    # Latitudine: multiplii lui D, M, M', F; Σb (1e-6 grade)
+    LATITUDE_TERMS = np.array([
+        (0, 0, 0, 1, 5128122), (0, 0, 1, 1, 280602), (0, 0, 1, -1, 277693),
+        (2, 0, 0, -1, 173237), (2, 0, -1, 1, 55413), (2, 0, -1, -1, 46271),
+        (2, 0, 0, 1, 32573), (0, 0, 2, 1, 17198), (2, 0, 1, -1, 9266),
+        (0, 0, 2, -1, 8822), (2, -1, 0, -1, 8216), (2, 0, -2, -1, 4324),
+        (2, 0, 1, 1, 4200), (2, 1, 0, -1, -3359), (2, -1, -1, 1, 2463),
+        (2, -1, 0, 1, 2211), (2, -1, -1, -1, 2065), (0, 1, -1, -1, -1870),
+        (4, 0, -1, -1, 1828), (0, 1, 0, 1, -1794), (0, 0, 0, 3, -1749),
+        (0, 1, -1, 1, -1565), (1, 0, 0, 1, -1491), (0, 1, 1, 1, -1475),
+        (0, 1, 1, -1, -1410), (0, 1, 0, -1, -1344), (1, 0, 0, -1, -1335),
+        (0, 0, 3, 1, 1107), (4, 0, 0, -1, 1021), (4, 0, -1, 1, 833),
+    ], dtype=float)
+
+    def __init__(self, latitude, longitude, elevation_m=0.0):
+        self.latitude = np.radians(latitude)
+        self.longitude = longitude
+        # Coordonatele geocentrice ale observatorului (Meeus, cap. 11), în raze ecuatoriale
+        u = np.arctan(self.EARTH_FLATTENING * np.tan(self.latitude))
+        height = elevation_m / (self.EARTH_RADIUS_KM * 1000)
+        self.rho_sin = self.EARTH_FLATTENING * np.sin(u) + height * np.sin(self.latitude)
+        self.rho_cos = np.cos(u) + height * np.cos(self.latitude)
+
+    @classmethod
+    def for_location(cls, location):
+        """Modelul pentru un Topos Skyfield (latitudine, longitudine, altitudine)"""
+        return cls(location.latitude.degrees, location.longitude.degrees, location.elevation.m)
+
+    @classmethod
+    def geocentric(cls, jd_tt):
+        """(longitudine, latitudine ecliptică aparentă în grade, distanța în km, oblicitatea în grade)"""
+        T = (np.asarray(jd_tt, dtype=float) - 2451545.0) / 36525.0
+        L = 218.3164477 + 481267.88123421 * T - 0.0015786 * T ** 2 + T ** 3 / 538841
+        D = 297.8501921 + 445267.1114034 * T - 0.0018819 * T ** 2 + T ** 3 / 545868
+        M = 357.5291092 + 35999.0502909 * T - 0.0001536 * T ** 2
+        Mp = 134.9633964 + 477198.8675055 * T + 0.0087414 * T ** 2 + T ** 3 / 69699
+        F = 93.2720950 + 483202.0175233 * T - 0.0036539 * T ** 2 - T ** 3 / 3526000
+        E = 1 - 0.002516 * T - 0.0000074 * T ** 2
+        arguments = np.radians(np.stack([D, M, Mp, F]))
+
+        shape = (-1,) + (1,) * np.ndim(T)
+
+        def series(terms, columns):
+            angles = np.tensordot(terms[:, :4], arguments, axes=1)
+            # Termenii cu M depind de excentricitatea orbitei Pământului
+            eccentricity = E ** np.abs(terms[:, 1]).reshape(shape)
+            return [(terms[:, column].reshape(shape) * eccentricity * function(angles)).sum(axis=0)
+                    for column, function in columns]
+
+        sum_l, sum_r = series(cls.LONGITUDE_DISTANCE_TERMS, ((4, np.sin), (5, np.cos)))
+        sum_b, = series(cls.LATITUDE_TERMS, ((4, np.sin),))
+        A1 = np.radians(119.75 + 131.849 * T)
+        A2 = np.radians(53.09 + 479264.290 * T)
+        A3 = np.radians(313.45 + 481266.484 * T)
+        L_rad, Mp_rad, F_rad = np.radians(L), np.radians(Mp), np.radians(F)
+        sum_l = sum_l + 3958 * np.sin(A1) + 1962 * np.sin(L_rad - F_rad) + 318 * np.sin(A2)
+        sum_b = (sum_b - 2235 * np.sin(L_rad) + 382 * np.sin(A3) + 175 * np.sin(A1 - F_rad)
+                 + 175 * np.sin(A1 + F_rad) + 127 * np.sin(L_rad - Mp_rad) - 115 * np.sin(L_rad + Mp_rad))
+
+        # Nutația: doar termenii principali (sub 0,001° rămași)
+        omega = np.radians(125.04452 - 1934.136261 * T)
+        sun = np.radians(280.4665 + 36000.7698 * T)
+        moon = np.radians(218.3165 + 481267.8813 * T)
+        nutation_longitude = (-17.20 * np.sin(omega) - 1.32 * np.sin(2 * sun) - 0.23 * np.sin(2 * moon)
+                              + 0.21 * np.sin(2 * omega)) / 3600
+        nutation_obliquity = (9.20 * np.cos(omega) + 0.57 * np.cos(2 * sun) + 0.10 * np.cos(2 * moon)
+                              - 0.09 * np.cos(2 * omega)) / 3600
+        obliquity = 23.4392911 - 0.0130042 * T + nutation_obliquity
+
+        longitude = L + sum_l / 1e6 + nutation_longitude
+        return longitude, sum_b / 1e6, 385000.56 + sum_r / 1000, obliquity, nutation_longitude
+
+    def altaz(self, t):
+        """(altitudine, azimut) în grade pentru momentele Skyfield t (vector)"""
+        longitude, latitude, distance, obliquity, nutation_longitude = self.geocentric(t.tt)
+        lam, beta, eps = np.radians(longitude), np.radians(latitude), np.radians(obliquity)
+        right_ascension = np.arctan2(np.sin(lam) * np.cos(eps) - np.tan(beta) * np.sin(eps), np.cos(lam))
+        declination = np.arcsin(np.sin(beta) * np.cos(eps) + np.cos(beta) * np.sin(eps) * np.sin(lam))
+
+        # Timpul sideral aparent la Greenwich, apoi unghiul orar local (spre vest)
+        days = np.asarray(t.ut1, dtype=float) - 2451545.0
+        T = days / 36525.0
+        sidereal = (280.46061837 + 360.98564736629 * days + 0.000387933 * T ** 2 - T ** 3 / 38710000
+                    + nutation_longitude * np.cos(eps))
+        hour_angle = np.radians(sidereal + self.longitude) - right_ascension
+
+        # Paralaxa: vectorul Lunii minus vectorul observatorului, în raze ecuatoriale
+        radii = distance / self.EARTH_RADIUS_KM
+        x = radii * np.cos(declination) * np.cos(hour_angle) - self.rho_cos
+        y = radii * np.cos(declination) * np.sin(hour_angle)
+        z = radii * np.sin(declination) - self.rho_sin
+        hour_angle = np.arctan2(y, x)
+        declination = np.arctan2(z, np.hypot(x, y))
+
+        phi = self.latitude
+        altitude = np.arcsin(np.sin(phi) * np.sin(declination) +
+                             np.cos(phi) * np.cos(declination) * np.cos(hour_angle))
+        azimuth = np.arctan2(-np.cos(declination) * np.sin(hour_angle),
+                             np.cos(phi) * np.sin(declination) - np.sin(phi) * np.cos(declination) * np.cos(hour_angle))
+        return np.degrees(altitude), np.mod(np.degrees(azimuth), 360)
+
+class OpportunityScanner:
+    """
+    Căutarea oportunităților pentru o scenă, fără dependențe de interfață.
+    sky furnizează ts, eph, location și current_timezone (de obicei MoonPhaseWindow).
+
+    Regulile scenei (scene.constraint, limbajul SceneConstraint) se aplică împreună cu limitele.
+    Dacă scena are și limite stricte, fiecare interval (larg) primește în 'strict_intervals'
+    sub-intervalele în care sunt îndeplinite și acestea, din aceleași eșantioane.
+
+    Motoare (engine):
+      'vector' - implicit: pozițiile și iluminarea (din efemeride) calculate vectorial, pe bucăți
+                 de CHUNK_DAYS zile; memorie constantă indiferent de orizont
+      'analytic' - ca 'vector', dar pozițiile sunt filtrate întâi cu LunarModel; doar momentele aflate
+                 la cel mult SCREEN_MARGIN_DEGREES de limitele scenei sunt recalculate din efemeride
+      'sample' - calculul inițial, moment cu moment, cu iluminarea cerută serviciului farmsense
+    """
+    STEP_MINUTES = 15
+    CHUNK_DAYS = 30
+    ENGINES = ('vector', 'analytic', 'sample')
+    # Motoarele care se pot alege pentru o scenă (scene.scan_engine)
+    SCENE_ENGINES = {
+        'vector': "Exact (JPL ephemeris)",
+        'analytic': "Fast (analytic pre-screen, exact check)",
+    }
+    # Marja filtrului analitic: de 10 ori eroarea maximă a modelului
+    SCREEN_MARGIN_DEGREES = 10 * LunarModel.MAX_ERROR_DEGREES
+
+    def __init__(self, sky, days_to_check=90, engine='vector'):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Motor de scanare necunoscut: {engine}")
+        self.sky = sky
+        self.days_to_check = days_to_check
+        self.engine = engine
+        self.cancelled = False
+        self.days_scanned = 0
+        self.started = None
+        # Momentul de la care o scanare ulterioară continuă exact după ultima oportunitate produsă
+        self.resume_time = None
+
+    def days_per_second(self):
+        """Viteza scanării curente (sau ultimei), în zile scanate pe secundă"""
+        if not self.started or not self.days_scanned:
+            return 0.0
+        return self.days_scanned / max(unix_time.perf_counter() - self.started, 1e-9)
+
+    def scan(self, scene, num_opportunities=3, progress=None):
+        """
+        Identifică intervalele complete în care sunt îndeplinite toate condițiile scenei
+        și întoarce primele num_opportunities, sortate cronologic.
+
+        progress(day, days, hour=None, minute=None) e apelat la începutul fiecărei zile (motorul
+        'sample' și la fiecare oră și moment evaluat); dacă întoarce False, scanarea se oprește
+        și rezultatul e None.
+        """
+        with tracer.span('scan.sweep', scene=scene.name, days=self.days_to_check, engine=self.engine):
+            opportunities = list(itertools.islice(self.iter_opportunities(scene, progress), num_opportunities))
+        if self.cancelled:
+            return None
+        scan_log.info("Găsite %d intervale optime (%d zile scanate, %.0f zile/s)",
+                      len(opportunities), self.days_scanned, self.days_per_second())
+        return opportunities
+
+    def iter_opportunities(self, scene, progress=None, start_time=None):
+        """
+        Generator: produce oportunitățile în ordine cronologică, pe măsură ce sunt găsite,
+        începând de acum sau de la start_time (de exemplu resume_time-ul unei scanări anterioare).
+
+        Zilele consecutive cu intervale formează un grup, iar din fiecare grup se păstrează intervalul
+        cu iluminarea maximă. Un grup e complet la prima zi fără intervale, deci oportunitatea lui
+        poate fi produsă imediat; consumatorul se poate opri oricând, fără să scaneze tot orizontul.
+        Din grup se ține doar cel mai bun interval, deci memoria nu crește cu orizontul.
+        La anulare (progress întoarce False), generatorul se oprește și cancelled devine True.
+
+        Înainte de fiecare oportunitate produsă, resume_time devine miezul nopții (local) al zilei de
+        după cea care a încheiat grupul (o zi fără intervale), deci o scanare pornită de acolo nu pierde
+        și nu repetă nimic.
+        """
+        self.cancelled = False
+        self.days_scanned = 0
+        self.started = unix_time.perf_counter()
+        if start_time is None:
+            current_time = datetime.now(self.sky.current_timezone)
+        else:
+            current_time = start_time.astimezone(self.sky.current_timezone)
+        self.resume_time = current_time
+        days_to_check = self.days_to_check
+
+        scan_log.info("Căutăm oportunități între %s și %s (motor %s); condiții: Az %s°-%s°, El %s°-%s°, "
+                      "iluminare minimă %s%%",
+                      current_time.date(), (current_time + timedelta(days=days_to_check)).date(), self.engine,
+                      scene.azimuth_min, scene.azimuth_max,
+                      scene.elevation_min, scene.elevation_max, scene.min_illumination)
+        if progress is None:
+            progress = lambda *args: True
+
+        sweep = self._sweep_sample if self.engine == 'sample' else self._sweep_vector
+        best = None
+        for day, day_intervals in sweep(scene, current_time, progress):
+            self.days_scanned = day + 1
+            # O zi fără intervale încheie grupul curent
+            if day_intervals:
+                for interval in day_intervals:
+                    if best is None or interval['max_illumination'] > best['max_illumination']:
+                        best = interval
+            elif best:
+                self.resume_time = self.day_start(current_time, day + 1)
+                yield self._select(scene, best)
+                best = None
+
+        if not self.cancelled:
+            # Orizontul a fost scanat complet; un grup încă deschis se încheie aici
+            self.resume_time = self.day_start(current_time, days_to_check)
+            if best:
+                yield self._select(scene, best)
+
+    def _select(self, scene, best_interval):
+        """
+        Intervalul cu iluminarea maximă al unui grup de zile consecutive, completat cu distanța
+        și cu cel mai bun moment (PeakFinder)
+        """
+        scan_log.debug("Grup încheiat: iluminare maximă %.1f%%", best_interval['max_illumination'])
+        # Distanța se calculează o singură dată, aici; afișările citesc câmpurile din înregistrare
+        with tracer.span('scan.enrich'):
+            self.enrich(self.sky, best_interval)
+        with tracer.span('scan.peak', score=scene.peak_score):
+            PeakFinder(self.sky, scene).refine(best_interval)
+        return best_interval
+
+    @staticmethod
+    def _open_interval(test_time, elevation, azimuth, illumination, strict=None):
+        interval = {
+            'start_datetime': test_time,
+            'elevation_min': elevation,
+            'elevation_max': elevation,
+            'azimuth_min': azimuth,
+            'azimuth_max': azimuth,
+            'illumination': illumination,
+            'max_illumination': illumination,
+            'start_elevation': elevation,
+            'start_azimuth': azimuth,
+            'peak_datetime': test_time,
+            'peak_elevation': elevation,
+            'peak_azimuth': azimuth,
+            # Ultimul moment valid din interval
+            'end_elevation': elevation,
+            'end_azimuth': azimuth,
+        }
+        if strict is not None:
+            interval['strict_intervals'] = []
+            OpportunityScanner._track_strict(interval, test_time, illumination, strict)
+        return interval
+
+    @staticmethod
+    def _extend_interval(interval, test_time, elevation, azimuth, illumination, strict=None):
+        interval['elevation_min'] = min(interval['elevation_min'], elevation)
+        interval['elevation_max'] = max(interval['elevation_max'], elevation)
+        interval['azimuth_min'] = min(interval['azimuth_min'], azimuth)
+        interval['azimuth_max'] = max(interval['azimuth_max'], azimuth)
+        if illumination > interval['max_illumination']:
+            interval['max_illumination'] = illumination
+            interval['peak_datetime'] = test_time
+            interval['peak_elevation'] = elevation
+            interval['peak_azimuth'] = azimuth
+        interval['end_elevation'] = elevation
+        interval['end_azimuth'] = azimuth
+        if strict is not None:
+            OpportunityScanner._track_strict(interval, test_time, illumination, strict)
+
+    @staticmethod
+    def _track_strict(interval, test_time, illumination, strict):
+        """
+        Sub-intervalele din limitele stricte, evaluate pe același eșantion ca intervalul larg.
+        end_datetime e ultimul moment strict; cheia temporară _strict_open dispare la închidere.
+        """
+        if not strict:
+            interval.pop('_strict_open', None)
+            return
+        if interval.get('_strict_open'):
+            sub = interval['strict_intervals'][-1]
+            sub['end_datetime'] = test_time
+            if illumination > sub['max_illumination']:
+                sub['max_illumination'] = illumination
+        else:
+            interval['strict_intervals'].append(
+                {'start_datetime': test_time, 'end_datetime': test_time, 'max_illumination': illumination})
+            interval['_strict_open'] = True
+
+    @staticmethod
+    def _close_interval(interval, end_time):
+        interval['end_datetime'] = end_time
+        interval.pop('_strict_open', None)
+        return interval
+
+    @staticmethod
+    def strict_mask(scene, azimuths, elevations):
+        """Masca limitelor stricte pentru aceleași poziții (None dacă scena nu are limite stricte)"""
+        if not scene.has_strict_boundaries():
+            return None
+        return (OpportunityScanner.azimuth_mask(azimuths, scene.strict_azimuth_min, scene.strict_azimuth_max) &
+                (elevations >= scene.strict_elevation_min) & (elevations <= scene.strict_elevation_max))
+
+    def day_start(self, current_time, day):
+        """Miezul nopții local al zilei day din orizont"""
+        midnight = datetime.combine(current_time.date() + timedelta(days=day), datetime.min.time())
+        return localize_naive(self.sky.current_timezone, midnight)
+
+    def window_samples(self, start, end):
+        """Momentele (UTC) evaluate într-un interval al ferestrei, la pas de STEP_MINUTES, inclusiv capetele"""
+        step = timedelta(minutes=self.STEP_MINUTES)
+        return [start + step * k for k in range(int((end - start) / step) + 1)]
+
+    def _windows_by_day(self, scene, current_time):
+        """Intervalele UTC ale ferestrei orare pentru tot orizontul, grupate pe zi"""
+        windows = {}
+        for day, start, end in local_window_intervals(
+                scene.time_start, scene.time_end, scene.time_end_next_day, self.sky.current_timezone,
+                current_time.date(), self.days_to_check, not_before=current_time.astimezone(pytz.UTC)):
+            windows.setdefault(day, []).append((start, end))
+        return windows
+
+    @staticmethod
+    def azimuth_distance(azimuths, min_azimuth, max_azimuth):
+        """Distanța unghiulară (grade) de la fiecare azimut la intervalul [min, max]; 0 în interior"""
+        azimuths = np.asarray(azimuths, dtype=float)
+        if max_azimuth - min_azimuth >= 360:
+            return np.zeros(azimuths.shape)
+        inside = OpportunityScanner.azimuth_mask(azimuths, min_azimuth, max_azimuth)
+        outside = np.minimum(np.mod(min_azimuth - azimuths, 360), np.mod(azimuths - max_azimuth, 360))
+        return np.where(inside, 0.0, outside)
+
+    def _screened_positions(self, scene, t, observer, moon, lunar_model):
+        """
+        Motorul 'analytic': pozițiile din lunar_model (construit pentru același loc ca observer) pentru
+        toate momentele, apoi cele aflate la cel mult SCREEN_MARGIN_DEGREES de limitele scenei recalculate
+        exact, din efemeride. Celelalte rămân aproximative, dar sigur în afara limitelor, deci intervalele
+        ies la fel ca la motorul 'vector'.
+        """
+        with tracer.span('scan.screen', samples=len(t)):
+            elevations, azimuths = lunar_model.altaz(t)
+        margin = self.SCREEN_MARGIN_DEGREES
+        # Aceeași eroare de poziție înseamnă o eroare de azimut tot mai mare spre zenit
+        azimuth_margin = margin / np.maximum(np.cos(np.radians(elevations + margin)), 1e-3)
+        candidates = np.flatnonzero(
+            (self.azimuth_distance(azimuths, scene.azimuth_min, scene.azimuth_max) <= azimuth_margin) &
+            (elevations >= scene.elevation_min - margin) & (elevations <= scene.elevation_max + margin))
+        if len(candidates):
+            with tracer.span('scan.refine', samples=len(candidates)):
+                alt, az, _ = observer.at(t[candidates]).observe(moon).apparent().altaz()
+            elevations[candidates] = alt.degrees
+            azimuths[candidates] = az.degrees
+        return elevations, azimuths
+
+    def _sweep_vector(self, scene, current_time, progress):
+        """
+        Motoarele 'vector' și 'analytic': pentru fiecare bucată de CHUNK_DAYS zile, toate momentele din
+        fereastra orară sunt calculate deodată (poziție și iluminare), apoi trecute prin aceeași logică
+        de intervale ca motorul 'sample'. Produce (zi, intervalele zilei).
+        """
+        days_to_check = self.days_to_check
+        timezone = self.sky.current_timezone
+        windows = self._windows_by_day(scene, current_time)
+        constraint = SceneConstraint.compile(scene.constraint) if scene.constraint else None
+        location = self.sky.location
+        observer = self.sky.eph['earth'] + location
+        moon = self.sky.eph['moon']
+        lunar_model = LunarModel.for_location(location) if self.engine == 'analytic' else None
+
+        for chunk_start in range(0, days_to_check, self.CHUNK_DAYS):
+            chunk = range(chunk_start, min(days_to_check, chunk_start + self.CHUNK_DAYS))
+            # Pentru fiecare zi, momentele fiecărui interval al ferestrei
+            day_windows = [[self.window_samples(start, end) for start, end in windows.get(day, ())]
+                           for day in chunk]
+            times = [moment for day in day_windows for samples in day for moment in samples]
+
+            if times:
+                with tracer.span('scan.chunk', days=len(chunk), samples=len(times)):
+                    t = self.sky.ts.from_datetimes(times)
+                    if self.engine == 'analytic':
+                        elevations, azimuths = self._screened_positions(scene, t, observer, moon, lunar_model)
+                    else:
+                        alt, az, _ = observer.at(t).observe(moon).apparent().altaz()
+                        elevations = alt.degrees
+                        azimuths = az.degrees
+                    in_position = (self.azimuth_mask(azimuths, scene.azimuth_min, scene.azimuth_max) &
+                                   (elevations >= scene.elevation_min) & (elevations <= scene.elevation_max))
+                    in_strict = self.strict_mask(scene, azimuths, elevations)
+                    # Iluminarea doar pentru momentele în care poziția e bună
+                    illuminations = np.zeros(len(times))
+                    if in_position.any():
+                        illuminations[in_position] = almanac.fraction_illuminated(
+                            self.sky.eph, 'moon', t[in_position]) * 100
+                    # Regulile scenei, tot vectorial, doar pe momentele care au trecut de poziție
+                    if constraint is not None and in_position.any():
+                        selected = np.flatnonzero(in_position)
+                        series = SampleSeries(self.sky, t[selected], [times[k].astimezone(timezone) for k in selected],
+                                              elevations[selected], azimuths[selected], illuminations[selected])
+                        in_position[selected] = constraint(series)
+
+            sample = 0
+            for day, samples_by_window in zip(chunk, day_windows):
+                if not progress(day, days_to_check):
+                    scan_log.info("Operație anulată de utilizator")
+                    self.cancelled = True
+                    return
+                day_intervals = []
+                for samples in samples_by_window:
+                    current_interval = None
+                    for _ in samples:
+                        ok = in_position[sample]
+                        illumination = float(illuminations[sample])
+                        if ok and illumination >= scene.min_illumination:
+                            test_time = times[sample].astimezone(timezone)
+                            elevation, azimuth = float(elevations[sample]), float(azimuths[sample])
+                            strict = None if in_strict is None else bool(in_strict[sample])
+                            if current_interval:
+                                self._extend_interval(current_interval, test_time, elevation, azimuth,
+                                                      illumination, strict)
+                            else:
+                                current_interval = self._open_interval(test_time, elevation, azimuth,
+                                                                       illumination, strict)
+                            last_valid = test_time
+                        elif current_interval:
+                            day_intervals.append(self._close_interval(current_interval, last_valid))
+                            current_interval = None
+                        sample += 1
+
+                    # Intervalul deschis se închide la sfârșitul ferestrei
+                    if current_interval:
+                        day_intervals.append(self._close_interval(current_interval, last_valid))
+                yield day, day_intervals
+
+    def _sweep_sample(self, scene, current_time, progress):
+        """Motorul 'sample': fiecare moment calculat separat, iluminarea cerută serviciului farmsense"""
+        days_to_check = self.days_to_check
+        timezone = self.sky.current_timezone
+        windows = self._windows_by_day(scene, current_time)
+        # Nivelul DEBUG e verificat o singură dată; bucla interioară nu plătește nimic când e dezactivat
+        debug = scan_log.isEnabledFor(logging.DEBUG)
+        constraint = SceneConstraint.compile(scene.constraint) if scene.constraint else None
+
+        for day in range(days_to_check):
+            # Raportăm progresul; False înseamnă anulare
+            if not progress(day, days_to_check):
+                scan_log.info("Operație anulată de utilizator")
+                self.cancelled = True
+                return
+
+            if debug:
+                scan_log.debug("Verificare ziua %d: %s", day, (current_time + timedelta(days=day)).date())
+            day_intervals = []
+
+            # Pentru fiecare interval al ferestrei, verificăm fiecare moment la pas de STEP_MINUTES
+            for start, end in windows.get(day, ()):
+                current_interval = None
+                for moment in self.window_samples(start, end):
+                    test_time = moment.astimezone(timezone)
+                    if not progress(day, days_to_check, test_time.hour, test_time.minute):
+                        self.cancelled = True
+                        return
+                    
+                    # Calculăm poziția lunii
+                    try:
+                        with tracer.span('scan.position'):
+                            ts = self.sky.ts.from_datetime(test_time)
+                            earth = self.sky.eph['earth']
+                            moon = self.sky.eph['moon']
+                            
+                            astrometric = (earth + self.sky.location).at(ts).observe(moon)
+                            alt, az, _ = astrometric.apparent().altaz()
+                        
+                        elevation = alt.degrees
+                        azimuth = az.degrees
+                        
+                        if debug:
+                            scan_log.debug("  %s Poziție: El=%.1f°, Az=%.1f°",
+                                           test_time.strftime('%H:%M'), elevation, azimuth)
+                        
+                    except Exception as e:
+                        ephemeris_log.error("Eroare la calculul poziției: %s", e)
+                        continue
+                    
+                    conditions_met = (
+                        self.is_azimuth_in_range(azimuth, scene.azimuth_min, scene.azimuth_max) and
+                        scene.elevation_min <= elevation <= scene.elevation_max
+                    )
+
+                    if not conditions_met:
+                        if current_interval:
+                            if debug:
+                                scan_log.debug("  Închid interval - condiții poziție nu mai sunt îndeplinite")
+                            day_intervals.append(self._close_interval(current_interval, last_valid))
+                            current_interval = None
+                        continue
+                    
+                    # Verificăm iluminarea
+                    try:
+                        timestamp = int(test_time.timestamp())
+                        illumination, _ = fetch_moon_phase(timestamp)
+                       
+                        if debug:
+                            scan_log.debug("  Iluminare: %.1f%%", illumination)
+                       
+                        accepted = illumination >= scene.min_illumination
+                        if accepted and constraint is not None:
+                            series = SampleSeries(self.sky, self.sky.ts.from_datetimes([test_time]), [test_time],
+                                                  np.array([elevation]), np.array([azimuth]),
+                                                  np.array([illumination]))
+                            accepted = bool(constraint(series)[0])
+                        if accepted:
+                            strict = self.strict_mask(scene, azimuth, elevation)
+                            strict = None if strict is None else bool(strict)
+                            if not current_interval:
+                                if debug:
+                                    scan_log.debug("  Deschid interval nou")
+                                current_interval = self._open_interval(test_time, elevation, azimuth, illumination,
+                                                                       strict)
+                            else:
+                                self._extend_interval(current_interval, test_time, elevation, azimuth, illumination,
+                                                      strict)
+                            last_valid = test_time
+                        elif current_interval:
+                            if debug:
+                                scan_log.debug("  Închid interval - iluminare insuficientă sau regulă neîndeplinită")
+                            day_intervals.append(self._close_interval(current_interval, last_valid))
+                            current_interval = None
+                            
+                    except Exception as e:
+                        net_log.error("Eroare la verificarea iluminării: %s", e)
+                        if current_interval:
+                            day_intervals.append(self._close_interval(current_interval, last_valid))
+                            current_interval = None
+                        continue
+            
+                # Intervalul deschis se închide la sfârșitul ferestrei
+                if current_interval:
+                    day_intervals.append(self._close_interval(current_interval, last_valid))
+            yield day, day_intervals
+
+    @staticmethod
+    def azimuth_mask(azimuths, min_azimuth, max_azimuth):
+        """Varianta vectorială (NumPy) a is_azimuth_in_range"""
+        if max_azimuth - min_azimuth >= 360:
+            return np.ones(np.shape(azimuths), dtype=bool)
+        azimuths = np.mod(azimuths, 360)
+        min_azimuth = min_azimuth % 360
+        max_azimuth = max_azimuth % 360
+        if min_azimuth <= max_azimuth:
+            return (azimuths >= min_azimuth) & (azimuths <= max_azimuth)
+        return (azimuths >= min_azimuth) | (azimuths <= max_azimuth)
+
+    @staticmethod
+    def enrich(sky, opportunity):
+        """
+        Completează o oportunitate cu distanța Pământ-Lună la momentul de vârf
+        (distance_km, distance_rating, distance_status, distance_color).
+        Întoarce False dacă distanța nu a putut fi calculată.
+        """
+        moment = opportunity.get('peak_datetime') or opportunity['start_datetime']
+        distance_info = sky.calculate_moon_distance_at(sky.ts.from_datetime(moment))
+        if not distance_info:
+            return False
+        opportunity['distance_km'] = distance_info['distance']
+        opportunity['distance_rating'] = distance_info['rating']
+        opportunity['distance_status'] = distance_info['status']
+        opportunity['distance_color'] = distance_info['color']
+        return True
+
+    @staticmethod
+    def is_time_in_window(time_str, start_str, end_str, ends_next_day):
+        """Verifică dacă timpul dat este în fereastra permisă"""
+        def time_to_minutes(t):
+            h, m = map(int, t.split(':'))
+            return h * 60 + m
+            
+        current = time_to_minutes(time_str)
+        start = time_to_minutes(start_str)
+        end = time_to_minutes(end_str)
+        
+        if ends_next_day:
+            if end < start:
+                end += 24 * 60
+                if current < start:
+                    current += 24 * 60
+            return start <= current <= end
+        else:
+            return start <= current <= end
+
+    @staticmethod
+    def is_azimuth_in_range(azimuth, min_azimuth, max_azimuth):
+        """
+        Verifică dacă un azimut este în intervalul specificat, gestionând corect traversarea Nord-ului.
+        
+        Args:
+            azimuth (float): Azimutul de verificat (0-360)
+            min_azimuth (float): Limita minimă a intervalului (0-360)
+            max_azimuth (float): Limita maximă a intervalului (0-360)
+            
+        Returns:
+            bool: True dacă azimutul este în interval, False altfel
+        """
+        # Un interval care acoperă tot cercul (ex: implicitul 0° - 360°) nu dispare la normalizare
+        if max_azimuth - min_azimuth >= 360:
+            return True
+        
+        # Normalizăm toate valorile la 0-360
+        azimuth = azimuth % 360
+        min_azimuth = min_azimuth % 360
+        max_azimuth = max_azimuth % 360
+        
+        # Cazul normal: min < max (ex: 45° - 90°)
+        if min_azimuth <= max_azimuth:
+            return min_azimuth <= azimuth <= max_azimuth
+        
+        # Cazul special: min > max (ex: 330° - 30°) - traversează Nord
+        # În acest caz, verificăm dacă azimutul este fie >= min SAU <= max
+        return azimuth >= min_azimuth or azimuth <= max_azimuth
+
+class OpportunityCursor:
+    """
+    Cursor leneș peste oportunitățile unei scene. Cele deja găsite (scene.opportunities) sunt
+    cache-ul; când se cere una după ultima cunoscută, cursorul pregătește un OpportunityScanWorker
+    care continuă de la scene.scan_position, cât e nevoie pentru oportunitățile lipsă, nu de la zero.
+    """
+    # Cât de departe caută cursorul după ultima oportunitate cunoscută
+    MAX_DAYS = 1830
+
+    def __init__(self, sky, scene):
+        self.sky = sky
+        self.scene = scene
+        self.exhausted = False
+
+    def needs(self, index):
+        """True dacă oportunitatea index trebuie căutată (și mai are unde fi căutată)"""
+        return not self.exhausted and index >= len(self.scene.opportunities)
+
+    def worker(self, index, parent=None):
+        """Worker-ul care caută oportunitățile lipsă până la index inclusiv"""
+        skip_until = None
+        if self.scene.scan_position is None and self.scene.opportunities:
+            # Scenă scanată înainte de salvarea poziției: reluăm de acum și sărim peste cele cunoscute.
+            # Grupurile sunt despărțite de cel puțin o zi fără intervale, deci o zi de toleranță
+            # acoperă diferența de secunde dintre momentele celor două scanări.
+            skip_until = self.scene.opportunities[-1]['start_datetime'] + timedelta(days=1)
+        return OpportunityScanWorker(self.sky, self.scene, index + 1 - len(self.scene.opportunities), self.MAX_DAYS,
+                                     start_time=self.scene.scan_position, skip_until=skip_until, parent=parent)
+
+    def finished(self, worker, cancelled):
+        """Un worker al cursorului s-a încheiat; fără rezultate pe tot orizontul, cursorul se oprește"""
+        if not cancelled and worker.found < worker.num_opportunities:
+            scan_log.info("Scena '%s': nicio oportunitate în următoarele %d zile", self.scene.name, self.MAX_DAYS)
+            self.exhausted = True
+
+class OpportunityScanWorker(QObject):
+    """
+    Rulează OpportunityScanner pe un fir separat și trimite oportunitățile pe măsură ce sunt găsite.
+    Semnalele poartă worker-ul, ca primitorul să poată ignora rezultatele unei scanări înlocuite.
+    Parametrii scenei și locația sunt copiate la pornire; scena poate fi editată între timp.
+    Firul are propriul handle al efemeridelor (SpiceKernel nu e sigur de citit din mai multe fire
+    deodată, iar fereastra principală îl folosește la fiecare tick); se închide la final.
+    """
+    opportunity_found = pyqtSignal(object, object)
+    progress_changed = pyqtSignal(object, int, int, float)
+    finished = pyqtSignal(object, bool)
+
+    def __init__(self, sky, scene, num_opportunities=3, days_to_check=90, start_time=None, skip_until=None,
+                 parent=None):
+        super().__init__(parent)
+        self.scene = scene
+        self.num_opportunities = num_opportunities
+        self.start_time = start_time
+        self.skip_until = skip_until
+        self.found = 0
+        self._kernel = load_file(sky.eph.path)
+        self.scanner = OpportunityScanner(MoonSky(sky.ts, self._kernel, sky.location, sky.current_timezone),
+                                          days_to_check, engine=scene.scan_engine)
+        self._snapshot = copy.copy(scene)
+        self._cancel = threading.Event()
+        self._last_progress = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"scan-{scene.id[:8]}")
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        """Oprire imediată: scanarea verifică semnalul la fiecare moment evaluat"""
+        self._cancel.set()
+
+    def is_running(self):
+        return self._thread.is_alive()
+
+    # Progresul e trimis cel mult o dată la PROGRESS_INTERVAL secunde, nu la fiecare zi
+    PROGRESS_INTERVAL = 0.1
+
+    def _progress(self, day, days, hour=None, minute=None):
+        now = unix_time.perf_counter()
+        if hour is None and now - self._last_progress >= self.PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.progress_changed.emit(self, day, days, self.scanner.days_per_second())
+        return not self._cancel.is_set()
+
+    def _run(self):
+        cancelled = False
+        try:
+            with tracer.span('scan.worker', scene=self._snapshot.name):
+                found = self.scanner.iter_opportunities(self._snapshot, self._progress, start_time=self.start_time)
+                if self.skip_until is not None:
+                    found = (opportunity for opportunity in found
+                             if opportunity['start_datetime'] > self.skip_until)
+                for opportunity in itertools.islice(found, self.num_opportunities):
+                    self.found += 1
+                    self.opportunity_found.emit(self, opportunity)
+            cancelled = self.scanner.cancelled
+        except Exception as e:
+            scan_log.exception("EROARE CRITICĂ la calculul oportunităților: %s", e)
+        finally:
+            self._kernel.close()
+        self.finished.emit(self, cancelled or self._cancel.is_set())
+
+class SceneListModel(QAbstractListModel):
+    """
+    Modelul listei de scene din Scene Editor. Textele afișate pe un rând (locație, limite,
+    oportunități cu distanța) se calculează o singură dată, la prima cerere a rândului,
+    și rămân în cache până când scena e marcată ca modificată.
+    """
+    SceneRole = Qt.UserRole + 1
+    RowRole = Qt.UserRole + 2
+
+    def __init__(self, parent=None, observers=None):
+        super().__init__(parent)
+        self.scenes = []
+        self._rows = {}
+        self._scanning = {}
+        # Orele oportunităților se afișează în fusul orar al locației scenei
+        self.observers = observers
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.scenes)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self.scenes):
+            return None
+        scene = self.scenes[index.row()]
+        if role == Qt.DisplayRole:
+            return scene.name
+        if role == self.SceneRole:
+            return scene
+        if role == self.RowRole:
+            return self.row_data(scene)
+        return None
+
+    def row_of(self, scene):
+        for row, candidate in enumerate(self.scenes):
+            if candidate is scene:
+                return row
+        return -1
+
+    def set_scenes(self, scenes):
+        """Înlocuiește lista (lista e partajată, nu copiată)"""
+        self.beginResetModel()
+        self.scenes = scenes
+        self._rows.clear()
+        self.endResetModel()
+
+    def append_scene(self, scene):
+        row = len(self.scenes)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.scenes.append(scene)
+        self.endInsertRows()
+
+    def remove_scene(self, scene):
+        row = self.row_of(scene)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.scenes[row]
+        self._rows.pop(scene.id, None)
+        self.endRemoveRows()
+
+    def scene_changed(self, scene):
+        """Invalidează cache-ul scenei și redesenează doar rândul ei"""
+        self._rows.pop(scene.id, None)
+        row = self.row_of(scene)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def set_scan_progress(self, scene, day, days=None, rate=0.0):
+        """Progresul scanării din fundal (day None = scanarea s-a încheiat); rate în zile/s"""
+        if day is None:
+            self._scanning.pop(scene.id, None)
+        else:
+            self._scanning[scene.id] = (day, days, rate)
+        self.scene_changed(scene)
+
+    def refresh_all(self):
+        """Redesenează rândurile vizibile din cache (distanța e geocentrică, nu depinde de locație)"""
+        if self.scenes:
+            self.dataChanged.emit(self.index(0), self.index(len(self.scenes) - 1))
+
+    def row_data(self, scene):
+        row = self._rows.get(scene.id)
+        if row is None:
+            row = self._rows[scene.id] = self.build_row(scene)
+        return row
+
+    @tracer.traced('scene_list.row')
+    def build_row(self, scene):
+        if scene.location_type == 'romania':
+            location_text = f"Locație: {scene.location_data['localitate']}, {scene.location_data['judet']}"
+        elif scene.location_type == 'profile':
+            location_text = f"Locație: {scene.location_data['name']}"
+        else:
+            location_text = f"Locație: {scene.location_data['lat']:.4f}°N, {scene.location_data['lon']:.4f}°E"
+
+        strict_text = (f" (strict Az {scene.strict_azimuth_min}°-{scene.strict_azimuth_max}°, "
+                       f"El {scene.strict_elevation_min}°-{scene.strict_elevation_max}°)"
+                       if scene.has_strict_boundaries() else "")
+        limits_text = (f"Limite: Az {scene.azimuth_min}°-{scene.azimuth_max}°, "
+                       f"El {scene.elevation_min}°-{scene.elevation_max}°{strict_text} | "
+                       f"Timp: {scene.time_start}-{scene.time_end} "
+                       f"{'(next day)' if scene.time_end_next_day else ''} | "
+                       f"Iluminare min: {scene.min_illumination}%"
+                       f"{f' | Reguli: {scene.constraint}' if scene.constraint else ''}")
+
+        sky = self.observers.sky_for(scene) if self.observers else None
+        local = (lambda moment: moment.astimezone(sky.current_timezone)) if sky else (lambda moment: moment)
+
+        opportunities = []
+        total = len(scene.opportunities)
+        first = min(scene.current_opportunity_index, max(total - 3, 0))
+        for i, opp in enumerate(scene.opportunities[first:first + 3], first):
+            minutes = int((opp['end_datetime'] - opp['start_datetime']).total_seconds() / 60)
+
+            # Distanța vine din înregistrare (calculată la scanare)
+            if 'distance_status' in opp:
+                distance_str = f"{opp['distance_km']:,.0f}".replace(",", ".")
+                status_parts = opp['distance_status'].split()
+                distance_line = f"{status_parts[0]} {status_parts[-1]} • {distance_str} km"
+            else:
+                distance_line = "Distanță indisponibilă"
+            if 'best_datetime' in opp:
+                peak_str = f" (optim {local(opp['best_datetime']).strftime('%H:%M')})"
+            elif 'peak_datetime' in opp:
+                peak_str = f" (vârf {local(opp['peak_datetime']).strftime('%H:%M')})"
+            else:
+                peak_str = ""
+            if 'strict_intervals' in opp:
+                strict_line = "Strict: " + (", ".join(
+                    f"{local(sub['start_datetime']).strftime('%H:%M')}-{local(sub['end_datetime']).strftime('%H:%M')}"
+                    for sub in opp['strict_intervals']) or "—") + "\n"
+            else:
+                strict_line = ""
+            start, end = local(opp['start_datetime']), local(opp['end_datetime'])
+
+            opportunities.append(
+                f"Oportunitatea {i+1}{f' din {total}' if total > 3 else ''}:\n"
+                f"Data: {start.strftime('%d/%m/%Y')}\n"
+                f"Interval: {start.strftime('%H:%M')} - "
+                f"{end.strftime('%H:%M')}{peak_str}\n"
+                f"{strict_line}"
+                f"Durată: {minutes} minute\n"
+                f"Elevație: {opp['elevation_min']:.1f}° - {opp['elevation_max']:.1f}°\n"
+                f"Azimut: {opp['azimuth_min']:.1f}° - {opp['azimuth_max']:.1f}°\n"
+                f"Iluminare: {opp['max_illumination']:.1f}%\n"
+                f"{distance_line}"
+            )
+
+        scanning = self._scanning.get(scene.id)
+        if scanning:
+            day, days, rate = scanning
+            rate_line = f"\n{rate:,.0f} zile/s".replace(",", ".") if rate else ""
+            opportunities.append(f"Se caută oportunități...\nZiua {day + 1} din {days}{rate_line}")
+        return {'location': location_text, 'limits': limits_text, 'opportunities': opportunities,
+                'scanning': scanning is not None}
+
+class SceneDelegate(QStyledItemDelegate):
+    """
+    Desenează un rând al listei de scene (titlu, butoane, locație, limite, oportunități)
+    direct cu QPainter; view-ul cere doar rândurile vizibile, fără widget-uri per scenă.
+    """
+    ROW_HEIGHT = 270
+    BUTTONS = (('edit', "Edit"), ('duplicate', "Duplicate"), ('delete', "Delete"), ('refresh', "↻ Refresh"))
+    SCANNING_BUTTONS = BUTTONS[:3] + (('cancel', "✕ Stop"),)
+    # Navigarea printre oportunități, aliniată la dreapta
+    NAV_BUTTONS = (('previous', "‹"), ('next', "›"))
+
+    action_triggered = pyqtSignal(str, object)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def row_font(self, option):
+        # Aceeași dimensiune ca etichetele din stylesheet-ul ferestrei principale
+        font = QFont(option.font)
+        font.setPixelSize(13)
+        return font
+
+    def frame_rect(self, rect):
+        return rect.adjusted(4, 10, -4, -6)
+
+    def button_rects(self, rect, metrics, scanning=False):
+        frame = self.frame_rect(rect)
+        x = frame.left() + 10
+        rects = []
+        for action, text in (self.SCANNING_BUTTONS if scanning else self.BUTTONS):
+            width = max(80, metrics.horizontalAdvance(text) + 30)
+            rects.append((action, text, QRect(x, frame.top() + 14, width, 32)))
+            x += width + 5
+        x = frame.right() - 10
+        for action, text in reversed(self.NAV_BUTTONS):
+            x -= 40
+            rects.append((action, text, QRect(x, frame.top() + 14, 40, 32)))
+            x -= 5
+        return rects
+
+    def paint(self, painter, option, index):
+        scene = index.data(SceneListModel.SceneRole)
+        row = index.data(SceneListModel.RowRole)
+        if scene is None or row is None:
+            return
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        font = self.row_font(option)
+        metrics = QFontMetrics(font)
+        frame = self.frame_rect(option.rect)
+        line_height = metrics.height() + 4
+
+        # Chenarul grupului, cu titlul peste marginea de sus (ca un QGroupBox)
+        painter.setPen(QPen(QColor('#404040'), 2))
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRoundedRect(frame, 6, 6)
+        title_font = QFont(font)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        title_width = QFontMetrics(title_font).horizontalAdvance(scene.name) + 10
+        title_rect = QRect(frame.left() + 8, frame.top() - line_height // 2, title_width, line_height)
+        painter.fillRect(title_rect, QColor('#2b2b2b'))
+        painter.setPen(Qt.white)
+        painter.drawText(title_rect, Qt.AlignCenter, scene.name)
+        painter.setFont(font)
+
+        for _, text, rect in self.button_rects(option.rect, metrics, row['scanning']):
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor('#0d47a1'))
+            painter.drawRoundedRect(rect, 4, 4)
+            painter.setPen(Qt.white)
+            painter.drawText(rect, Qt.AlignCenter, text)
+
+        y = frame.top() + 52
+        text_width = frame.width() - 20
+        painter.drawText(QRect(frame.left() + 10, y, text_width, line_height),
+                         Qt.AlignLeft | Qt.AlignVCenter, row['location'])
+        y += line_height
+        painter.drawText(QRect(frame.left() + 10, y, text_width, line_height),
+                         Qt.AlignLeft | Qt.AlignVCenter, row['limits'])
+        y += line_height + 4
+
+        boxes = row['opportunities'] or ["Apăsați ↻ Refresh pentru a calcula oportunitățile"]
+        spacing = 10
+        box_width = (text_width - spacing * (len(boxes) - 1)) // len(boxes)
+        box_height = frame.bottom() - 6 - y
+        alignment = (Qt.AlignTop | Qt.AlignHCenter) if row['opportunities'] else Qt.AlignCenter
+        for k, text in enumerate(boxes):
+            box = QRect(frame.left() + 10 + k * (box_width + spacing), y, box_width, box_height)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor('#404040'))
+            painter.drawRoundedRect(box, 4, 4)
+            painter.setPen(Qt.white)
+            painter.drawText(box.adjusted(2, 2, -2, -2), alignment | Qt.TextWordWrap, text)
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            row = index.data(SceneListModel.RowRole) or {}
+            for action, _, rect in self.button_rects(option.rect, QFontMetrics(self.row_font(option)),
+                                                     row.get('scanning', False)):
+                if rect.contains(event.pos()):
+                    self.action_triggered.emit(action, index.data(SceneListModel.SceneRole))
+                    return True
+        return False
+
+class OpportunityPlanDialog(QDialog):
+    """Planul oportunităților dintr-o perioadă, cu suprapunerile rezolvate după timpul de drum"""
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.setWindowTitle("Plan oportunități")
+        self.setMinimumWidth(600)
+        self.setMinimumHeight(500)
+        
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #2b2b2b;
+            }
+            QLabel {
+                color: white;
+            }
+            QDateTimeEdit, QSpinBox {
+                background-color: #404040;
+                color: white;
+                border: 1px solid #505050;
+                border-radius: 4px;
+                padding: 5px;
+            }
+        """)
+        
+        layout = QVBoxLayout()
+        form = QFormLayout()
+        # Perioada se alege în ora locației curente, nu a calculatorului
+        now = QDateTime(datetime.now(editor.parent.current_timezone).replace(tzinfo=None, second=0, microsecond=0))
+        self.start_edit = QDateTimeEdit(now)
+        self.end_edit = QDateTimeEdit(now.addDays(7))
+        for edit in (self.start_edit, self.end_edit):
+            edit.setCalendarPopup(True)
+            edit.setDisplayFormat("dd/MM/yyyy HH:mm")
+        self.speed_spin = QSpinBox()
+        self.speed_spin.setRange(10, 130)
+        self.speed_spin.setValue(OpportunityPlanner.SPEED_KMH)
+        self.speed_spin.setSuffix(" km/h")
+        form.addRow("De la:", self.start_edit)
+        form.addRow("Până la:", self.end_edit)
+        form.addRow("Viteză medie:", self.speed_spin)
+        layout.addLayout(form)
+        
+        plan_btn = QPushButton("Planifică")
+        plan_btn.clicked.connect(self.update_plan)
+        layout.addWidget(plan_btn)
+        
+        self.result_label = QLabel()
+        self.result_label.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+        self.result_label.setWordWrap(True)
+        self.result_label.setStyleSheet("font-family: monospace;")
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(self.result_label)
+        layout.addWidget(scroll)
+        
+        self.setLayout(layout)
+        self.update_plan()
+        
+    def update_plan(self):
+        window = self.editor.parent
+        timezone = window.current_timezone
+        start = localize_naive(timezone, self.start_edit.dateTime().toPyDateTime())
+        end = localize_naive(timezone, self.end_edit.dateTime().toPyDateTime())
+        planner = OpportunityPlanner(window.interval_index, self.editor.scene_coordinates,
+                                     speed_kmh=self.speed_spin.value())
+        plan = planner.plan(start, end)
+        
+        def describe(item):
+            begin = item['opportunity']['start_datetime'].astimezone(timezone)
+            finish = item['opportunity']['end_datetime'].astimezone(timezone)
+            return f"{begin.strftime('%d/%m %H:%M')}-{finish.strftime('%H:%M')}  {item['scene_name']}"
+        
+        scenes = window.interval_index.scenes_between(start, end)
+        lines = [f"Scene cu ferestre în perioadă: {len(scenes)}", ""]
+        if not plan['selected']:
+            lines.append("Nu există oportunități în perioada aleasă")
+        for item in plan['selected']:
+            travel = f"  (drum {item['travel_minutes']:.0f} min)" if item['travel_minutes'] >= 1 else ""
+            lines.append(f"✓ {describe(item)}{travel}")
+        if plan['skipped']:
+            lines += ["", "Sărite (suprapunere sau drum prea lung):"]
+        for item in plan['skipped']:
+            conflict = item['conflict']
+            reason = ""
+            if conflict:
+                travel = planner.travel_minutes(conflict['scene'], item['scene'])
+                reason = f"  — conflict cu {conflict['scene_name']}" + (f", drum {travel:.0f} min" if travel >= 1 else "")
+            lines.append(f"✗ {describe(item)}{reason}")
+        self.result_label.setText("\n".join(lines))
+
+class SceneEditorWindow(QMainWindow):
+    """Fereastra pentru editarea scenelor fotografice"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.setWindowTitle("Scene Editor")
+        self.setMinimumSize(800, 600)
+        self.scenes = []
+        self.store = parent.store
+        self.scan_workers = {}
+        self.cursors = {}
+        # Indexul la care navigarea ajunge când se termină căutarea pornită de cursor
+        self.pending_navigation = {}
+        self.opportunity_labels = {}
+        
+        # Setăm stylesheet-ul pentru această fereastră
+        self.setStyleSheet("""
+            QMainWindow, QWidget {
+                background-color: #2b2b2b;
+            }
+            QGroupBox {
+                border: 2px solid #404040;
+                border-radius: 6px;
+                margin-top: 12px;
+                padding-top: 10px;
+                color: white;
+                font-size: 13px;
+                font-weight: bold;
+            }
+            QLabel {
+                color: white;
+            }
+            QPushButton {
+                background-color: #0d47a1;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 8px 15px;
+            }
+            QListView {
+                border: none;
+            }
+        """)
+        
+        # Widget central și layout principal
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        layout = QVBoxLayout()
+        central_widget.setLayout(layout)
+        
+        # Header cu buton New Scene
+        header = QHBoxLayout()
+        self.new_scene_btn = QPushButton("New Scene")
+        self.new_scene_btn.clicked.connect(self.create_new_scene)
+        header.addWidget(self.new_scene_btn)
+        self.plan_btn = QPushButton("Plan")
+        self.plan_btn.setToolTip("Planul oportunităților suprapuse, ținând cont de drumul dintre locații")
+        self.plan_btn.clicked.connect(self.show_plan)
+        header.addWidget(self.plan_btn)
+        header.addStretch()
+        self.import_btn = QPushButton("Import JSON")
+        self.import_btn.clicked.connect(self.import_scenes_json)
+        header.addWidget(self.import_btn)
+        self.export_btn = QPushButton("Export JSON")
+        self.export_btn.clicked.connect(self.export_scenes_json)
+        header.addWidget(self.export_btn)
+        layout.addLayout(header)
+        
+        # Lista de scene: model + delegate, se desenează doar rândurile vizibile
+        self.scene_model = SceneListModel(self, self.parent.observers)
+        self.scene_list = QListView()
+        self.scene_list.setModel(self.scene_model)
+        self.scene_delegate = SceneDelegate(self.scene_list)
+        self.scene_list.setItemDelegate(self.scene_delegate)
+        self.scene_list.setUniformItemSizes(True)
+        self.scene_list.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.scene_list.setSelectionMode(QListView.NoSelection)
+        self.scene_list.setFocusPolicy(Qt.NoFocus)
+        self.scene_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        # Conexiune în coadă: acțiunea (dialog, ștergere) rulează după ce view-ul termină evenimentul
+        self.scene_delegate.action_triggered.connect(self.on_scene_action, Qt.QueuedConnection)
+        layout.addWidget(self.scene_list)
+        
+        # Încarcă scenele salvate
+        try:
+            self.load_scenes()
+        except Exception as e:
+            persist_log.error("Eroare la încărcarea scenelor în constructor: %s", e)
+            self.scenes = []
+
+    def on_scene_action(self, action, scene):
+        """Butoanele desenate de SceneDelegate"""
+        if action == 'cancel':
+            self.cancel_scan(scene)
+        elif action == 'edit':
+            self.create_new_scene(scene)
+        elif action == 'duplicate':
+            self.duplicate_scene(scene)
+        elif action == 'delete':
+            self.delete_scene(scene)
+        elif action == 'refresh':
+            self.refresh_scene(scene)
+        elif action == 'previous':
+            self.navigate_opportunities(scene, -1)
+        elif action == 'next':
+            self.navigate_opportunities(scene, 1)
+
+    def show_plan(self):
+        OpportunityPlanDialog(self).exec_()
+
+    def scene_coordinates(self, scene):
+        """(lat, lon) pentru locația scenei, sau None dacă nu se cunoaște"""
+        return self.parent.observers.coordinates(scene)
+
+    def scene_sky(self, scene):
+        """Observatorul și fusul orar ale scenei; fereastra principală doar dacă scena nu are coordonate"""
+        sky = self.parent.observers.sky_for(scene)
+        if sky is None:
+            scan_log.warning("Scena '%s' nu are coordonate; se folosește locația ferestrei principale", scene.name)
+            return self.parent
+        return sky
+
+    def get_current_location_data(self):
+        """Obține datele locației curente"""
+        try:
+            ui_log.debug("Locație curentă pentru scenă, view activ: %s",
+                         self.parent.settings['active_view'])
+            if self.parent.settings['active_view'] == 'romania':
+                data = {
+                    'judet': self.parent.judet_combo.currentText(),
+                    'localitate': self.parent.localitate_combo.currentText(),
+                    'lat': self.parent.location.latitude.degrees,
+                    'lon': self.parent.location.longitude.degrees
+                }
+                ui_log.debug("Date România: %s", data)
+                return data
+            elif self.parent.settings['active_view'] == 'profile':
+                profile = self.parent.profile_manager.get_profile(
+                    self.parent.profile_combo.currentText())
+                data = {
+                    'name': profile.name,
+                    'lat': profile.latitude,
+                    'lon': profile.longitude,
+                    'timezone': profile.timezone
+                }
+                ui_log.debug("Date profil: %s", data)
+                return data
+            else:  # gps
+                coords = self.parent.gps_input.text().strip().split()
+                data = {
+                    'lat': float(coords[0]),
+                    'lon': float(coords[1])
+                }
+                ui_log.debug("Date GPS: %s", data)
+                return data
+        except Exception as e:
+            ui_log.exception("EROARE la obținerea datelor locației: %s", e)
+            raise
+
+    def create_new_scene(self, scene_to_edit=None):
+        """Creează sau editează o scenă"""
+        ui_log.debug("Dialog scenă, editare: %s", scene_to_edit.name if scene_to_edit else None)
+        
+        try:
+            dialog = QDialog(self)
+            dialog.setWindowTitle("New Scene" if not scene_to_edit else "Edit Scene")
+            dialog.setStyleSheet("""
+                QDialog {
+                    background-color: #2b2b2b;
+                }
+                QLabel {
+                    color: white;
+                }
+                QGroupBox {
+                    color: white;
+                }
+                QSpinBox {
+                    background-color: #404040;
                     color: white;
                     border: 1px solid #505050;
                     padding: 5px;
@@ -966,6 +3366,26 @@ class SceneEditorWindow(QMainWindow):
             wide_group.setLayout(wide_layout)
             layout.addWidget(wide_group)
             
+            # Limite stricte: fereastra ideală din interiorul celei largi, calculată în aceeași scanare
+            strict_group = QGroupBox("Strict Boundaries")
+            strict_group.setCheckable(True)
+            strict_group.setChecked(bool(scene_to_edit and scene_to_edit.has_strict_boundaries()))
+            strict_layout = QFormLayout()
+            strict_spins = {}
+            for field, label, maximum, wide_spin in (
+                    ('strict_azimuth_min', "Azimuth Min (°):", 360, wide_az_min),
+                    ('strict_azimuth_max', "Azimuth Max (°):", 360, wide_az_max),
+                    ('strict_elevation_min', "Elevation Min (°):", 90, wide_el_min),
+                    ('strict_elevation_max', "Elevation Max (°):", 90, wide_el_max)):
+                spin = QSpinBox()
+                spin.setRange(0, maximum)
+                value = getattr(scene_to_edit, field) if scene_to_edit else None
+                spin.setValue(wide_spin.value() if value is None else value)
+                strict_layout.addRow(label, spin)
+                strict_spins[field] = spin
+            strict_group.setLayout(strict_layout)
+            layout.addWidget(strict_group)
+            
             # Interval orar
             time_group = QGroupBox("Time Window")
             time_layout = QFormLayout()
@@ -1003,16 +3423,77 @@ class SceneEditorWindow(QMainWindow):
             illum_spin.setRange(0, 100)
             illum_spin.setSuffix("%")
             illum_spin.setValue(scene_to_edit.min_illumination if scene_to_edit else 0)
+            # Scanarea compară pragul cu iluminarea din efemeridele JPL, nu cu valoarea farmsense
+            # afișată în fereastra principală; cele două pot diferi puțin
+            illum_spin.setToolTip("Compared with the illumination computed from the JPL ephemeris (de421); "
+                                  "the main window shows the farmsense value, which can differ slightly.")
+            illum_source = QLabel("(JPL ephemeris)")
+            illum_source.setStyleSheet("color: #909090;")
             illum_layout.addWidget(QLabel("Minimum Illumination:"))
             illum_layout.addWidget(illum_spin)
+            illum_layout.addWidget(illum_source)
             illum_layout.addStretch()
             illum_group.setLayout(illum_layout)
             layout.addWidget(illum_group)
             
+            # Reguli suplimentare (SceneConstraint), aplicate împreună cu limitele de mai sus
+            rules_group = QGroupBox("Rules")
+            rules_layout = QVBoxLayout()
+            rules_input = QLineEdit()
+            rules_input.setPlaceholderText("ex: waxing and sun_alt < -6 and weekday in (sat, sun)")
+            rules_input.setText(scene_to_edit.constraint if scene_to_edit else "")
+            rules_error = QLabel()
+            rules_error.setStyleSheet("color: #F44336;")
+            rules_error.setWordWrap(True)
+            rules_error.hide()
+            rules_layout.addWidget(rules_input)
+            rules_layout.addWidget(rules_error)
+            rules_group.setLayout(rules_layout)
+            layout.addWidget(rules_group)
+            
+            # Orizontul căutării și numărul de rezultate
+            search_group = QGroupBox("Search")
+            search_layout = QFormLayout()
+            search_days_spin = QSpinBox()
+            search_days_spin.setRange(1, 3650)
+            search_days_spin.setSuffix(" days")
+            search_days_spin.setValue(scene_to_edit.search_days if scene_to_edit else 90)
+            search_count_spin = QSpinBox()
+            search_count_spin.setRange(1, 500)
+            search_count_spin.setValue(scene_to_edit.num_opportunities if scene_to_edit else 3)
+            peak_score_combo = QComboBox()
+            for name, label in PeakFinder.SCORES.items():
+                peak_score_combo.addItem(label, name)
+            peak_score_combo.setCurrentIndex(
+                max(peak_score_combo.findData(scene_to_edit.peak_score if scene_to_edit else 'illumination'), 0))
+            search_layout.addRow("Horizon:", search_days_spin)
+            search_layout.addRow("Opportunities:", search_count_spin)
+            scan_engine_combo = QComboBox()
+            for name, label in OpportunityScanner.SCENE_ENGINES.items():
+                scan_engine_combo.addItem(label, name)
+            scan_engine_combo.setCurrentIndex(
+                max(scan_engine_combo.findData(scene_to_edit.scan_engine if scene_to_edit else 'vector'), 0))
+            search_layout.addRow("Best moment:", peak_score_combo)
+            search_layout.addRow("Precision:", scan_engine_combo)
+            search_group.setLayout(search_layout)
+            layout.addWidget(search_group)
+            
             # Butoane
             button_layout = QHBoxLayout()
             ok_button = QPushButton("OK")
-            ok_button.clicked.connect(dialog.accept)
+            
+            def accept_if_valid():
+                # Regulile sunt compilate înainte de salvare; o eroare rămâne în dialog
+                try:
+                    if rules_input.text().strip():
+                        SceneConstraint.compile(rules_input.text().strip())
+                except ConstraintError as e:
+                    rules_error.setText(str(e))
+                    rules_error.show()
+                    return
+                dialog.accept()
+            
+            ok_button.clicked.connect(accept_if_valid)
             ok_button.setStyleSheet("""
                 QPushButton {
                     background-color: #0d47a1;
@@ -1051,71 +3532,58 @@ class SceneEditorWindow(QMainWindow):
             dialog.setLayout(layout)
             
             if dialog.exec_() == QDialog.Accepted:
-                print("Dialog accepted - începe procesarea")
                 try:
                     if not scene_to_edit:
-                        print("Creăm scenă nouă")
                         current_location = self.get_current_location_data()
-                        print(f"Date locație: {current_location}")
                         scene = Scene(
                             name_input.text(),
                             self.parent.settings['active_view'],
                             current_location
                         )
                     else:
-                        print("Actualizăm scenă existentă")
                         scene = scene_to_edit
                         scene.name = name_input.text()
                     
                     # Setăm limitele
-                    print("Setăm limitele")
                     scene.azimuth_min = wide_az_min.value()
                     scene.azimuth_max = wide_az_max.value()
                     scene.elevation_min = wide_el_min.value()
                     scene.elevation_max = wide_el_max.value()
+                    for field, spin in strict_spins.items():
+                        setattr(scene, field, spin.value() if strict_group.isChecked() else None)
                     
                     # Setăm intervalul orar
-                    print("Setăm intervalul orar")
                     scene.time_start = time_start.time().toString("HH:mm")
                     scene.time_end = time_end.time().toString("HH:mm")
                     scene.time_end_next_day = time_end_next_day.isChecked()
                     
                     # Setăm iluminarea
                     scene.min_illumination = illum_spin.value()
+                    scene.constraint = rules_input.text().strip()
+                    
+                    # Setăm căutarea
+                    scene.search_days = search_days_spin.value()
+                    scene.num_opportunities = search_count_spin.value()
+                    scene.peak_score = peak_score_combo.currentData()
+                    scene.scan_engine = scan_engine_combo.currentData()
                     
                     if not scene_to_edit:
-                        print("Adăugăm scena în listă")
-                        self.scenes.append(scene)
+                        self.scene_model.append_scene(scene)
                         
-                    print("Calculăm oportunități")
                     self.compute_opportunities(scene)
                     
-                    # Reîmprospătăm interfața indiferent dacă e scenă nouă sau editată
-                    print("Actualizăm interfața")
-                    # Golim layout-ul
-                    for i in reversed(range(self.scenes_layout.count())):
-                        widget = self.scenes_layout.itemAt(i).widget()
-                        if widget:
-                            widget.setParent(None)
-                    
-                    # Reconstruim widget-urile pentru toate scenele
-                    for s in self.scenes:
-                        new_widget = self.create_scene_widget(s)
-                        self.scenes_layout.addWidget(new_widget)
+                    # Actualizăm doar rândul scenei, nou sau editat
+                    self.scene_model.scene_changed(scene)
                         
-                    print("Salvăm scenele")
-                    self.save_scenes()
-                    print("Procesare completă")
+                    self.save_scene(scene)
+                    self.parent.update_next_opportunity()
+                    ui_log.info("Scena '%s' a fost salvată", scene.name)
                     
                 except Exception as e:
-                    print(f"EROARE la procesarea scenei: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+                    ui_log.exception("EROARE la procesarea scenei: %s", e)
                     
         except Exception as e:
-            print(f"EROARE la crearea dialogului: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            ui_log.exception("EROARE la crearea dialogului: %s", e)
 
     def duplicate_scene(self, scene):
         """Duplică o scenă existentă"""
@@ -1126,16 +3594,18 @@ class SceneEditorWindow(QMainWindow):
         )
         
         # Copiază toate atributele
-        for attr in ['wide_azimuth_min', 'wide_azimuth_max', 'wide_elevation_min', 
-                    'wide_elevation_max', 'strict_azimuth_min', 'strict_azimuth_max',
+        for attr in ['azimuth_min', 'azimuth_max', 'elevation_min',
+                    'elevation_max', 'strict_azimuth_min', 'strict_azimuth_max',
                     'strict_elevation_min', 'strict_elevation_max', 'time_start',
-                    'time_end', 'time_end_next_day', 'min_illumination']:
+                    'time_end', 'time_end_next_day', 'min_illumination', 'constraint', 'peak_score',
+                    'scan_engine', 'search_days', 'num_opportunities']:
             setattr(new_scene, attr, getattr(scene, attr))
             
-        self.scenes.append(new_scene)
+        self.scene_model.append_scene(new_scene)
         self.compute_opportunities(new_scene)
-        self.scenes_layout.addWidget(self.create_scene_widget(new_scene))
-        self.save_scenes()
+        self.scene_model.scene_changed(new_scene)
+        self.save_scene(new_scene)
+        self.parent.update_next_opportunity()
 
     def delete_scene(self, scene):
         """Șterge o scenă"""
@@ -1144,191 +3614,67 @@ class SceneEditorWindow(QMainWindow):
                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
                                    
         if reply == QMessageBox.Yes:
-            self.scenes.remove(scene)
-            # Reîmprospătăm interfața
-            for i in reversed(range(self.scenes_layout.count())): 
-                self.scenes_layout.itemAt(i).widget().setParent(None)
-            for scene in self.scenes:
-                self.scenes_layout.addWidget(self.create_scene_widget(scene))
-            self.save_scenes()
+            self.discard_scan(scene)
+            self.cursors.pop(scene.id, None)
+            self.scene_model.remove_scene(scene)
+            for index in self.parent.opportunity_indexes:
+                index.remove_scene(scene)
+            self.store.delete_scene(scene)
             self.parent.update_next_opportunity()  # Când se șterge o scenă
 
-    def create_scene_widget(self, scene):
-        """Creează widget-ul pentru o scenă fără butoane de navigare"""
-        widget = QGroupBox(scene.name)
-        layout = QVBoxLayout()
-        layout.setSpacing(2)
-        layout.setContentsMargins(5, 5, 5, 5)
-        
-        # Rândul 1: Butoane
-        buttons_row = QHBoxLayout()
-        buttons_row.setSpacing(5)
-        
-        edit_btn = QPushButton("Edit")
-        edit_btn.clicked.connect(lambda: self.create_new_scene(scene))
-        
-        duplicate_btn = QPushButton("Duplicate")
-        duplicate_btn.clicked.connect(lambda: self.duplicate_scene(scene))
-        
-        delete_btn = QPushButton("Delete")
-        delete_btn.clicked.connect(lambda: self.delete_scene(scene))
-        
-        refresh_btn = QPushButton("↻ Refresh")
-        refresh_btn.setToolTip("Recalculează oportunitățile pentru această scenă")
-        refresh_btn.setStyleSheet("""
-            QPushButton {
-                min-width: 80px;
-                padding: 8px 15px;
-            }
-        """)
-        refresh_btn.clicked.connect(lambda: self.refresh_scene(scene))
-        
-        buttons_row.addWidget(edit_btn)
-        buttons_row.addWidget(duplicate_btn)
-        buttons_row.addWidget(delete_btn)
-        buttons_row.addWidget(refresh_btn)
-        buttons_row.addStretch()
-        layout.addLayout(buttons_row)
-        
-        # Rândul 2: Locație
-        if scene.location_type == 'romania':
-            location_text = f"Locație: {scene.location_data['localitate']}, {scene.location_data['judet']}"
-        elif scene.location_type == 'profile':
-            location_text = f"Locație: {scene.location_data['name']}"
-        else:
-            location_text = f"Locație: {scene.location_data['lat']:.4f}°N, {scene.location_data['lon']:.4f}°E"
-        layout.addWidget(QLabel(location_text))
-        
-        # Rândul 3: Limite
-        limits_text = (f"Limite: Az {scene.azimuth_min}°-{scene.azimuth_max}°, "
-                      f"El {scene.elevation_min}°-{scene.elevation_max}° | "
-                      f"Timp: {scene.time_start}-{scene.time_end} "
-                      f"{'(next day)' if scene.time_end_next_day else ''} | "
-                      f"Iluminare min: {scene.min_illumination}%")
-        layout.addWidget(QLabel(limits_text))
-        
-        # Rândul 4: Oportunități
-        opps_row = QHBoxLayout()
-        opps_row.setSpacing(10)
-        
-        if scene.opportunities:
-            for i in range(min(3, len(scene.opportunities))):
-                opp = scene.opportunities[i]
-                interval_duration = opp['end_datetime'] - opp['start_datetime']
-                minutes = int(interval_duration.total_seconds() / 60)
-                
-                # Calculăm distanța pentru momentul oportunității
-                ts = self.parent.ts.from_datetime(opp['start_datetime'])
-                distance_info = self.parent.calculate_moon_distance_at(ts)
-                
-                # Formatăm distanța cu rating
-                distance_str = f"{distance_info['distance']:,.0f}".replace(",", ".")
-                status_parts = distance_info['status'].split()
-                rating_part = status_parts[-1]
-                status_name = status_parts[0]
-                distance_line = f"{status_name} {rating_part} • {distance_str} km"
-                
-                opp_label = QLabel(
-                    f"Oportunitatea {i+1}:\n"
-                    f"Data: {opp['start_datetime'].strftime('%d/%m/%Y')}\n"
-                    f"Interval: {opp['start_datetime'].strftime('%H:%M')} - "
-                    f"{opp['end_datetime'].strftime('%H:%M')}\n"
-                    f"Durată: {minutes} minute\n"
-                    f"Elevație: {opp['elevation_min']:.1f}° - {opp['elevation_max']:.1f}°\n"
-                    f"Azimut: {opp['azimuth_min']:.1f}° - {opp['azimuth_max']:.1f}°\n"
-                    f"Iluminare: {opp['max_illumination']:.1f}%\n"
-                    f"{distance_line}"
-                )
-                opp_label.setStyleSheet("""
-                    QLabel {
-                        background-color: #404040;
-                        padding: 1px;
-                        border-radius: 4px;
-                        min-width: 200px;
-                        min-height: 105px;
-                    }
-                """)
-                opp_label.setAlignment(Qt.AlignTop | Qt.AlignHCenter)
-                opp_label.setWordWrap(True)
-                opps_row.addWidget(opp_label, 1)
-        else:
-            no_data_label = QLabel("Apăsați ↻ Refresh pentru a calcula oportunitățile")
-            no_data_label.setStyleSheet("""
-                QLabel {
-                    background-color: #404040;
-                    padding: 10px;
-                    border-radius: 4px;
-                    min-width: 200px;
-                    min-height: 105px;
-                }
-            """)
-            no_data_label.setAlignment(Qt.AlignCenter)
-            opps_row.addWidget(no_data_label, 1)
-        
-        layout.addLayout(opps_row)
-        widget.setLayout(layout)
-        widget.setFixedHeight(250)
-        
-        return widget
-
     def refresh_scene(self, scene):
         """Recalculează oportunitățile pentru o singură scenă"""
         try:
-            # Salvăm index-ul scenei în layout pentru a păstra ordinea
-            scene_index = -1
-            for i in range(self.scenes_layout.count()):
-                widget = self.scenes_layout.itemAt(i).widget()
-                if widget and widget.title() == scene.name:
-                    scene_index = i
-                    widget.setParent(None)
-                    break
-            
-            # Recalculăm oportunitățile doar pentru această scenă
+            # Recalculăm oportunitățile doar pentru această scenă și îi actualizăm rândul
             self.compute_opportunities(scene)
-            
-            # Recreăm widget-ul scenei și îl punem înapoi în aceeași poziție
-            new_widget = self.create_scene_widget(scene)
-            if scene_index >= 0:
-                self.scenes_layout.insertWidget(scene_index, new_widget)
-            else:
-                self.scenes_layout.addWidget(new_widget)
+            self.scene_model.scene_changed(scene)
                 
             # Salvăm modificările
-            self.save_scenes()
+            self.save_scene(scene)
             
             # Actualizăm afișarea oportunității
             self.parent.update_next_opportunity()
             
         except Exception as e:
-            print(f"Eroare la recalcularea oportunităților pentru scena {scene.name}: {e}")
+            scan_log.error("Eroare la recalcularea oportunităților pentru scena %s: %s", scene.name, e)
+
+    def opportunity_cursor(self, scene):
+        cursor = self.cursors.get(scene.id)
+        if cursor is None or cursor.scene is not scene:
+            cursor = self.cursors[scene.id] = OpportunityCursor(self.scene_sky(scene), scene)
+        return cursor
 
     def navigate_opportunities(self, scene, direction):
-        """Navighează între oportunități"""
-        print(f"\n=== Navigare oportunități pentru scena '{scene.name}' ===")
-        print(f"Index curent: {scene.current_opportunity_index}, Direcție: {direction}")
-        print(f"Total oportunități: {len(scene.opportunities)}")
+        """
+        Navighează între oportunități. Rândul arată trei oportunități începând cu cea curentă;
+        dacă fereastra trece de ultima cunoscută, cursorul scenei pornește în fundal căutarea
+        următoarei, iar navigarea se încheie când worker-ul termină (on_scan_finished).
+        """
+        ui_log.debug("Navigare oportunități '%s': index %d, direcție %d, total %d",
+                     scene.name, scene.current_opportunity_index, direction, len(scene.opportunities))
         
         if not scene.opportunities:
-            print("Nu există oportunități disponibile")
+            ui_log.debug("Nu există oportunități disponibile")
             return
             
         new_index = scene.current_opportunity_index + direction
-        if 0 <= new_index < len(scene.opportunities):
+        # În timpul unei scanări din fundal navigăm doar printre cele deja găsite
+        if direction > 0 and scene.id not in self.scan_workers:
+            cursor = self.opportunity_cursor(scene)
+            if cursor.needs(new_index + 2):
+                self.pending_navigation[scene.id] = new_index
+                self.start_scan(cursor.worker(new_index + 2, parent=self))
+                return
+
+        # Fereastra de trei nu trece de ultima oportunitate
+        if 0 <= new_index <= max(len(scene.opportunities) - 3, 0):
             scene.current_opportunity_index = new_index
-            print(f"Nou index: {new_index}")
-            
-            # Actualizăm afișarea pentru această scenă
-            # Găsim widget-ul scenei și îl actualizăm
-            for i in reversed(range(self.scenes_layout.count())):
-                widget = self.scenes_layout.itemAt(i).widget()
-                if widget and widget.title() == scene.name:
-                    widget.setParent(None)
-                    self.scenes_layout.insertWidget(i, self.create_scene_widget(scene))
-                    break
-                    
-            self.save_scenes()
+            
+            # Actualizăm doar rândul acestei scene
+            self.scene_model.scene_changed(scene)
+            self.store.save_scene_state(scene)
         else:
-            print(f"Index invalid: {new_index}")
+            ui_log.debug("Index invalid: %d", new_index)
 
     def update_opportunity_display(self, scene):
         """Actualizează afișarea oportunității curente"""
@@ -1359,376 +3705,939 @@ class SceneEditorWindow(QMainWindow):
                 
         label.setText(text)
 
-    def compute_opportunities(self, scene, num_opportunities=3):
+    @tracer.traced('compute_opportunities')
+    def compute_opportunities(self, scene, num_opportunities=None):
         """
-        Calculează următoarele oportunități pentru o scenă, identificând intervale complete
-        în care sunt îndeplinite toate condițiile simultan.
+        Pornește în fundal calculul următoarelor oportunități pentru o scenă, pe orizontul și
+        numărul ei (search_days, num_opportunities). Rândul scenei se completează pe măsură ce
+        sunt găsite; o scanare deja pornită pentru scenă e anulată.
         """
-        # Creăm dialogul de progres
-        progress = MoonProgressDialog("Calculare Oportunități", self)
-        progress.setLabelText(f"Se calculează oportunitățile pentru scena '{scene.name}'...")
-        progress.setValue(0)
-        
-        print(f"\n=== Calculare oportunități pentru scena '{scene.name}' ===")
+        self.discard_scan(scene)
+        scan_log.info("Calculare oportunități pentru scena '%s'", scene.name)
         scene.opportunities = []
         scene.current_opportunity_index = 0
+        scene.scan_position = None
+        self.cursors.pop(scene.id, None)
         
-        potential_intervals = []
-        current_time = datetime.now(self.parent.current_timezone)
-        days_to_check = 90
-        
-        print(f"Căutăm oportunități între {current_time.strftime('%d/%m/%Y')} și "
-                      f"{(current_time + timedelta(days=days_to_check)).strftime('%d/%m/%Y')}")
-        print(f"Condiții: Az {scene.azimuth_min}°-{scene.azimuth_max}°, "
-              f"El {scene.elevation_min}°-{scene.elevation_max}°")
-        print(f"Iluminare minimă: {scene.min_illumination}%")
-        
-        # Grupăm intervalele pe zile
-        daily_intervals = {}
-        current_interval = None
-        
+        self.start_scan(OpportunityScanWorker(self.scene_sky(scene), scene,
+                                              num_opportunities or scene.num_opportunities,
+                                              scene.search_days, parent=self))
+
+    def start_scan(self, worker):
+        """Înregistrează worker-ul ca scanarea curentă a scenei lui și îl pornește"""
+        worker.opportunity_found.connect(self.on_opportunity_found)
+        worker.progress_changed.connect(self.on_scan_progress)
+        worker.finished.connect(self.on_scan_finished)
+        self.scan_workers[worker.scene.id] = worker
+        self.scene_model.set_scan_progress(worker.scene, 0, worker.scanner.days_to_check, 0.0)
+        worker.start()
+
+    def cancel_scan(self, scene):
+        """
+        Oprește scanarea scenei (butonul Stop). Worker-ul rămâne înregistrat până la finished,
+        deci on_scan_finished păstrează și salvează ce s-a găsit până atunci.
+        """
+        worker = self.scan_workers.get(scene.id)
+        if worker:
+            worker.cancel()
+
+    def discard_scan(self, scene):
+        """Oprește scanarea scenei și îi ignoră rezultatele (scanare înlocuită sau scenă ștearsă)"""
+        worker = self.scan_workers.pop(scene.id, None)
+        self.pending_navigation.pop(scene.id, None)
+        if worker:
+            worker.cancel()
+            self.scene_model.set_scan_progress(scene, None)
+
+    def cancel_all_scans(self):
+        for worker in list(self.scan_workers.values()):
+            self.cancel_scan(worker.scene)
+
+    def is_current_worker(self, worker):
+        return self.scan_workers.get(worker.scene.id) is worker
+
+    def on_opportunity_found(self, worker, opportunity):
+        if not self.is_current_worker(worker):
+            return
+        worker.scene.opportunities.append(opportunity)
+        self.scene_model.scene_changed(worker.scene)
+
+    def on_scan_progress(self, worker, day, days, rate):
+        if self.is_current_worker(worker):
+            self.scene_model.set_scan_progress(worker.scene, day, days, rate)
+
+    def on_scan_finished(self, worker, cancelled):
+        # finished e ultimul semnal al worker-ului
+        worker.deleteLater()
+        if not self.is_current_worker(worker):
+            return
+        del self.scan_workers[worker.scene.id]
+        self.scene_model.set_scan_progress(worker.scene, None)
+        # Navigarea mai departe continuă de aici (și după o anulare: poziția e după ultima găsită)
+        if worker.scanner.resume_time:
+            worker.scene.scan_position = worker.scanner.resume_time.astimezone(pytz.UTC)
+        scan_log.info("Scena '%s': %d oportunități în %d zile scanate (%.0f zile/s)%s", worker.scene.name,
+                      len(worker.scene.opportunities), worker.scanner.days_scanned,
+                      worker.scanner.days_per_second(), " (anulat)" if cancelled else "")
+        target = self.pending_navigation.pop(worker.scene.id, None)
+        if target is not None:
+            # Căutare pornită din navigare: fereastra avansează cât au ajuns oportunitățile găsite
+            self.opportunity_cursor(worker.scene).finished(worker, cancelled)
+            worker.scene.current_opportunity_index = max(
+                min(target, len(worker.scene.opportunities) - 3), worker.scene.current_opportunity_index)
+            self.scene_model.scene_changed(worker.scene)
+        # Păstrăm și rezultatele parțiale ale unei scanări anulate
+        self.save_scene(worker.scene)
+        self.parent.update_next_opportunity()
+
+    @tracer.traced('persist.save_scenes')
+    def save_scenes(self):
+        """Salvează toate scenele în baza de date (o singură tranzacție)"""
+        try:
+            persist_log.debug("Salvare %d scene", len(self.scenes))
+            for index in self.parent.opportunity_indexes:
+                index.load(self.scenes)
+            self.store.save_scenes(self.scenes)
+        except Exception as e:
+            persist_log.exception("EROARE la salvarea scenelor: %s", e)
+
+    @tracer.traced('persist.save_scene')
+    def save_scene(self, scene):
+        """Salvează o singură scenă (upsert pe rândurile ei) și îi actualizează intrările din indexuri"""
+        for index in self.parent.opportunity_indexes:
+            index.update_scene(scene)
+        try:
+            self.store.save_scene(scene)
+        except Exception as e:
+            persist_log.exception("EROARE la salvarea scenei %s: %s", scene.name, e)
+
+    def enrich_legacy_opportunities(self):
+        """Oportunitățile salvate înainte de înregistrările complete primesc o dată distanța și sunt salvate"""
+        updated = [scene for scene in self.scenes
+                   if any([OpportunityScanner.enrich(self.parent, opp)
+                           for opp in scene.opportunities if 'distance_status' not in opp])]
+        if updated:
+            persist_log.info("Completate oportunitățile vechi pentru %d scene", len(updated))
+            self.store.save_scenes(updated)
+
+    def export_scenes_json(self):
+        """Exportă scenele în format moon_scenes.json"""
+        path, _ = QFileDialog.getSaveFileName(self, "Export scene", self.store.json_path,
+                                              "JSON (*.json)")
+        if not path:
+            return
         try:
-            for day in range(days_to_check):
-                # Actualizăm progresul
-                progress_value = int((day / days_to_check) * 100)
-                progress.setValue(progress_value)
-                progress.setLabelText(f"Se analizează ziua {day + 1} din {days_to_check}...")
+            count = self.store.export_json(path)
+            persist_log.info("Exportate %d scene în %s", count, path)
+        except Exception as e:
+            QMessageBox.warning(self, "Export scene", f"Exportul a eșuat: {e}")
+
+    def import_scenes_json(self):
+        """Importă scene dintr-un fișier moon_scenes.json"""
+        path, _ = QFileDialog.getOpenFileName(self, "Import scene", "", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            count = self.store.import_json(path)
+            persist_log.info("Importate %d scene din %s", count, path)
+        except Exception as e:
+            QMessageBox.warning(self, "Import scene", f"Importul a eșuat: {e}")
+            return
+        self.load_scenes()
+
+    def load_scenes(self):
+        """Încarcă scenele din baza de date fără a recalcula oportunitățile"""
+        try:
+            self.scenes = self.store.load_scenes()
+            persist_log.info("Scene încărcate: %d", len(self.scenes))
+            self.enrich_legacy_opportunities()
                 
-                # Verificăm dacă utilizatorul a anulat operația
-                if progress.wasCanceled():
-                    print("Operație anulată de utilizator")
-                    return
+            # Modelul partajează lista; rândurile se construiesc abia când devin vizibile
+            self.scene_model.set_scenes(self.scenes)
+            for index in self.parent.opportunity_indexes:
+                index.load(self.scenes)
+            if self.scenes:
+                self.parent.update_next_opportunity()
+                                
+        except Exception as e:
+            persist_log.exception("Eroare la încărcarea scenelor: %s", e)
+            self.scenes = []
+            self.scene_model.set_scenes(self.scenes)
+            for index in self.parent.opportunity_indexes:
+                index.load(self.scenes)
+
+class MoonDisplayModel(QObject):
+    """
+    Valorile afișate în fereastra principală, deja formatate.
+    Fiecare câmp are semnalul lui (<câmp>_changed), emis doar când valoarea formatată se schimbă,
+    așa că etichetele legate nu refac layout-ul sau stilul dacă nimic vizibil nu s-a modificat.
+    """
+    current_time_changed = pyqtSignal(str)
+    moonrise_text_changed = pyqtSignal(str)
+    elevation_text_changed = pyqtSignal(str)
+    position_text_changed = pyqtSignal(str)
+    compass_text_changed = pyqtSignal(str)
+    compass_changed = pyqtSignal(object)
+    distance_text_changed = pyqtSignal(str)
+    distance_color_changed = pyqtSignal(str)
+    distance_bar_changed = pyqtSignal(str)
+    phase_text_changed = pyqtSignal(str)
+    age_text_changed = pyqtSignal(str)
+    image_name_changed = pyqtSignal(str)
+    phase_image_changed = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._values = {}
+
+    def set(self, field, value):
+        """Actualizează un câmp; întoarce True dacă valoarea s-a schimbat (și semnalul a fost emis)"""
+        if field in self._values and self._values[field] == value:
+            return False
+        self._values[field] = value
+        getattr(self, f'{field}_changed').emit(value)
+        return True
+
+    def get(self, field, default=None):
+        return self._values.get(field, default)
+
+    def bind(self, field, slot):
+        """Conectează slot-ul la câmp și îl apelează imediat dacă există deja o valoare"""
+        getattr(self, f'{field}_changed').connect(slot)
+        if field in self._values:
+            slot(self._values[field])
+
+class UpcomingOpportunityIndex:
+    """
+    Index global al oportunităților viitoare din toate scenele: un min-heap după ora de start.
+    
+    Schimbarea oportunităților unei scene adaugă doar intrările ei; cele vechi rămân în heap,
+    marcate prin versiunea scenei, și sunt eliminate când ajung în vârf (sau la compactare).
+    Intrările trecute expiră la interogare, iar next(k) costă O(k log n).
+    """
+    def __init__(self):
+        self._heap = []
+        self._versions = {}
+        self._scenes = {}
+        self._counts = {}
+        self._stale = 0
+        self._sequence = 0
+
+    def __len__(self):
+        return len(self._heap) - self._stale
+
+    def _entries(self, scene):
+        version = self._versions[scene.id]
+        for opportunity in scene.opportunities:
+            start = SceneStore._utc_seconds(opportunity.get('start_datetime'))
+            if start is None:
+                continue
+            self._sequence += 1
+            yield (start, self._sequence, scene.id, version, opportunity)
+
+    def load(self, scenes):
+        """Reconstruiește indexul (O(n))"""
+        self._heap = []
+        self._versions = {}
+        self._scenes = {}
+        self._counts = {}
+        self._stale = 0
+        for scene in scenes:
+            self._versions[scene.id] = 1
+            self._scenes[scene.id] = scene
+            entries = list(self._entries(scene))
+            self._counts[scene.id] = len(entries)
+            self._heap.extend(entries)
+        heapq.heapify(self._heap)
+
+    def update_scene(self, scene):
+        """Oportunitățile scenei s-au schimbat: intrările vechi devin invalide, cele noi intră în heap"""
+        self._stale += self._counts.get(scene.id, 0)
+        self._versions[scene.id] = self._versions.get(scene.id, 0) + 1
+        self._scenes[scene.id] = scene
+        entries = list(self._entries(scene))
+        self._counts[scene.id] = len(entries)
+        for entry in entries:
+            heapq.heappush(self._heap, entry)
+        self._compact_if_needed()
+
+    def remove_scene(self, scene):
+        self._stale += self._counts.pop(scene.id, 0)
+        self._versions.pop(scene.id, None)
+        self._scenes.pop(scene.id, None)
+        self._compact_if_needed()
+
+    def _is_live(self, entry):
+        return self._versions.get(entry[2]) == entry[3]
+
+    def _compact_if_needed(self):
+        # Când intrările invalide sunt majoritare, reconstruim heap-ul doar cu cele valide
+        if self._stale > 64 and self._stale * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if self._is_live(entry)]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def expire(self, now):
+        """Scoate din vârf intrările invalide și pe cele care au început până la now"""
+        now_seconds = SceneStore._utc_seconds(now)
+        while self._heap and (not self._is_live(self._heap[0]) or self._heap[0][0] <= now_seconds):
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                self._counts[entry[2]] -= 1
+            else:
+                self._stale -= 1
+
+    def next(self, k, now):
+        """Următoarele k oportunități de după now, în același format ca SceneStore.upcoming_opportunities"""
+        self.expire(now)
+        taken = []
+        while self._heap and len(taken) < k:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                taken.append(entry)
+            else:
+                self._stale -= 1
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+        return [{
+            'scene_id': scene_id,
+            'scene_name': self._scenes[scene_id].name,
+            'opportunity': opportunity
+        } for _, _, scene_id, _, opportunity in taken]
+
+class _IntervalNode:
+    __slots__ = ('center', 'left', 'right', 'by_start', 'by_end')
+
+    def __init__(self, center, by_start, by_end, left, right):
+        self.center = center
+        self.by_start = by_start
+        self.by_end = by_end
+        self.left = left
+        self.right = right
+
+class OpportunityIntervalIndex:
+    """
+    Arbore de intervale (centrat) peste oportunitățile tuturor scenelor, pentru întrebări ca
+    „ce scene au ferestre în noaptea asta”, „ce se suprapune cu oportunitatea asta” sau
+    „tot ce e între două date”. O interogare costă O(log n + k). Schimbarea unei scene îi
+    înlocuiește doar intrările; arborele se reconstruiește (O(n log n)) la prima interogare de după.
+    """
+    def __init__(self):
+        self._entries = {}
+        self._root = None
+        self._dirty = False
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    @staticmethod
+    def _scene_entries(scene):
+        entries = []
+        for opportunity in scene.opportunities:
+            start = SceneStore._utc_seconds(opportunity.get('start_datetime'))
+            if start is None:
+                continue
+            end = SceneStore._utc_seconds(opportunity.get('end_datetime'))
+            entries.append((start, max(start, end if end is not None else start), scene, opportunity))
+        return entries
+
+    def load(self, scenes):
+        self._entries = {scene.id: self._scene_entries(scene) for scene in scenes}
+        self._dirty = True
+
+    def update_scene(self, scene):
+        self._entries[scene.id] = self._scene_entries(scene)
+        self._dirty = True
+
+    def remove_scene(self, scene):
+        if self._entries.pop(scene.id, None) is not None:
+            self._dirty = True
+
+    def _build(self, entries):
+        if not entries:
+            return None
+        midpoints = sorted((start + end) / 2 for start, end, _, _ in entries)
+        center = midpoints[len(midpoints) // 2]
+        left, right, here = [], [], []
+        for entry in entries:
+            if entry[1] < center:
+                left.append(entry)
+            elif entry[0] > center:
+                right.append(entry)
+            else:
+                here.append(entry)
+        return _IntervalNode(center,
+                             sorted(here, key=lambda entry: entry[0]),
+                             sorted(here, key=lambda entry: entry[1], reverse=True),
+                             self._build(left), self._build(right))
+
+    def _tree(self):
+        if self._dirty:
+            with tracer.span('interval_index.build'):
+                self._root = self._build([entry for entries in self._entries.values() for entry in entries])
+            self._dirty = False
+        return self._root
+
+    def overlapping(self, start, end):
+        """Oportunitățile care se suprapun (capete incluse) cu [start, end], sortate după start"""
+        low, high = SceneStore._utc_seconds(start), SceneStore._utc_seconds(end)
+        found = []
+        stack = [self._tree()]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if high < node.center:
+                # Intervalele nodului conțin centrul, deci se termină după high: contează doar startul
+                for entry in node.by_start:
+                    if entry[0] > high:
+                        break
+                    found.append(entry)
+                stack.append(node.left)
+            elif low > node.center:
+                for entry in node.by_end:
+                    if entry[1] < low:
+                        break
+                    found.append(entry)
+                stack.append(node.right)
+            else:
+                found.extend(node.by_start)
+                stack.append(node.left)
+                stack.append(node.right)
+        found.sort(key=lambda entry: (entry[0], entry[1]))
+        return [{
+            'scene': scene,
+            'scene_id': scene.id,
+            'scene_name': scene.name,
+            'opportunity': opportunity,
+            'start_utc': entry_start,
+            'end_utc': entry_end,
+        } for entry_start, entry_end, scene, opportunity in found]
+
+    def at(self, moment):
+        """Oportunitățile în desfășurare la momentul dat"""
+        return self.overlapping(moment, moment)
+
+    def scenes_between(self, start, end):
+        """Scenele care au cel puțin o fereastră în [start, end], în ordinea primei ferestre"""
+        scenes = {}
+        for item in self.overlapping(start, end):
+            scenes.setdefault(item['scene_id'], item['scene'])
+        return list(scenes.values())
+
+class OpportunityPlanner:
+    """
+    Planul unei perioade în care oportunitățile mai multor scene se suprapun: alege o succesiune
+    realizabilă (sfârșitul uneia plus drumul până la locația următoarei nu depășește startul
+    următoarei) cu scor total maxim. Programare dinamică pe intervale ponderate; compatibilitatea
+    depinde de timpul de drum, deci costul e O(n²) pe oportunitățile din perioadă.
+    """
+    SPEED_KMH = 60
+    ROUTE_FACTOR = 1.3  # drumul real față de distanța în linie dreaptă
+
+    def __init__(self, index, coordinates, speed_kmh=SPEED_KMH, route_factor=ROUTE_FACTOR, score=None):
+        self.index = index
+        self.coordinates = coordinates
+        self.speed_kmh = speed_kmh
+        self.route_factor = route_factor
+        self.score = score or self.default_score
+
+    @staticmethod
+    def default_score(opportunity):
+        """Cât mai multe oportunități; la egalitate, cele cu Luna mai aproape"""
+        return 1 + (opportunity.get('distance_rating') or 0) / 100
+
+    @staticmethod
+    def distance_km(a, b):
+        """Distanța pe sferă (haversine) între două perechi (lat, lon)"""
+        lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+        h = (math.sin((lat2 - lat1) / 2) ** 2 +
+             math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+        return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+    def travel_minutes(self, from_scene, to_scene):
+        """Timpul de drum estimat; 0 pentru aceeași scenă sau când coordonatele lipsesc"""
+        if from_scene is to_scene:
+            return 0.0
+        a, b = self.coordinates(from_scene), self.coordinates(to_scene)
+        if a is None or b is None:
+            return 0.0
+        return self.distance_km(a, b) * self.route_factor / self.speed_kmh * 60
+
+    def _compatible(self, first, second):
+        travel = self.travel_minutes(first['scene'], second['scene']) * 60
+        return first['end_utc'] + travel <= second['start_utc']
+
+    @tracer.traced('planner.plan')
+    def plan(self, start, end):
+        """
+        Întoarce {'selected': [...], 'skipped': [...]}, ambele în formatul
+        OpportunityIntervalIndex.overlapping. Cele alese au 'travel_minutes' (de la precedenta),
+        cele sărite au 'conflict' (oportunitatea aleasă care le blochează).
+        """
+        items = sorted(self.index.overlapping(start, end), key=lambda item: (item['end_utc'], item['start_utc']))
+        best, previous = [], []
+        for j, item in enumerate(items):
+            score = self.score(item['opportunity'])
+            best.append(score)
+            previous.append(-1)
+            for i in range(j):
+                if items[i]['end_utc'] > item['start_utc']:
+                    continue
+                if best[i] + score > best[j] and self._compatible(items[i], item):
+                    best[j] = best[i] + score
+                    previous[j] = i
+
+        chosen = []
+        j = max(range(len(items)), key=lambda k: best[k]) if items else -1
+        while j >= 0:
+            chosen.append(j)
+            j = previous[j]
+        chosen.reverse()
+
+        selected = []
+        for position, j in enumerate(chosen):
+            item = dict(items[j])
+            item['travel_minutes'] = (self.travel_minutes(items[chosen[position - 1]]['scene'], item['scene'])
+                                      if position else 0.0)
+            selected.append(item)
+
+        chosen_set = set(chosen)
+        skipped = []
+        for k, item in enumerate(items):
+            if k in chosen_set:
+                continue
+            item = dict(item)
+            # Conflictul raportat e oportunitatea aleasă incompatibilă cea mai apropiată în timp
+            blocking = [other for other in selected
+                        if not (self._compatible(other, item) or self._compatible(item, other))]
+            item['conflict'] = min(blocking, key=lambda other: abs(other['start_utc'] - item['start_utc']),
+                                   default=None)
+            skipped.append(item)
+        skipped.sort(key=lambda item: item['start_utc'])
+        return {'selected': selected, 'skipped': skipped}
+
+class RefreshScheduler:
+    """
+    Împrospătarea ferestrei pe niveluri, fiecare cu cadența lui (ceas, poziție, răsărit/apus, fază).
+    
+    Un nivel e (nume, funcție, cadență în secunde). Funcția primește timpul de referință și poate
+    întoarce numărul de secunde până la următoarea împrospătare (ex. până la următorul eveniment);
+    altfel se folosește cadența. Cât timp fereastra e minimizată sau ascunsă, timer-ul încetinește
+    și nu se recalculează nimic; la revenire toate nivelurile sunt împrospătate.
+    """
+    BASE_INTERVAL_MS = 1000
+    THROTTLED_INTERVAL_MS = 30000
+
+    def __init__(self, window, tiers):
+        self.window = window
+        self.tiers = tiers
+        self.due = {name: 0.0 for name, _, _ in tiers}
+        self.throttled = False
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        self.timer.start(self.BASE_INTERVAL_MS)
+
+    def stop(self):
+        self.timer.stop()
+
+    def is_hidden(self):
+        return self.window.isMinimized() or not self.window.isVisible()
+
+    @tracer.traced('refresh.tick')
+    def tick(self):
+        """Rulează nivelurile scadente; nu face nimic cât fereastra nu se vede"""
+        if self.is_hidden():
+            if not self.throttled:
+                ui_log.debug("Fereastra nu e vizibilă: împrospătare încetinită")
+                self.throttled = True
+                self.timer.setInterval(self.THROTTLED_INTERVAL_MS)
+            return
+        if self.throttled:
+            self.wake()
+            return
+        self.run(force=False)
+
+    def run(self, force):
+        now = unix_time.monotonic()
+        reference_time = self.window.reference_time()
+        for name, refresh, cadence in self.tiers:
+            if not force and now < self.due[name]:
+                continue
+            with tracer.span(f'refresh.{name}'):
+                delay = refresh(reference_time)
+            self.due[name] = now + (cadence if delay is None else min(delay, cadence))
+
+    def invalidate(self):
+        """Împrospătează imediat toate nivelurile (locație, fus orar sau timeshift schimbat)"""
+        self.run(force=True)
+
+    def wake(self):
+        """Revenire din starea minimizată/ascunsă"""
+        if self.throttled:
+            self.throttled = False
+            if self.timer.isActive():
+                self.timer.setInterval(self.BASE_INTERVAL_MS)
+            self.invalidate()
+
+class ObserverRegistry:
+    """
+    Observatorii scenelor: Topos (cu altitudinea din lista de localități) și fusul orar, rezolvați
+    o singură dată și partajați după coordonate între scene, scanări și ferestre. sky_for(scene)
+    întoarce un MoonSky al locației scenei, independent de ce arată fereastra principală.
+    Scanările din fundal iau de aici locația și fusul orar, cu propriul handle al efemeridelor.
+    """
+    ROMANIA_TIMEZONE = 'Europe/Bucharest'
+
+    def __init__(self, ts, eph, data_manager=None, timezone_finder=None):
+        self.ts = ts
+        self.eph = eph
+        self.data_manager = data_manager
+        self.timezone_finder = timezone_finder
+        self._skies = {}
+        self._timezones = {}
+        self._lock = threading.Lock()
+
+    def describe(self, scene):
+        """(lat, lon, altitudine în m, nume fus orar sau None) pentru locația scenei; None dacă nu se cunoaște"""
+        data = scene.location_data
+        timezone_name = data.get('timezone')
+        if scene.location_type == 'romania':
+            timezone_name = self.ROMANIA_TIMEZONE
+            if self.data_manager and data.get('judet'):
+                latitude, longitude = self.data_manager.get_coordinates(data['judet'], data.get('localitate'))
+                if latitude or longitude:
+                    elevation = self.data_manager.get_altitude(data['judet'], data.get('localitate'))
+                    return latitude, longitude, elevation, timezone_name
+        if 'lat' in data and 'lon' in data:
+            return float(data['lat']), float(data['lon']), 0.0, timezone_name
+        return None
+
+    def coordinates(self, scene):
+        described = self.describe(scene)
+        return described[:2] if described else None
+
+    def sky_for(self, scene):
+        """MoonSky-ul partajat al locației scenei, sau None dacă scena nu are coordonate"""
+        described = self.describe(scene)
+        if described is None:
+            return None
+        latitude, longitude, elevation, timezone_name = described
+        key = (round(latitude, 6), round(longitude, 6), round(elevation, 1), timezone_name)
+        with self._lock:
+            sky = self._skies.get(key)
+            if sky is None:
+                location = Topos(latitude_degrees=latitude, longitude_degrees=longitude, elevation_m=elevation)
+                timezone = self._timezone(timezone_name, latitude, longitude)
+                sky = self._skies[key] = MoonSky(self.ts, self.eph, location, timezone)
+                ephemeris_log.info("Observator nou: %.4f°N, %.4f°E, %.0f m, %s",
+                                   latitude, longitude, elevation, timezone)
+        return sky
+
+    def _timezone(self, timezone_name, latitude, longitude):
+        if timezone_name:
+            try:
+                return pytz.timezone(timezone_name)
+            except pytz.UnknownTimeZoneError:
+                ephemeris_log.warning("Fus orar necunoscut %s; se caută după coordonate", timezone_name)
+        key = (round(latitude, 4), round(longitude, 4))
+        if key not in self._timezones:
+            found = self.timezone_finder.timezone_at(lat=latitude, lng=longitude) if self.timezone_finder else None
+            if not found:
+                # Ca în update_timezone_from_coordinates: fus orar aproximat din longitudine
+                hours_offset = round(longitude / 15)
+                found = f"Etc/GMT-{hours_offset}" if hours_offset > 0 else f"Etc/GMT+{abs(hours_offset)}"
+            self._timezones[key] = pytz.timezone(found)
+        return self._timezones[key]
+
+class MoonSky:
+    """
+    Calculele astronomice ale ferestrei principale, fără dependențe de Qt.
+    Folosește ts, eph, location, current_timezone și store; timeshift_datetime/timeshift_ts
+    sunt opționale (timpul simulat). MoonPhaseWindow o moștenește, benchmark-urile o folosesc direct.
+    """
+    def __init__(self, ts=None, eph=None, location=None, timezone=None, store=None, **kwargs):
+        super().__init__(**kwargs)
+        self.ts = ts
+        self.eph = eph
+        self.location = location
+        self.current_timezone = timezone or pytz.timezone('Europe/Bucharest')
+        self.store = store
+
+    def calculate_moon_position(self):
+        """Calculate current moon elevation and azimuth"""
+        try:
+            # Folosim timpul din timeshift dacă există
+            time_ref = self.timeshift_ts if hasattr(self, 'timeshift_ts') else self.ts.now()
+            
+            earth = self.eph['earth']
+            moon = self.eph['moon']
+            astrometric = (earth + self.location).at(time_ref).observe(moon)
+            alt, az, _ = astrometric.apparent().altaz()
+            return alt.degrees, az.degrees
+        except Exception as e:
+            ephemeris_log.error("EROARE la calculul poziției lunii: %s", e)
+            return None, None
+    
+    @tracer.traced('calculate_moon_times')
+    def calculate_moon_times(self):
+        """Calculate precise moon rise time using Skyfield"""
+        try:
+            # Determinăm timpul de referință
+            if hasattr(self, 'timeshift_datetime'):
+                current_time = self.timeshift_datetime
+            else:
+                current_time = datetime.now(self.current_timezone)
+            
+            t0 = self.ts.from_datetime(current_time)
+            t1 = self.ts.from_datetime(current_time + timedelta(hours=24))
+            
+            times, events = almanac.find_discrete(t0, t1, 
+                almanac.risings_and_settings(self.eph, self.eph['moon'], self.location))
+            
+            for time, event in zip(times, events):
+                if event:  # True = răsărit
+                    next_rise = time.astimezone(self.current_timezone)
+                    if next_rise < current_time:
+                        next_rise = next_rise + timedelta(days=1)
+                        
+                    time_until_rise = next_rise - current_time
+                    hours_until = time_until_rise.total_seconds() / 3600
+                    
+                    return next_rise, hours_until
+            
+            return None, None
                     
-                test_date = current_time + timedelta(days=day)
-                date_key = test_date.date()
-                print(f"\nVerificare ziua {day}: {date_key}")
+        except Exception as e:
+            ephemeris_log.error("EROARE la calculul timpilor lunari: %s", e)
+            return None, None
+
+    def azimuth_to_clock(self, azimuth):
+        """Convert azimuth (0-360°) to clock position (1-12)"""
+        hour = (azimuth / 30) % 12
+        if hour == 0:
+            hour = 12
+        return int(hour)
+
+    def calculate_moon_distance(self):
+        """Calculează distanța până la Lună și oferă informații despre perigeu/apogeu"""
+        time_ref = self.timeshift_ts if hasattr(self, 'timeshift_ts') else self.ts.now()
+        return self.calculate_moon_distance_at(time_ref)
+
+    # Distanțele (km) între care e considerată Luna la perigeu, respectiv la apogeu
+    PERIGEE_MIN = 356400
+    PERIGEE_MAX = 370400
+    APOGEE_MIN = 404000
+    APOGEE_MAX = 406700
+
+    @staticmethod
+    def distance_rating(distance_km):
+        """Nota 1-10 a distanței (10 = perigeu); acceptă și vectori NumPy"""
+        total_range = MoonSky.APOGEE_MAX - MoonSky.PERIGEE_MIN
+        return 10 - np.round((distance_km - MoonSky.PERIGEE_MIN) / total_range * 9)
+
+    def calculate_moon_distance_at(self, timestamp):
+        try:
+            earth = self.eph['earth']
+            moon = self.eph['moon']
+            
+            astrometric = earth.at(timestamp).observe(moon)
+            distance_km = astrometric.distance().km
+            
+            total_range = self.APOGEE_MAX - self.PERIGEE_MIN
+            current_position = distance_km - self.PERIGEE_MIN
+            rating = int(self.distance_rating(distance_km))
+            
+            if self.PERIGEE_MIN <= distance_km <= self.PERIGEE_MAX:
+                status = f"PERIGEU ({rating}/10)"
+                color = "#4CAF50"
+            elif self.APOGEE_MIN <= distance_km <= self.APOGEE_MAX:
+                status = f"APOGEU ({rating}/10)"
+                color = "#F44336"
+            else:
+                status = f"INTERMEDIAR ({rating}/10)"
+                color = "#FFC107"
                 
-                # Pentru fiecare zi, verificăm fiecare interval de 15 minute
-                for hour in range(24):
-                    if progress.wasCanceled():
-                        return
-                        
-                    for minute in [0, 15, 30, 45]:
-                        test_time = test_date.replace(hour=hour, minute=minute)
-                        
-                        # Verificăm fereastra de timp
-                        time_str = test_time.strftime("%H:%M")
-                        if not self.is_time_in_window(time_str, scene.time_start, 
-                                                    scene.time_end, scene.time_end_next_day):
-                            continue
-                        
-                        # Debug time window
-                        print(f"\nVerificare {test_time.strftime('%H:%M')}")
-                        
-                        # Calculăm poziția lunii
-                        try:
-                            ts = self.parent.ts.from_datetime(test_time)
-                            earth = self.parent.eph['earth']
-                            moon = self.parent.eph['moon']
-                            
-                            astrometric = (earth + self.parent.location).at(ts).observe(moon)
-                            alt, az, _ = astrometric.apparent().altaz()
-                            
-                            elevation = alt.degrees
-                            azimuth = az.degrees
-                            
-                            print(f"  Poziție: El={elevation:.1f}°, Az={azimuth:.1f}°")
-                            
-                        except Exception as e:
-                            print(f"!!! Eroare la calculul poziției: {e}")
-                            continue
-                        
-                        conditions_met = (
-                            self.is_azimuth_in_range(azimuth, scene.azimuth_min, scene.azimuth_max) and
-                            scene.elevation_min <= elevation <= scene.elevation_max
-                        )
+            current_position_percent = (current_position / total_range) * 100
+            
+            return {
+                'distance': distance_km,
+                'status': status,
+                'color': color,
+                'percentage': current_position_percent,
+                'rating': rating
+            }
+        except Exception as e:
+            ephemeris_log.error("Eroare la calculul distanței lunare: %s", e)
+            return None
+    
+    def load_full_moon_ratings(self):
+        """Încarcă rating-urile salvate din baza de date"""
+        try:
+            return self.store.load_full_moon_ratings()
+        except Exception as e:
+            persist_log.error("Eroare la încărcarea ratings: %s", e)
+            return []
 
-                        print(f"  Condiții poziție: {conditions_met}")
-                        
-                        if not conditions_met:
-                            if current_interval:
-                                print("  Închid interval - condiții poziție nu mai sunt îndeplinite")
-                                current_interval['end_datetime'] = test_time - timedelta(minutes=15)
-                                if date_key not in daily_intervals:
-                                    daily_intervals[date_key] = []
-                                daily_intervals[date_key].append(current_interval)
-                                current_interval = None
-                            continue
-                        
-                        # Verificăm iluminarea
-                        try:
-                            timestamp = int(test_time.timestamp())
-                            response = requests.get(f'https://api.farmsense.net/v1/moonphases/?d={timestamp}')
-                            moon_data = response.json()[0]
-                            illumination = float(moon_data['Illumination']) * 100
-                           
-                            print(f"  Iluminare: {illumination:.1f}%")
-                           
-                            if illumination >= scene.min_illumination:
-                                if not current_interval:
-                                    print("  Deschid interval nou")
-                                    current_interval = {
-                                        'start_datetime': test_time,
-                                        'elevation_min': elevation,
-                                        'elevation_max': elevation,
-                                        'azimuth_min': azimuth,
-                                        'azimuth_max': azimuth,
-                                        'illumination': illumination,
-                                        'max_illumination': illumination
-                                    }
-                                else:
-                                    current_interval['elevation_min'] = min(current_interval['elevation_min'], elevation)
-                                    current_interval['elevation_max'] = max(current_interval['elevation_max'], elevation)
-                                    current_interval['azimuth_min'] = min(current_interval['azimuth_min'], azimuth)
-                                    current_interval['azimuth_max'] = max(current_interval['azimuth_max'], azimuth)
-                                    current_interval['max_illumination'] = max(current_interval['max_illumination'], illumination)
-                                    print("  Actualizez iluminare maximă în interval")
-                            elif current_interval:
-                                print("  Închid interval - iluminare insuficientă")
-                                current_interval['end_datetime'] = test_time - timedelta(minutes=15)
-                                if date_key not in daily_intervals:
-                                    daily_intervals[date_key] = []
-                                daily_intervals[date_key].append(current_interval)
-                                current_interval = None
-                                
-                        except Exception as e:
-                            print(f"!!! Eroare la verificarea iluminării: {e}")
-                            if current_interval:
-                                print("  Închid interval din cauza erorii")
-                                current_interval['end_datetime'] = test_time - timedelta(minutes=15)
-                                if date_key not in daily_intervals:
-                                    daily_intervals[date_key] = []
-                                daily_intervals[date_key].append(current_interval)
-                                current_interval = None
-                            continue
-                        
-                        # Actualizăm textul cu detalii mai specifice
-                        progress.setLabelText(
-                            f"Se analizează ziua {day + 1} din {days_to_check}\n"
-                            f"Ora: {hour:02d}:{minute:02d}"
-                        )
+    def save_full_moon_ratings(self, ratings):
+        """Salvează rating-urile în baza de date"""
+        try:
+            self.store.save_full_moon_ratings(ratings)
+        except Exception as e:
+            persist_log.error("Eroare la salvarea ratings: %s", e)
+
+    def calculate_full_moon_ratings(self, force_recalc=False):
+        """Calculează rating-urile pentru următoarele 12 luni pline"""
+        try:
+            # Încercăm să încărcăm din baza de date dacă nu forțăm recalcularea
+            if not force_recalc:
+                saved_ratings = self.load_full_moon_ratings()
+                if saved_ratings and saved_ratings[0]['date'] > datetime.now(pytz.UTC):
+                    ephemeris_log.info("Folosim datele salvate pentru lunile pline")
+                    return saved_ratings
                 
-                print(f"Terminat ziua {day}")
-                if current_interval:
-                    print("Închid ultimul interval al zilei")
-                    current_interval['end_datetime'] = test_time
-                    if date_key not in daily_intervals:
-                        daily_intervals[date_key] = []
-                    daily_intervals[date_key].append(current_interval)
-                    current_interval = None
+            ephemeris_log.info("Calculăm date noi pentru lunile pline")
+            
+            start_time = datetime.now(self.current_timezone)
+            t0 = self.ts.from_datetime(start_time)
+            t1 = self.ts.from_datetime(start_time + timedelta(days=400))
+            
+            times, phases = almanac.find_discrete(t0, t1, almanac.moon_phases(self.eph))
+            
+            full_moons = []
+            for t, phase in zip(times, phases):
+                if phase == 2:  # 2 reprezintă luna plină
+                    full_moons.append(t)
+                if len(full_moons) >= 12:
+                    break
             
-            # Setăm progress la 100% pentru faza de procesare
-            progress.setValue(100)
-            progress.setLabelText("Se procesează intervalele găsite...")
-            
-            print("\nProcesare intervale găsite...")
-            # Procesăm intervalele găsite
-            consecutive_groups = []
-            current_group = []
-            previous_date = None
-            
-            for date in sorted(daily_intervals.keys()):
-                print(f"Procesare data: {date}")
-                if not previous_date or (date - previous_date).days == 1:
-                    print("  Adaug la grupul curent")
-                    current_group.extend(daily_intervals[date])
-                else:
-                    print("  Încep grup nou")
-                    if current_group:
-                        consecutive_groups.append(current_group)
-                    current_group = daily_intervals[date]
-                previous_date = date
-            
-            if current_group:
-                consecutive_groups.append(current_group)
-            
-            print(f"\nGrupuri consecutive găsite: {len(consecutive_groups)}")
-            
-            # Pentru fiecare grup de zile consecutive, alegem intervalul cu iluminarea maximă
-            selected_intervals = []
-            for i, group in enumerate(consecutive_groups):
-                print(f"\nProcesare grup {i+1}")
-                best_interval = max(group, key=lambda x: x['max_illumination'])
-                print(f"  Iluminare maximă în grup: {best_interval['max_illumination']:.1f}%")
-                selected_intervals.append(best_interval)
-            
-            # Sortăm după dată și luăm primele num_opportunities intervale
-            selected_intervals.sort(key=lambda x: x['start_datetime'])
-            selected_intervals = selected_intervals[:num_opportunities]
-            
-            print(f"\nGăsite {len(selected_intervals)} intervale optime")
-            scene.opportunities = selected_intervals
-            scene.current_opportunity_index = 0
-            self.parent.update_next_opportunity()  # Când se calculează oportunități noi
+            ratings = []
+            for moon_time in full_moons:
+                distance_info = self.calculate_moon_distance_at(moon_time)
+                if distance_info:
+                    ratings.append({
+                        'date': moon_time.astimezone(self.current_timezone),
+                        'rating': distance_info['rating']
+                    })
+            
+            # Salvăm noile calcule
+            self.save_full_moon_ratings(ratings)
+            
+            return ratings
             
         except Exception as e:
-            print(f"\n!!! EROARE CRITICĂ: {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            progress.close()
+            ephemeris_log.error("Eroare la calculul rating-urilor pentru luni pline: %s", e)
+            return []
 
-    def is_time_in_window(self, time_str, start_str, end_str, ends_next_day):
-        """Verifică dacă timpul dat este în fereastra permisă"""
-        def time_to_minutes(t):
-            h, m = map(int, t.split(':'))
-            return h * 60 + m
-            
-        current = time_to_minutes(time_str)
-        start = time_to_minutes(start_str)
-        end = time_to_minutes(end_str)
-        
-        if ends_next_day:
-            if end < start:
-                end += 24 * 60
-                if current < start:
-                    current += 24 * 60
-            return start <= current <= end
-        else:
-            return start <= current <= end
+    def reference_time(self):
+        """Timpul de referință: cel simulat (timeshift) sau ora curentă în fusul locației"""
+        if hasattr(self, 'timeshift_datetime'):
+            return self.timeshift_datetime
+        return datetime.now(self.current_timezone)
 
-    def is_azimuth_in_range(self, azimuth, min_azimuth, max_azimuth):
+    def compute_position_state(self, reference_time):
         """
-        Verifică dacă un azimut este în intervalul specificat, gestionând corect traversarea Nord-ului.
-        
-        Args:
-            self: Instanța clasei
-            azimuth (float): Azimutul de verificat (0-360)
-            min_azimuth (float): Limita minimă a intervalului (0-360)
-            max_azimuth (float): Limita maximă a intervalului (0-360)
-            
-        Returns:
-            bool: True dacă azimutul este în interval, False altfel
+        Poziția, trendul elevației (peste 5 minute) și distanța la momentul de referință.
+        None dacă poziția nu poate fi calculată.
         """
-        # Normalizăm toate valorile la 0-360
-        azimuth = azimuth % 360
-        min_azimuth = min_azimuth % 360
-        max_azimuth = max_azimuth % 360
-        
-        # Debug
-        print(f"  DEBUG Azimuth check: {azimuth}° in range {min_azimuth}°-{max_azimuth}°")
-        
-        # Cazul normal: min < max (ex: 45° - 90°)
-        if min_azimuth <= max_azimuth:
-            return min_azimuth <= azimuth <= max_azimuth
+        alt, az = self.calculate_moon_position()
+        if alt is None or az is None:
+            return None
         
-        # Cazul special: min > max (ex: 330° - 30°) - traversează Nord
-        # În acest caz, verificăm dacă azimutul este fie >= min SAU <= max
-        return azimuth >= min_azimuth or azimuth <= max_azimuth
-
-    def save_scenes(self):
-        """Salvează scenele în fișier"""
         try:
-            print("\n=== DEBUG save_scenes() ===")
-            print(f"Salvare {len(self.scenes)} scene")
+            future_time = self.ts.from_datetime(reference_time + timedelta(minutes=5))
+            future_astrometric = (self.eph['earth'] + self.location).at(future_time).observe(self.eph['moon'])
+            future_alt, _, _ = future_astrometric.apparent().altaz()
             
-            data = {
-                'scenes': [scene.to_dict() for scene in self.scenes]
-            }
-            # Salvăm cu backup
-            backup_path = 'moon_scenes.json.bak'
-            if os.path.exists('moon_scenes.json'):
-                try:
-                    import shutil
-                    shutil.copy2('moon_scenes.json', backup_path)
-                    print("Backup creat cu succes")
-                except Exception as e:
-                    print(f"Avertisment: Nu s-a putut crea backup: {e}")
-            
-            # Salvăm în fișier temporar mai întâi
-            temp_path = 'moon_scenes.json.tmp'
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
-                print(f"Date salvate în fișierul temporar: {temp_path}")
-                    
-            # Dacă salvarea a reușit, înlocuim fișierul original
-            os.replace(temp_path, 'moon_scenes.json')
-            print("Fișierul final creat cu succes")
-                
+            elevation_trend = "în urcare" if future_alt.degrees > alt else "în scădere"
         except Exception as e:
-            print(f"!!! EROARE la salvarea scenelor: {e}")
-            import traceback
-            traceback.print_exc()
+            ephemeris_log.error("Eroare la calculul trendului elevației: %s", e)
+            elevation_trend = "trend nedeterminat"
+        
+        return {
+            'alt': alt,
+            'az': az,
+            'elevation_trend': elevation_trend,
+            'distance_info': self.calculate_moon_distance(),
+        }
 
-    def load_scenes(self):
-        """Încarcă scenele din fișier fără a recalcula oportunitățile"""
+    def compute_rise_set_state(self, reference_time):
+        """Următorul răsărit și apus din 48 de ore, răsăritul din 24 de ore și azimutul lui"""
+        next_rise_time = None
+        next_set_time = None
         try:
-            print("\n=== DEBUG load_scenes() ===")
-            print(f"Încercare deschidere fișier moon_scenes.json")
+            t0 = self.ts.from_datetime(reference_time)
+            t1 = self.ts.from_datetime(reference_time + timedelta(hours=48))
             
-            with open('moon_scenes.json', 'r') as f:
-                data = json.load(f)
-                raw_scenes = data.get('scenes', [])
-                print(f"Fișier încărcat, {len(raw_scenes)} scene găsite")
-                
-                # Debug pentru fiecare scenă înainte de conversie
-                for scene_data in raw_scenes:
-                    print(f"\nScenă găsită în JSON: {scene_data.get('name')}")
-                    print(f"  Număr oportunități în JSON: {len(scene_data.get('opportunities', []))}")
-                    for opp in scene_data.get('opportunities', []):
-                        print(f"  Oportunitate: start={opp.get('start_datetime')}, end={opp.get('end_datetime')}")
-                        
-            self.scenes = [Scene.from_dict(scene_data) for scene_data in raw_scenes]
-            print(f"\nScene convertite: {len(self.scenes)}")
-            
-            # Verificare după conversie
-            for scene in self.scenes:
-                print(f"\nVerificare scenă convertită: {scene.name}")
-                print(f"  Număr oportunități după conversie: {len(scene.opportunities)}")
-                for opp in scene.opportunities:
-                    print(f"  Oportunitate convertită: start={opp.get('start_datetime')}, end={opp.get('end_datetime')}")
-                
-            # Doar creăm widget-urile și actualizăm afișarea
-            if self.scenes:
-                print("\nCreare widgets pentru scene:")
-                for scene in self.scenes:
-                    print(f"  Creare widget pentru {scene.name}")
-                    self.scenes_layout.addWidget(self.create_scene_widget(scene))
+            times, events = almanac.find_discrete(t0, t1, 
+                almanac.risings_and_settings(self.eph, self.eph['moon'], self.location))
+            
+            for time, event in zip(times, events):
+                event_time = time.astimezone(self.current_timezone)
                 
-                print("\nActualizare next opportunity")
-                self.parent.update_next_opportunity()
-                                
-        except FileNotFoundError:
-            print("Nu s-a găsit fișierul de scene. Se va crea la prima salvare.")
-            self.scenes = []
-        except json.JSONDecodeError:
-            print("Fișierul de scene este corupt. Se va crea unul nou.")
-            self.scenes = []
+                if event and next_rise_time is None:  # True = rising
+                    next_rise_time = event_time
+                elif not event and next_set_time is None:  # False = setting
+                    next_set_time = event_time
+                    
+                if next_rise_time and next_set_time:
+                    break
         except Exception as e:
-            print(f"Eroare la încărcarea scenelor: {e}")
-            import traceback
-            traceback.print_exc()
-            self.scenes = []
-
-class MoonPhaseWindow(QMainWindow):
-    def log_event(self, category, message, is_error=False, level='INFO'):
-        """Helper pentru logging consistent, cu nivel de detaliu controlabil"""
-        if not hasattr(self, 'last_log'):
-            self.last_log = {}
-            self.log_level = 'INFO'  # Poți seta la 'DEBUG' când ai nevoie de mai multe detalii
+            ephemeris_log.error("Eroare la calculul timpilor răsărit/apus: %s", e)
         
-        # Evităm duplicarea mesajelor identice consecutive
-        if self.last_log.get(category) == message:
-            return
-            
-        self.last_log[category] = message
+        next_rise, hours_until = self.calculate_moon_times()
+        if next_rise:
+            t0 = self.ts.from_datetime(next_rise)
+            astrometric = (self.eph['earth'] + self.location).at(t0).observe(self.eph['moon'])
+            _, rise_az, _ = astrometric.apparent().altaz()
+            rise_azimuth = rise_az.degrees
+        else:
+            rise_azimuth = 0
         
-        # Controlăm ce se afișează bazat pe nivel
-        if level == 'DEBUG' and self.log_level != 'DEBUG':
-            return
-            
-        # Formatare consistentă și simplificată
+        return {
+            'next_rise_time': next_rise_time,
+            'next_set_time': next_set_time,
+            'next_rise': next_rise,
+            'hours_until': hours_until,
+            'rise_azimuth': rise_azimuth,
+        }
+
+    @tracer.traced('sky_state')
+    def compute_sky_state(self, reference_time):
+        """
+        Tot ce calculează o împrospătare completă: poziția și răsăritul/apusul.
+        None dacă poziția nu e disponibilă.
+        """
+        position = self.compute_position_state(reference_time)
+        if position is None:
+            return None
+        return {**position, **self.compute_rise_set_state(reference_time)}
+
+class MoonPhaseWindow(MoonSky, QMainWindow):
+    def log_event(self, category, message, is_error=False, level='INFO', logger=ui_log):
+        """
+        Helper pentru logging consistent. Nivelul e controlat pe categorii (configure_logging),
+        iar mesajele identice consecutive pentru aceeași etichetă sunt filtrate de logger.
+        """
+        extra = {'event': category}
         if is_error:
-            print(f"\n!!! EROARE {category}: {message}")
+            logger.error("!!! EROARE %s: %s", category, message, extra=extra)
         elif level == 'DEBUG':
-            print(f"DEBUG {category}: {message}")
+            logger.debug("DEBUG %s: %s", category, message, extra=extra)
         else:
-            print(f"\n=== {category}: {message}")
+            logger.info("=== %s: %s", category, message, extra=extra)
 
     def __init__(self):
         super().__init__()
+        self.settings = self.load_settings()
+        configure_logging(self.settings.get('log_levels'), self.settings.get('log_file'))
+        tracer.configure_from_env()
+        # Stocarea pentru scene, rating-uri și profiluri (SQLite sau jurnal)
+        self.store = open_scene_store(self.settings)
         # Adăugăm ProfileManager la inițializare
-        self.profile_manager = ProfileManager()
+        self.profile_manager = ProfileManager(store=self.store)
         self.log_event("INIȚIALIZARE", "Pornire aplicație Moon Hunter")
        
         self.tf = TimezoneFinder()
@@ -1738,17 +4647,26 @@ class MoonPhaseWindow(QMainWindow):
        
         self.log_event("SISTEM", "Inițializare DataManager")
         self.data_manager = MeteoDataManager()
-        self.settings = self.load_settings()
+        # Imaginile fazelor se decodează în fundal cât se construiește interfața
+        self.phase_atlas = PhaseImageAtlas()
+        self.phase_atlas.preload(background=True)
+        # Indexurile globale ale oportunităților, ținute la zi de Scene Editor
+        self.upcoming_index = UpcomingOpportunityIndex()
+        self.interval_index = OpportunityIntervalIndex()
+        self.opportunity_indexes = (self.upcoming_index, self.interval_index)
        
         if self.settings.get('window_size'):
             self.resize(self.settings['window_size'][0], self.settings['window_size'][1])
         if self.settings.get('window_position'):
             self.move(self.settings['window_position'][0], self.settings['window_position'][1])
        
-        self.log_event("SISTEM", "Încărcare date astronomice")
-        self.ts = load.timescale()
-        self.eph = load('de421.bsp')
+        self.log_event("SISTEM", "Încărcare date astronomice", logger=ephemeris_log)
+        with tracer.span('ephemeris.load'):
+            self.ts = load.timescale()
+            self.eph = load('de421.bsp')
         self.location = Topos('44.4268 N', '26.1025 E')
+        # Observatorii scenelor, independenți de locația afișată
+        self.observers = ObserverRegistry(self.ts, self.eph, self.data_manager, self.tf)
        
         main_widget = QWidget()
         self.setCentralWidget(main_widget)
@@ -1809,7 +4727,7 @@ class MoonPhaseWindow(QMainWindow):
 
         location_group.setLayout(location_layout)
 
-        self.log_event("DATE", "Populare listă județe")
+        self.log_event("DATE", "Populare listă județe", level='DEBUG')
         judete = self.data_manager.get_judete()
         self.judet_combo.addItems(judete)
 
@@ -1903,7 +4821,7 @@ class MoonPhaseWindow(QMainWindow):
         left_layout = QVBoxLayout()
         left_layout.setSpacing(3)
 
-        self.compass_widget = CompassWidget()
+        self.compass_widget = CompassWidget(animate=True)
         self.compass_widget.setFixedSize(384, 384)
         left_layout.addWidget(self.compass_widget, alignment=Qt.AlignCenter)
        
@@ -2079,69 +4997,40 @@ class MoonPhaseWindow(QMainWindow):
         layout.addWidget(self.author_label, 0, Qt.AlignRight)
         layout.setContentsMargins(10, 5, 10, 0)
 
-        # Setăm stylesheet-ul pentru aplicație
-        self.setStyleSheet("""
-            QMainWindow, QWidget {
-                background-color: #2b2b2b;
-            }
-            QGroupBox {
-                border: 2px solid #404040;
-                border-radius: 6px;
-                margin-top: 3px;
-                padding-top: 3px;
-                color: white;
-                font-size: 13px;
-                font-weight: bold;
-            }
-            QLabel, QCheckBox {
-                color: white;
-                font-size: 13px;
-            }
-            QComboBox, QLineEdit {
-                background-color: #404040;
-                color: white;
-                border: 1px solid #505050;
-                border-radius: 4px;
-                padding: 3px 5px;
-                min-height: 25px;
-                font-size: 13px;
-            }
-            QPushButton {
-                background-color: #0d47a1;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 3px 15px;
-                font-size: 13px;
-            }
-            QPushButton:hover {
-                background-color: #1565c0;
-            }
-        """)
+        # Stylesheet-ul conține toate temele; tema activă e dată de proprietatea dinamică 'theme'
+        self.setProperty('theme', 'normal')
+        self.setStyleSheet(THEME_STYLESHEET)
+
+        self.bind_display_model()
 
-        # Configurare timer și inițializare
+        # Configurare timer și inițializare: fiecare mărime are cadența ei
         self.log_event("SISTEM", "Configurare timer")
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_all)
-        self.timer.start(1000)
+        self.rise_set_state = None
+        self.refresh_scheduler = RefreshScheduler(self, [
+            ('rise_set', self.refresh_rise_set, 3600),
+            ('clock', self.refresh_clock, 1),
+            ('position', self.refresh_position, 10),
+            ('phase', self.refresh_phase, 600),
+            ('opportunities', self.refresh_next_opportunity, 600),
+        ])
+        self.timer = self.refresh_scheduler.timer
+        self.refresh_scheduler.start()
+
+        self.create_diagnostic_menu()
 
         # Restaurare stare aplicație și inițializare scene editor
         self.log_event("RESTAURARE", "Restaurare stare aplicație")
         self.restore_application_state()
         
-        print("\n=== INIȚIALIZARE SCENE EDITOR LA PORNIRE ===")
+        ui_log.info("Inițializare Scene Editor la pornire")
         self.scene_editor_window = SceneEditorWindow(self)
         self.update_next_opportunity()
 
     def restore_application_state(self):
         """Restaurează starea aplicației la pornire"""
-        # 1. Mai întâi restaurăm profilurile în combo
-        if 'profiles' in self.settings:
-            self.profile_manager.profiles = {
-                name: LocationProfile.from_dict(profile_data)
-                for name, profile_data in self.settings['profiles'].items()
-            }
-            self.update_profile_list()
+        # 1. Mai întâi restaurăm profilurile în combo (baza de date e sursa principală)
+        self.profile_manager.load_profiles()
+        self.update_profile_list()
 
         # 2. Restaurăm selecția românească în combo-uri
         if 'romania_view' in self.settings:
@@ -2174,13 +5063,54 @@ class MoonPhaseWindow(QMainWindow):
 
         self.print_moon_status()
 
+    def create_diagnostic_menu(self):
+        """Meniul Diagnostic: pornire/oprire profilare, sumar pe etape și export trace"""
+        menu = self.menuBar().addMenu("Diagnostic")
+
+        self.trace_action = QAction("Profilare (tracing)", self, checkable=True)
+        self.trace_action.setChecked(tracer.enabled)
+        self.trace_action.toggled.connect(self.toggle_tracing)
+        menu.addAction(self.trace_action)
+
+        summary_action = QAction("Sumar profilare...", self)
+        summary_action.triggered.connect(self.show_trace_summary)
+        menu.addAction(summary_action)
+
+        save_action = QAction("Salvează trace...", self)
+        save_action.triggered.connect(self.save_trace)
+        menu.addAction(save_action)
+
+        reset_action = QAction("Resetează măsurătorile", self)
+        reset_action.triggered.connect(tracer.reset)
+        menu.addAction(reset_action)
+
+    def toggle_tracing(self, enabled):
+        if enabled:
+            tracer.enable()
+        else:
+            tracer.disable()
+
+    def show_trace_summary(self):
+        """Afișează p50/p95/max pentru fiecare etapă măsurată"""
+        summary = tracer.format_summary()
+        trace_log.info("Sumar profilare:\n%s", summary)
+        box = QMessageBox(self)
+        box.setWindowTitle("Sumar profilare")
+        box.setText(f"<pre>{summary}</pre>")
+        box.exec_()
+
+    def save_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Salvează trace", tracer.trace_path or "moonhunter_trace.json",
+                                              "Chrome trace (*.json)")
+        if path:
+            tracer.write_chrome_trace(path)
+
     def open_scene_editor(self):
         """Deschide fereastra Scene Editor"""
         if not hasattr(self, 'scene_editor_window'):
-            print("\n=== INIȚIALIZARE SCENE EDITOR ===")
+            ui_log.info("Inițializare Scene Editor")
             self.scene_editor_window = SceneEditorWindow(self)
             # Asigurăm că s-au încărcat scenele înainte să actualizăm oportunitatea
-            print("Actualizare next opportunity după încărcare scene")
             self.update_next_opportunity()
         self.scene_editor_window.show()
 
@@ -2197,45 +5127,27 @@ class MoonPhaseWindow(QMainWindow):
         dialog.exec_()
 
     def update_next_opportunity(self):
-        """Actualizează informațiile despre următoarele 3 oportunități"""
+        """
+        Actualizează informațiile despre următoarele 3 oportunități.
+        Întoarce secundele până la începutul primei dintre ele (când lista trebuie refăcută).
+        """
         if not hasattr(self, 'scene_editor_window') or not self.scene_editor_window:
             self.next_opportunity_label.setText("Scene Editor nu este inițializat")
-            return
+            return None
             
-        # Colectăm toate oportunitățile din toate scenele
-        all_opportunities = []
+        # Primele 3 oportunități viitoare, din indexul global (heap) al scenelor
+        next_opps = []
         current_time = datetime.now(self.current_timezone)
         
-        for scene in self.scene_editor_window.scenes:
-            for opp in scene.opportunities:
-                opp_start = opp['start_datetime']
-                if opp_start > current_time:
-                    # Calculăm ratingul de distanță pentru momentul oportunității
-                    ts = self.ts.from_datetime(opp_start)
-                    distance_info = self.calculate_moon_distance_at(ts)
-                    
-                    # Calculăm iluminarea pentru momentul oportunității
-                    timestamp = int(opp_start.timestamp())
-                    try:
-                        response = requests.get(f'https://api.farmsense.net/v1/moonphases/?d={timestamp}')
-                        moon_data = response.json()[0]
-                        illumination = float(moon_data['Illumination']) * 100
-                    except Exception as e:
-                        print(f"Eroare la obținerea iluminării: {e}")
-                        illumination = None
-                    
-                    all_opportunities.append({
-                        'scene_name': scene.name,
-                        'start_datetime': opp_start,
-                        'distance_info': distance_info,
-                        'illumination': illumination
-                    })
-        
-        # Sortăm toate oportunitățile după timp
-        all_opportunities.sort(key=lambda x: x['start_datetime'])
-        
-        # Luăm primele 3
-        next_opps = all_opportunities[:3]
+        for item in self.upcoming_index.next(3, current_time):
+            opportunity = item['opportunity']
+            # Distanța și iluminarea la start sunt deja în înregistrare, calculate la scanare
+            next_opps.append({
+                'scene_name': item['scene_name'],
+                'start_datetime': opportunity['start_datetime'],
+                'distance_status': opportunity.get('distance_status'),
+                'illumination': opportunity.get('illumination')
+            })
         
         if next_opps:
             # Creăm text pentru fiecare oportunitate pe un singur rând
@@ -2243,8 +5155,8 @@ class MoonPhaseWindow(QMainWindow):
             for i, opp in enumerate(next_opps, 1):
                 # Formatăm distanța și rating
                 distance_str = ""
-                if opp['distance_info']:
-                    status_parts = opp['distance_info']['status'].split()
+                if opp['distance_status']:
+                    status_parts = opp['distance_status'].split()
                     rating_part = status_parts[-1]  # (X/10)
                     status_name = status_parts[0]   # APOGEU/PERIGEU/INTERMEDIAR
                     distance_str = f" • {status_name} {rating_part}"
@@ -2259,23 +5171,18 @@ class MoonPhaseWindow(QMainWindow):
                 
             final_text = "\n".join(lines)
             self.next_opportunity_label.setText(final_text)
+            return max(1.0, (next_opps[0]['start_datetime'] - current_time).total_seconds())
             
-        else:
-            self.next_opportunity_label.setText("Nu există oportunități viitoare")
+        self.next_opportunity_label.setText("Nu există oportunități viitoare")
+        return None
 
     def notify_location_change(self):
         """
         Notifică Scene Editor că locația s-a schimbat, dar nu mai recalculează automat
         """
         if hasattr(self, 'scene_editor_window'):
-            # Doar actualizăm afișarea cu datele existente
-            for i in reversed(range(self.scene_editor_window.scenes_layout.count())):
-                widget = self.scene_editor_window.scenes_layout.itemAt(i).widget()
-                if widget:
-                    widget.setParent(None)
-            for scene in self.scene_editor_window.scenes:
-                self.scene_editor_window.scenes_layout.addWidget(
-                    self.scene_editor_window.create_scene_widget(scene))
+            # Doar redesenăm rândurile vizibile cu datele din cache
+            self.scene_editor_window.scene_model.refresh_all()
                 
     def load_settings(self):
         """Încarcă setările din fișier sau creează unele implicite dacă nu există."""
@@ -2289,6 +5196,9 @@ class MoonPhaseWindow(QMainWindow):
             },
             'profile_view': '',
             'active_view': 'romania',
+            'scene_storage': 'sqlite',
+            'log_levels': {category: 'INFO' for category in LOG_CATEGORIES},
+            'log_file': None,
             'profiles': {}
         }
         
@@ -2302,28 +5212,21 @@ class MoonPhaseWindow(QMainWindow):
                     if key not in data:
                         data[key] = value
                 
-                # Încărcăm profilurile dacă există
-                if 'profiles' in data:
-                    self.profile_manager.profiles = {
-                        name: LocationProfile.from_dict(profile_data)
-                        for name, profile_data in data['profiles'].items()
-                    }
-                
                 return data
                 
         except FileNotFoundError:
-            print("Nu s-a găsit fișierul de setări. Se creează unul nou cu valori implicite...")
+            persist_log.info("Nu s-a găsit fișierul de setări. Se creează unul nou cu valori implicite...")
             # Creăm fișierul cu setări implicite
             with open('moon_settings.json', 'w', encoding='utf-8') as f:
                 json.dump(default_settings, f, indent=4, ensure_ascii=False)
             return default_settings
         except json.JSONDecodeError:
-            print("Fișierul de setări este corupt. Se creează unul nou cu valori implicite...")
+            persist_log.warning("Fișierul de setări este corupt. Se creează unul nou cu valori implicite...")
             with open('moon_settings.json', 'w', encoding='utf-8') as f:
                 json.dump(default_settings, f, indent=4, ensure_ascii=False)
             return default_settings
         except Exception as e:
-            print(f"Eroare la încărcarea setărilor: {e}")
+            persist_log.error("Eroare la încărcarea setărilor: %s", e)
             return default_settings
 
     def save_settings(self, silent=False):
@@ -2338,6 +5241,9 @@ class MoonPhaseWindow(QMainWindow):
             },
             'profile_view': self.profile_combo.currentText(),
             'active_view': self.settings.get('active_view', 'romania'),
+            'scene_storage': self.settings.get('scene_storage', 'sqlite'),
+            'log_levels': self.settings.get('log_levels', {}),
+            'log_file': self.settings.get('log_file'),
             'profiles': {
                 name: profile.to_dict()
                 for name, profile in self.profile_manager.profiles.items()
@@ -2349,7 +5255,7 @@ class MoonPhaseWindow(QMainWindow):
                 json.dump(settings, f, indent=4)
         except Exception as e:
             if not silent:
-                self.log_event("SALVARE SETĂRI", str(e), is_error=True)
+                self.log_event("SALVARE SETĂRI", str(e), is_error=True, logger=persist_log)
 
     def save_last_profile(self, profile_name):
         """Salvează ultimul profil folosit"""
@@ -2374,9 +5280,9 @@ class MoonPhaseWindow(QMainWindow):
                     self.profile_combo.setCurrentText(last_profile)
                     self.load_selected_profile()
         except (FileNotFoundError, json.JSONDecodeError):
-            print("Nu s-a putut încărca ultimul profil folosit.")
+            persist_log.warning("Nu s-a putut încărca ultimul profil folosit.")
         except Exception as e:
-            print(f"Eroare la încărcarea ultimului profil: {e}")
+            persist_log.error("Eroare la încărcarea ultimului profil: %s", e)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
@@ -2387,7 +5293,13 @@ class MoonPhaseWindow(QMainWindow):
         self.save_settings()
 
     def closeEvent(self, event):
+        if hasattr(self, 'scene_editor_window'):
+            self.scene_editor_window.cancel_all_scans()
         self.save_settings()
+        if tracer.enabled and tracer.trace_path:
+            tracer.write_chrome_trace()
+            trace_log.info("Sumar profilare:\n%s", tracer.format_summary())
+        self.store.close()
         super().closeEvent(event)
 
     def update_localitati(self, judet):
@@ -2411,8 +5323,7 @@ class MoonPhaseWindow(QMainWindow):
 
     def on_hide_comune_changed(self, state):
         """Handler pentru schimbarea stării checkbox-ului de ascundere comune"""
-        print(f"\n=== DEBUG ON_HIDE_COMUNE_CHANGED ===")
-        print(f"Stare nouă checkbox: {state}")
+        ui_log.debug("Ascunde comunele: stare nouă %s", state)
         self.update_localitati(self.judet_combo.currentText())
         self.save_settings()
 
@@ -2432,45 +5343,7 @@ class MoonPhaseWindow(QMainWindow):
             self.location = Topos(f'{lat} N', f'{lon} E')
             self.current_timezone = pytz.timezone('Europe/Bucharest')
             
-            # Reset stylesheet la original - ADAUGĂ AICI
-            self.setStyleSheet("""
-                QMainWindow, QWidget {
-                    background-color: #2b2b2b;
-                }
-                QGroupBox {
-                    border: 2px solid #404040;
-                    border-radius: 6px;
-                    margin-top: 12px;
-                    padding-top: 10px;
-                    color: white;
-                    font-size: 13px;
-                    font-weight: bold;
-                }
-                QLabel, QCheckBox {
-                    color: white;
-                    font-size: 13px;
-                }
-                QComboBox, QLineEdit {
-                    background-color: #404040;
-                    color: white;
-                    border: 1px solid #505050;
-                    border-radius: 4px;
-                    padding: 5px;
-                    min-height: 25px;
-                    font-size: 13px;
-                }
-                QPushButton {
-                    background-color: #0d47a1;
-                    color: white;
-                    border: none;
-                    border-radius: 4px;
-                    padding: 8px 15px;
-                    font-size: 13px;
-                }
-                QPushButton:hover {
-                    background-color: #1565c0;
-                }
-            """)
+            self.apply_theme('normal')
             
             self.log_event("ACTUALIZARE LOCAȚIE", 
                           f"Locație: {localitate}, {judet}\n"
@@ -2480,8 +5353,7 @@ class MoonPhaseWindow(QMainWindow):
             self.settings['active_view'] = 'romania'
             self.save_settings(silent=True)
             
-            self.update_moon_data()
-            self.print_moon_status()
+            self.update_all()
 
             self.notify_location_change()
 
@@ -2517,45 +5389,7 @@ class MoonPhaseWindow(QMainWindow):
             if hasattr(self, 'timeshift_ts'):
                 delattr(self, 'timeshift_ts')
                 
-            # Reset stylesheet la original - ADAUGĂ AICI
-            self.setStyleSheet("""
-                QMainWindow, QWidget {
-                    background-color: #2b2b2b;
-                }
-                QGroupBox {
-                    border: 2px solid #404040;
-                    border-radius: 6px;
-                    margin-top: 12px;
-                    padding-top: 10px;
-                    color: white;
-                    font-size: 13px;
-                    font-weight: bold;
-                }
-                QLabel, QCheckBox {
-                    color: white;
-                    font-size: 13px;
-                }
-                QComboBox, QLineEdit {
-                    background-color: #404040;
-                    color: white;
-                    border: 1px solid #505050;
-                    border-radius: 4px;
-                    padding: 5px;
-                    min-height: 25px;
-                    font-size: 13px;
-                }
-                QPushButton {
-                    background-color: #0d47a1;
-                    color: white;
-                    border: none;
-                    border-radius: 4px;
-                    padding: 8px 15px;
-                    font-size: 13px;
-                }
-                QPushButton:hover {
-                    background-color: #1565c0;
-                }
-            """)
+            self.apply_theme('normal')
             
             self.location = Topos(f'{lat} N', f'{lon} E')
             self.update_timezone_from_coordinates(lat, lon)
@@ -2566,8 +5400,7 @@ class MoonPhaseWindow(QMainWindow):
             self.settings['active_view'] = 'gps'
             self.save_settings(silent=True)
             
-            self.update_moon_data()
-            self.print_moon_status()
+            self.update_all()
 
             self.notify_location_change()
             
@@ -2583,17 +5416,11 @@ class MoonPhaseWindow(QMainWindow):
             if timezone_str:
                 self.current_timezone = pytz.timezone(timezone_str)
                 local_time = datetime.now(self.current_timezone)
-                print(f"\n=== ACTUALIZARE FUS ORAR ===")
-                print(f"Coordonate: {lat}°N, {lon}°E")
-                print(f"Fus orar detectat: {timezone_str}")
-                print(f"Ora locală: {local_time.strftime('%H:%M:%S')}")
-                print(f"Offset UTC: {local_time.strftime('%z')}")
-                print("=" * 25)
-                
-                # Actualizăm imediat toate afișările de timp
-                self.update_moon_data()
+                ui_log.info("=== ACTUALIZARE FUS ORAR: %s°N, %s°E -> %s (ora locală %s, UTC%s)",
+                            lat, lon, timezone_str, local_time.strftime('%H:%M:%S'),
+                            local_time.strftime('%z'))
             else:
-                print(f"\n!!! AVERTISMENT: Nu s-a putut detecta fusul orar pentru coordonatele {lat}, {lon} !!!")
+                ui_log.warning("Nu s-a putut detecta fusul orar pentru coordonatele %s, %s", lat, lon)
                 # Setăm un fus orar implicit bazat pe longitudine
                 hours_offset = round(lon / 15)
                 if hours_offset > 0:
@@ -2601,19 +5428,19 @@ class MoonPhaseWindow(QMainWindow):
                 else:
                     timezone_str = f"Etc/GMT+{abs(hours_offset)}"
                 self.current_timezone = pytz.timezone(timezone_str)
-                print(f"S-a setat fusul orar aproximativ: {timezone_str}")
+                ui_log.warning("S-a setat fusul orar aproximativ: %s", timezone_str)
         except Exception as e:
-            print(f"\n!!! EROARE la actualizarea fusului orar: {e} !!!")
+            ui_log.error("EROARE la actualizarea fusului orar: %s; s-a setat fusul orar la UTC", e)
             # În caz de eroare, setăm fusul orar la UTC
             self.current_timezone = pytz.UTC
-            print("S-a setat fusul orar la UTC")
 
     def suggest_location_name(self, lat, lon):
         """Sugerează un nume pentru locație bazat pe coordonate"""
         try:
             from geopy.geocoders import Nominatim
             geolocator = Nominatim(user_agent="moonhunter")
-            location = geolocator.reverse(f"{lat}, {lon}")
+            with tracer.span('net.geocode'):
+                location = geolocator.reverse(f"{lat}, {lon}")
             
             if location:
                 address = location.raw.get('address', {})
@@ -2623,7 +5450,7 @@ class MoonPhaseWindow(QMainWindow):
                         return address[key]
             return f"Locație {lat:.2f}, {lon:.2f}"
         except Exception as e:
-            print(f"Eroare la sugerarea numelui locației: {e}")
+            net_log.error("Eroare la sugerarea numelui locației: %s", e)
             return f"Locație {lat:.2f}, {lon:.2f}"
 
     def save_current_location(self):
@@ -2638,7 +5465,7 @@ class MoonPhaseWindow(QMainWindow):
             else:
                 coords = self.gps_input.text().strip().split()
                 if len(coords) != 2:
-                    print("\n!!! EROARE: Coordonate invalide !!!\n")
+                    ui_log.error("EROARE: Coordonate invalide")
                     return
                 lat = float(coords[0])
                 lon = float(coords[1])
@@ -2677,16 +5504,14 @@ class MoonPhaseWindow(QMainWindow):
                     self.update_profile_list()
                     self.profile_combo.setCurrentText(profile_name)
                     
-                    print(f"\n=== SALVARE PROFIL ===")
-                    print(f"Nume: {profile_name}")
-                    print(f"Coordonate: {lat}°N, {lon}°E")
-                    print(f"Timezone: {profile.timezone}")
+                    persist_log.info("=== SALVARE PROFIL: %s (%s°N, %s°E, %s)",
+                                     profile_name, lat, lon, profile.timezone)
                     
                     # Salvăm și ca ultima locație folosită
                     self.save_last_profile(profile_name)
                     
         except Exception as e:
-            print(f"\n!!! EROARE la salvarea profilului: {e} !!!\n")
+            persist_log.error("EROARE la salvarea profilului: %s", e)
 
     def load_selected_profile(self):
         """Încarcă profilul selectat și resetează la timpul prezent"""
@@ -2695,53 +5520,15 @@ class MoonPhaseWindow(QMainWindow):
             self.log_event("PROFIL", "Nu este selectat niciun profil", is_error=True)
             return
                 
-        profile = self.profile_manager.get_profile(profile_name)
-        if profile:
-            # Resetăm timeshift-ul dacă există
-            if hasattr(self, 'timeshift_datetime'):
-                delattr(self, 'timeshift_datetime')
-            if hasattr(self, 'timeshift_ts'):
-                delattr(self, 'timeshift_ts')
-            
-            # Reset stylesheet la original - ADAUGĂ AICI
-            self.setStyleSheet("""
-                QMainWindow, QWidget {
-                    background-color: #2b2b2b;
-                }
-                QGroupBox {
-                    border: 2px solid #404040;
-                    border-radius: 6px;
-                    margin-top: 12px;
-                    padding-top: 10px;
-                    color: white;
-                    font-size: 13px;
-                    font-weight: bold;
-                }
-                QLabel, QCheckBox {
-                    color: white;
-                    font-size: 13px;
-                }
-                QComboBox, QLineEdit {
-                    background-color: #404040;
-                    color: white;
-                    border: 1px solid #505050;
-                    border-radius: 4px;
-                    padding: 5px;
-                    min-height: 25px;
-                    font-size: 13px;
-                }
-                QPushButton {
-                    background-color: #0d47a1;
-                    color: white;
-                    border: none;
-                    border-radius: 4px;
-                    padding: 8px 15px;
-                    font-size: 13px;
-                }
-                QPushButton:hover {
-                    background-color: #1565c0;
-                }
-            """)
+        profile = self.profile_manager.get_profile(profile_name)
+        if profile:
+            # Resetăm timeshift-ul dacă există
+            if hasattr(self, 'timeshift_datetime'):
+                delattr(self, 'timeshift_datetime')
+            if hasattr(self, 'timeshift_ts'):
+                delattr(self, 'timeshift_ts')
+            
+            self.apply_theme('normal')
             
             self.log_event("ACTIVARE PROFIL",
                           f"Nume: {profile_name}\n"
@@ -2752,7 +5539,7 @@ class MoonPhaseWindow(QMainWindow):
             if profile.timezone:
                 try:
                     self.current_timezone = pytz.timezone(profile.timezone)
-                    print(f"Fus orar: {profile.timezone}")
+                    ui_log.info("Fus orar: %s", profile.timezone)
                 except:
                     self.update_timezone_from_coordinates(profile.latitude, profile.longitude)
             else:
@@ -2762,8 +5549,7 @@ class MoonPhaseWindow(QMainWindow):
             self.settings['active_view'] = 'profile'
             self.save_settings(silent=True)
             
-            self.update_moon_data()
-            self.print_moon_status()
+            self.update_all()
 
             self.notify_location_change()
         else:
@@ -2790,249 +5576,25 @@ class MoonPhaseWindow(QMainWindow):
 
     def apply_timeshift(self, target_datetime):
         try:
-            print("\n" + "=" * 50)
-            print(f"APLICARE TIMESHIFT LA: {target_datetime.strftime('%Y-%m-%d %H:%M')}")
+            ui_log.info("=== APLICARE TIMESHIFT LA: %s", target_datetime.strftime('%Y-%m-%d %H:%M'))
             
             self.timeshift_datetime = target_datetime.astimezone(self.current_timezone)
             self.timeshift_ts = self.ts.from_datetime(self.timeshift_datetime)
             
-            self.update_moon_data()
+            # Împrospătare completă; nivelul fază include și statusul complet
             self.update_all()
             
-            # Forțăm un print complet al statusului după timeshift
-            self.print_moon_status()  
-            
         except Exception as e:
-            print(f"\n!!! EROARE la aplicarea timeshift: {e} !!!\n")
+            ui_log.error("EROARE la aplicarea timeshift: %s", e)
             raise
             
-    def calculate_moon_position(self):
-        """Calculate current moon elevation and azimuth"""
-        try:
-            # Folosim timpul din timeshift dacă există
-            time_ref = self.timeshift_ts if hasattr(self, 'timeshift_ts') else self.ts.now()
-            
-            earth = self.eph['earth']
-            moon = self.eph['moon']
-            astrometric = (earth + self.location).at(time_ref).observe(moon)
-            alt, az, _ = astrometric.apparent().altaz()
-            return alt.degrees, az.degrees
-        except Exception as e:
-            print(f"\n!!! EROARE la calculul poziției lunii: {e} !!!\n")
-            return None, None
-    
-    def calculate_moon_times(self):
-        """Calculate precise moon rise time using Skyfield"""
-        try:
-            # Determinăm timpul de referință
-            if hasattr(self, 'timeshift_datetime'):
-                current_time = self.timeshift_datetime
-            else:
-                current_time = datetime.now(self.current_timezone)
-            
-            t0 = self.ts.from_datetime(current_time)
-            t1 = self.ts.from_datetime(current_time + timedelta(hours=24))
-            
-            times, events = almanac.find_discrete(t0, t1, 
-                almanac.risings_and_settings(self.eph, self.eph['moon'], self.location))
-            
-            for time, event in zip(times, events):
-                if event:  # True = răsărit
-                    next_rise = time.astimezone(self.current_timezone)
-                    if next_rise < current_time:
-                        next_rise = next_rise + timedelta(days=1)
-                        
-                    time_until_rise = next_rise - current_time
-                    hours_until = time_until_rise.total_seconds() / 3600
-                    
-                    return next_rise, hours_until
-            
-            return None, None
-                    
-        except Exception as e:
-            print(f"\n!!! EROARE la calculul timpilor lunari: {e} !!!\n")
-            return None, None
-
-    def azimuth_to_clock(self, azimuth):
-        """Convert azimuth (0-360°) to clock position (1-12)"""
-        hour = (azimuth / 30) % 12
-        if hour == 0:
-            hour = 12
-        return int(hour)
-
-    def calculate_moon_distance(self):
-        """Calculează distanța până la Lună și oferă informații despre perigeu/apogeu"""
-        try:
-            time_ref = self.timeshift_ts if hasattr(self, 'timeshift_ts') else self.ts.now()
-            earth = self.eph['earth']
-            moon = self.eph['moon']
-            
-            astrometric = earth.at(time_ref).observe(moon)
-            distance_km = astrometric.distance().km
-            
-            PERIGEE_MIN = 356400
-            PERIGEE_MAX = 370400
-            APOGEE_MIN = 404000
-            APOGEE_MAX = 406700
-            
-            total_range = APOGEE_MAX - PERIGEE_MIN
-            current_position = distance_km - PERIGEE_MIN
-            # Inversăm ratingul: 10 pentru perigeu, 1 pentru apogeu
-            rating = 10 - round((current_position / total_range) * 9)
-            
-            if PERIGEE_MIN <= distance_km <= PERIGEE_MAX:
-                status = f"PERIGEU ({rating}/10)"
-                color = "#4CAF50"
-            elif APOGEE_MIN <= distance_km <= APOGEE_MAX:
-                status = f"APOGEU ({rating}/10)"
-                color = "#F44336"
-            else:
-                status = f"INTERMEDIAR ({rating}/10)"
-                color = "#FFC107"
-                
-            current_position_percent = (current_position / total_range) * 100
-            
-            return {
-                'distance': distance_km,
-                'status': status,
-                'color': color,
-                'percentage': current_position_percent,
-                'rating': rating
-            }
-        except Exception as e:
-            print(f"Eroare la calculul distanței lunare: {e}")
-            return None
-
-    def calculate_moon_distance_at(self, timestamp):
-        try:
-            earth = self.eph['earth']
-            moon = self.eph['moon']
-            
-            astrometric = earth.at(timestamp).observe(moon)
-            distance_km = astrometric.distance().km
-            
-            PERIGEE_MIN = 356400
-            PERIGEE_MAX = 370400
-            APOGEE_MIN = 404000
-            APOGEE_MAX = 406700
-            
-            total_range = APOGEE_MAX - PERIGEE_MIN
-            current_position = distance_km - PERIGEE_MIN
-            rating = 10 - round((current_position / total_range) * 9)
-            
-            if PERIGEE_MIN <= distance_km <= PERIGEE_MAX:
-                status = f"PERIGEU ({rating}/10)"
-                color = "#4CAF50"
-            elif APOGEE_MIN <= distance_km <= APOGEE_MAX:
-                status = f"APOGEU ({rating}/10)"
-                color = "#F44336"
-            else:
-                status = f"INTERMEDIAR ({rating}/10)"
-                color = "#FFC107"
-                
-            current_position_percent = (current_position / total_range) * 100
-            
-            return {
-                'distance': distance_km,
-                'status': status,
-                'color': color,
-                'percentage': current_position_percent,
-                'rating': rating
-            }
-        except Exception as e:
-            print(f"Eroare la calculul distanței lunare: {e}")
-            return None
-    
-    def load_full_moon_ratings(self):
-        """Încarcă rating-urile salvate din JSON"""
-        try:
-            with open('moon_settings.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            if 'full_moon_ratings' in data:
-                ratings = []
-                for rating in data['full_moon_ratings']:
-                    date = datetime.strptime(rating['date'], '%Y-%m-%d %H:%M:%S %z')
-                    ratings.append({
-                        'date': date,
-                        'rating': rating['rating']
-                    })
-                return ratings
-            return []
-                
-        except Exception as e:
-            print(f"Eroare la încărcarea ratings: {e}")
-            return []
-
-    def save_full_moon_ratings(self, ratings):
-        """Salvează rating-urile în JSON"""
-        try:
-            with open('moon_settings.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            json_ratings = []
-            for rating in ratings:
-                json_ratings.append({
-                    'date': rating['date'].strftime('%Y-%m-%d %H:%M:%S %z'),
-                    'rating': rating['rating']
-                })
-            
-            data['full_moon_ratings'] = json_ratings
-            
-            with open('moon_settings.json', 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
-                
-        except Exception as e:
-            print(f"Eroare la salvarea ratings: {e}")
-
-    def calculate_full_moon_ratings(self, force_recalc=False):
-        """Calculează rating-urile pentru următoarele 12 luni pline"""
-        try:
-            # Încercăm să încărcăm din JSON dacă nu forțăm recalcularea
-            if not force_recalc:
-                saved_ratings = self.load_full_moon_ratings()
-                if saved_ratings and saved_ratings[0]['date'] > datetime.now(pytz.UTC):
-                    print("Folosim datele salvate pentru lunile pline")
-                    return saved_ratings
-                
-            print("Calculăm date noi pentru lunile pline")
-            
-            start_time = datetime.now(self.current_timezone)
-            t0 = self.ts.from_datetime(start_time)
-            t1 = self.ts.from_datetime(start_time + timedelta(days=400))
-            
-            times, phases = almanac.find_discrete(t0, t1, almanac.moon_phases(self.eph))
-            
-            full_moons = []
-            for t, phase in zip(times, phases):
-                if phase == 2:  # 2 reprezintă luna plină
-                    full_moons.append(t)
-                if len(full_moons) >= 12:
-                    break
-            
-            ratings = []
-            for moon_time in full_moons:
-                distance_info = self.calculate_moon_distance_at(moon_time)
-                if distance_info:
-                    ratings.append({
-                        'date': moon_time.astimezone(self.current_timezone),
-                        'rating': distance_info['rating']
-                    })
-            
-            # Salvăm noile calcule
-            self.save_full_moon_ratings(ratings)
-            
-            return ratings
-            
-        except Exception as e:
-            print(f"Eroare la calculul rating-urilor pentru luni pline: {e}")
-            return []
-
-    def update_moon_position_display(self):
-        """Actualizează afișarea poziției lunii, inclusiv distanța"""
-        alt, az = self.calculate_moon_position()
-        if alt is not None and az is not None:
-            distance_info = self.calculate_moon_distance()
+    def update_moon_position_display(self, state=None):
+        """Actualizează afișarea poziției lunii, inclusiv distanța (state vine din compute_position_state)"""
+        if state is None:
+            state = self.compute_position_state(self.reference_time())
+        if state is not None:
+            alt = state['alt']
+            distance_info = state['distance_info']
             if distance_info:
                 distance_str = f"{distance_info['distance']:,.0f}".replace(",", ".")
                 
@@ -3045,7 +5607,7 @@ class MoonPhaseWindow(QMainWindow):
                         margin: 5px 0;
                     '>
                         <div style='
-                            width: {distance_info['percentage']}%;
+                            width: {distance_info['percentage']:.1f}%;
                             height: 100%;
                             background-color: {distance_info['color']};
                             border-radius: 5px;
@@ -3054,18 +5616,22 @@ class MoonPhaseWindow(QMainWindow):
                     </div>
                 """
                 
-                self.elevation_label.setText(f"Elevație: {alt:.2f}° ({'Luna este vizibilă' if alt > 0 else 'Luna nu este vizibilă'})")
+                model = self.display_model
+                model.set('elevation_text', f"Elevație: {alt:.2f}° ({'Luna este vizibilă' if alt > 0 else 'Luna nu este vizibilă'})")
                 
                 # Status și distanță pe același rând
                 status_parts = distance_info['status'].split()
                 rating_part = status_parts[-1]  # Luăm partea cu (X/10)
                 status_name = status_parts[0]   # Luăm numele statusului (APOGEU/PERIGEU/INTERMEDIAR)
-                self.distance_label.setText(f"{status_name} {rating_part} • {distance_str} km")
-                self.distance_label.setStyleSheet(f"color: {distance_info['color']};")
-                self.distance_progress_label.setText(progress_bar)
+                model.set('distance_text', f"{status_name} {rating_part} • {distance_str} km")
+                model.set('distance_color', distance_info['color'])
+                model.set('distance_bar', progress_bar)
 
     def print_moon_status(self):
         """Status lunar"""
+        # Raportul cere efemeride și un apel HTTP; îl construim doar dacă va fi afișat
+        if not ephemeris_log.isEnabledFor(logging.INFO):
+            return
         if not hasattr(self, 'last_status_time'):
             self.last_status_time = 0
         
@@ -3081,20 +5647,18 @@ class MoonPhaseWindow(QMainWindow):
             
         self.last_status_time = current_time
         
-        print("\n" + "=" * 50)
-        print("STATUS LUNĂ - " + (
+        lines = ["=" * 50, "STATUS LUNĂ - " + (
             f"Timeshift {self.timeshift_datetime.strftime('%Y-%m-%d %H:%M')}" 
             if is_timeshift 
             else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        ))
-        print("=" * 50)
+        ), "=" * 50]
         
         alt, az = self.calculate_moon_position()
         if alt is not None and az is not None:
-            print(f"\n1. POZIȚIE")
-            print(f"   Elevație: {alt:.2f}°")
-            print(f"   Azimut: {az:.2f}°")
-            print(f"   Vizibilitate: {'VIZIBILĂ' if alt > 0 else 'SUB ORIZONT'}")
+            lines += ["", "1. POZIȚIE",
+                      f"   Elevație: {alt:.2f}°",
+                      f"   Azimut: {az:.2f}°",
+                      f"   Vizibilitate: {'VIZIBILĂ' if alt > 0 else 'SUB ORIZONT'}"]
         
         next_rise, hours_until = self.calculate_moon_times()
         if next_rise:
@@ -3104,192 +5668,172 @@ class MoonPhaseWindow(QMainWindow):
             astrometric = (earth + self.location).at(t0).observe(moon)
             _, rise_az, _ = astrometric.apparent().altaz()
             
-            print(f"\n2. RĂSĂRIT")
-            print(f"   Următorul răsărit: {next_rise.strftime('%H:%M')}")
+            lines += ["", "2. RĂSĂRIT", f"   Următorul răsărit: {next_rise.strftime('%H:%M')}"]
             if hours_until > 0:
                 hours = int(hours_until)
                 minutes = int((hours_until % 1) * 60)
-                print(f"   Timp până la răsărit: {hours}h {minutes}m")
-            print(f"   Azimut la răsărit: {rise_az.degrees:.2f}°")
+                lines.append(f"   Timp până la răsărit: {hours}h {minutes}m")
+            lines.append(f"   Azimut la răsărit: {rise_az.degrees:.2f}°")
         
         try:
             timestamp = int(unix_time.time())
-            response = requests.get(f'https://api.farmsense.net/v1/moonphases/?d={timestamp}')
-            data = response.json()[0]
-            illumination = float(data['Illumination']) * 100
-            varsta_luna = float(data['Age'])
+            illumination, varsta_luna = fetch_moon_phase(timestamp)
             is_waning = varsta_luna > 14.765
             
-            print(f"\n3. FAZA LUNII")
-            print(f"   Iluminare: {illumination:.1f}%")
-            print(f"   Tendință: {'DESCREȘTERE' if is_waning else 'CREȘTERE'}")
-            print(f"   Vârsta: {varsta_luna:.1f} zile")
-            
             image_index = round(varsta_luna)
             image_name = f'luna_{image_index}.png'
-            print(f"   Imagine: {image_name}")
+            lines += ["", "3. FAZA LUNII",
+                      f"   Iluminare: {illumination:.1f}%",
+                      f"   Tendință: {'DESCREȘTERE' if is_waning else 'CREȘTERE'}",
+                      f"   Vârsta: {varsta_luna:.1f} zile",
+                      f"   Imagine: {image_name}"]
         except Exception as e:
-            print(f"   Eroare la obținerea fazei lunii: {e}")
+            lines.append(f"   Eroare la obținerea fazei lunii: {e}")
         
-        print("\n" + "=" * 50 + "\n")
+        lines.append("=" * 50)
+        ephemeris_log.info("%s", "\n".join(lines))
     
+    def apply_theme(self, name):
+        """Activează tema (normal/future/past); nu face nimic dacă e deja activă"""
+        if self.property('theme') == name:
+            return
+        self.setProperty('theme', name)
+        # Regulile depind de proprietatea ferestrei, deci re-polish doar pentru arborele ei
+        for widget in [self] + self.findChildren(QWidget):
+            widget.style().unpolish(widget)
+            widget.style().polish(widget)
+        self.update()
+
+    def bind_display_model(self):
+        """Leagă etichetele de câmpurile modelului; widget-urile se actualizează doar la schimbări reale"""
+        model = self.display_model = MoonDisplayModel(self)
+        model.bind('current_time', self.current_time_label.setText)
+        model.bind('moonrise_text', self.moonrise_time_label.setText)
+        model.bind('elevation_text', self.elevation_label.setText)
+        model.bind('position_text', self.azimuth_label.setText)
+        model.bind('compass_text', self.compass_info_label.setText)
+        model.bind('compass', lambda value: self.compass_widget.update_position(*value))
+        model.bind('distance_text', self.distance_label.setText)
+        model.bind('distance_color', lambda color: self.distance_label.setStyleSheet(f"color: {color};"))
+        model.bind('distance_bar', self.distance_progress_label.setText)
+        model.bind('phase_text', self.phase_label.setText)
+        model.bind('age_text', self.age_label.setText)
+        model.bind('image_name', self.image_name_label.setText)
+        model.bind('phase_image', lambda index: self.moon_image.setPixmap(self.phase_atlas.pixmap(index)))
+
+    @tracer.traced('update_all')
     def update_all(self):
-        """Update timer handler"""
-        # Determinăm timpul de referință
+        """Împrospătare completă, imediată (pornire, schimbare de locație sau timeshift)"""
+        self.refresh_scheduler.invalidate()
+
+    def refresh_rise_set(self, reference_time):
+        """Nivelul răsărit/apus: se recalculează când trece următorul eveniment"""
+        self.rise_set_state = self.compute_rise_set_state(reference_time)
         if hasattr(self, 'timeshift_datetime'):
-            reference_time = self.timeshift_datetime
-            reference_ts = self.timeshift_ts
-        else:
-            reference_time = datetime.now(self.current_timezone)
-            reference_ts = self.ts.now()
-        
+            return None
+        upcoming = [event_time for event_time in (self.rise_set_state['next_rise_time'],
+                                                  self.rise_set_state['next_set_time']) if event_time]
+        if not upcoming:
+            return None
+        return max(1, (min(upcoming) - reference_time).total_seconds() + 1)
+
+    def refresh_clock(self, reference_time):
+        """Nivelul ceas: ora locală și timpul rămas până la răsărit"""
         timezone_name = self.current_timezone.zone
-        self.current_time_label.setText(
-            f"Ora locală: {reference_time.strftime('%H:%M:%S')} ({timezone_name})")
+        model = self.display_model
+        model.set('current_time', f"Ora locală: {reference_time.strftime('%H:%M:%S')} ({timezone_name})")
         
-        alt, az = self.calculate_moon_position()
-        self.update_moon_position_display()
-        self.update_moon_data()
-        if alt is not None and az is not None:
-            try:
-                # Folosim reference_time în loc de local_time
-                future_time = self.ts.from_datetime(reference_time + timedelta(minutes=5))
-                earth = self.eph['earth']
-                moon = self.eph['moon']
-                future_astrometric = (earth + self.location).at(future_time).observe(moon)
-                future_alt, _, _ = future_astrometric.apparent().altaz()
-                
-                elevation_trend = "în urcare" if future_alt.degrees > alt else "în scădere"
-            except Exception as e:
-                print(f"Eroare la calculul trendului elevației: {e}")
-                elevation_trend = "trend nedeterminat"
-                
-            visibility = "Luna este vizibilă" if alt > 0 else "Luna nu este vizibilă"
-            
-            # Calculate next rise and set times
-            try:
-                # Folosim reference_time în loc de local_time
-                t0 = self.ts.from_datetime(reference_time)
-                t1 = self.ts.from_datetime(reference_time + timedelta(hours=48))
-                
-                times, events = almanac.find_discrete(t0, t1, 
-                    almanac.risings_and_settings(self.eph, self.eph['moon'], self.location))
-                
-                next_rise_time = None
-                next_set_time = None
-                
-                for time, event in zip(times, events):
-                    event_time = time.astimezone(self.current_timezone)
-                    
-                    if event and next_rise_time is None:  # True = rising
-                        next_rise_time = event_time
-                    elif not event and next_set_time is None:  # False = setting
-                        next_set_time = event_time
-                        
-                    if next_rise_time and next_set_time:
-                        break
-                
-                def format_time(dt):
-                    # Folosim reference_time în loc de local_time
-                    if dt.date() == reference_time.date():
-                        return dt.strftime('%H:%M')
-                    else:
-                        return dt.strftime('%H:%M (%d/%m/%Y)')
-                
-                rise_text = f"Următorul răsărit: {format_time(next_rise_time)}" if next_rise_time else "Răsărit necunoscut"
-                set_text = f"Următorul apus: {format_time(next_set_time)}" if next_set_time else "Apus necunoscut"
-                
-            except Exception as e:
-                print(f"Eroare la calculul timpilor răsărit/apus: {e}")
-                rise_text = "Răsărit necunoscut"
-                set_text = "Apus necunoscut"
-
-            self.elevation_label.setText(f"Elevație: {alt:.2f}° ({visibility})")
-            self.azimuth_label.setText(
-                f"Elevația este {elevation_trend}\n"
-                f"{set_text}\n"
-                f"{rise_text}"
-            )
+        next_rise = self.rise_set_state['next_rise'] if self.rise_set_state else None
+        if next_rise:
+            hours_until = (next_rise - reference_time).total_seconds() / 3600
+            if hours_until > 0:
+                hours = int(hours_until)
+                minutes = int((hours_until % 1) * 60)
+                model.set('moonrise_text',
+                    f"Următorul răsărit al Lunii: {next_rise.strftime('%H:%M')} ({timezone_name})\n"
+                    f"(în {hours} ore și {minutes} minute)"
+                )
+            else:
+                model.set('moonrise_text',
+                    f"Următorul răsărit al Lunii: {next_rise.strftime('%H:%M')} ({timezone_name})"
+                )
 
-            # Update compass widget
-            next_rise, hours_until = self.calculate_moon_times()
-            if next_rise:
-                t0 = self.ts.from_datetime(next_rise)
-                astrometric = (earth + self.location).at(t0).observe(moon)
-                _, rise_az, _ = astrometric.apparent().altaz()
-                rise_azimuth = rise_az.degrees
+    def refresh_position(self, reference_time):
+        """Nivelul poziție: elevație, trend, distanță și busolă"""
+        state = self.compute_position_state(reference_time)
+        self.update_moon_position_display(state)
+        if state is None:
+            return
+        alt, az = state['alt'], state['az']
+        visibility = "Luna este vizibilă" if alt > 0 else "Luna nu este vizibilă"
+        
+        def format_time(dt):
+            if dt.date() == reference_time.date():
+                return dt.strftime('%H:%M')
             else:
-                rise_azimuth = 0
-
-            distance_info = self.calculate_moon_distance()
-            self.compass_widget.update_position(
-                current_azimuth=az,
-                rise_azimuth=rise_azimuth,
-                is_visible=alt > 0,
-                distance_color=distance_info['color'] if distance_info else "#FFC107"
-            )
-            
-            clock_position = self.azimuth_to_clock(az)
-            rise_clock = self.azimuth_to_clock(rise_azimuth) if next_rise else 0
-            
-            self.compass_info_label.setText(
-                f"Azimut: {az:.2f}°\n"
-                f"Răsare la azimut: {rise_azimuth:.2f}°"
-            )
+                return dt.strftime('%H:%M (%d/%m/%Y)')
+        
+        rise_set = self.rise_set_state or {}
+        next_rise_time = rise_set.get('next_rise_time')
+        next_set_time = rise_set.get('next_set_time')
+        rise_text = f"Următorul răsărit: {format_time(next_rise_time)}" if next_rise_time else "Răsărit necunoscut"
+        set_text = f"Următorul apus: {format_time(next_set_time)}" if next_set_time else "Apus necunoscut"
 
-            if next_rise:
-                if hours_until > 0:
-                    hours = int(hours_until)
-                    minutes = int((hours_until % 1) * 60)
-                    self.moonrise_time_label.setText(
-                        f"Următorul răsărit al Lunii: {next_rise.strftime('%H:%M')} ({timezone_name})\n"
-                        f"(în {hours} ore și {minutes} minute)"
-                    )
-                else:
-                    self.moonrise_time_label.setText(
-                        f"Următorul răsărit al Lunii: {next_rise.strftime('%H:%M')} ({timezone_name})"
-                    )
+        model = self.display_model
+        model.set('elevation_text', f"Elevație: {alt:.2f}° ({visibility})")
+        model.set('position_text',
+            f"Elevația este {state['elevation_trend']}\n"
+            f"{set_text}\n"
+            f"{rise_text}"
+        )
+
+        rise_azimuth = rise_set.get('rise_azimuth', 0)
+        distance_info = state['distance_info']
+        # Busola desenează la rezoluția unui pixel; zecimea de grad ajunge
+        model.set('compass', (round(az, 1), round(rise_azimuth, 1), alt > 0,
+                              distance_info['color'] if distance_info else "#FFC107"))
         
-        # Folosim reference_time în loc de local_time
-        if reference_time.second == 0:
-            self.print_moon_status()
+        model.set('compass_text',
+            f"Azimut: {az:.2f}°\n"
+            f"Răsare la azimut: {rise_azimuth:.2f}°"
+        )
+
+    def refresh_phase(self, reference_time):
+        """Nivelul fază: iluminare, vârstă și imagine (cerere HTTP), plus statusul în log"""
+        self.update_moon_data()
+        self.print_moon_status()
+
+    def refresh_next_opportunity(self, reference_time):
+        """Nivelul oportunități: lista se schimbă doar când începe prima oportunitate din ea"""
+        return self.update_next_opportunity()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh_scheduler.wake()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange and not self.isMinimized():
+            self.refresh_scheduler.wake()
                 
+    @tracer.traced('update_moon_data')
     def update_moon_data(self, silent=False):
         """Update moon phase data"""
         try:
-            if hasattr(self, 'timeshift_datetime'):
-                reference_time = self.timeshift_datetime
-            else:
-                reference_time = datetime.now(self.current_timezone)
-                
+            reference_time = self.reference_time()
             timestamp = int(reference_time.timestamp())
-            response = requests.get(f'https://api.farmsense.net/v1/moonphases/?d={timestamp}')
-            data = response.json()[0]
-            
-            illumination = float(data['Illumination']) * 100
-            varsta_luna = float(data['Age'])
+            illumination, varsta_luna = fetch_moon_phase(timestamp)
             is_waning = varsta_luna > 14.765
             
-            image_index = round(varsta_luna)
-            image_name = f'luna_{image_index}.png'
-            image_path = os.path.join('poze_cer', image_name)
-            
-            alt, az = self.calculate_moon_position()
-            next_rise, hours_until = self.calculate_moon_times()
+            image_index = self.phase_atlas.nearest_index(round(varsta_luna))
             
             timezone_name = self.current_timezone.zone
             
-            if next_rise:
-                if hours_until is not None:
-                    remaining_str = f" (în {hours_until:.1f} ore)" if hours_until > 0 else ""
-                else:
-                    remaining_str = ""
-                self.moonrise_time_label.setText(
-                    f"Următorul răsărit al Lunii: {next_rise.strftime('%H:%M')} ({timezone_name}){remaining_str}")
-            
-            if os.path.exists(image_path):
-                pixmap = QPixmap(image_path)
-                self.moon_image.setPixmap(pixmap)
+            model = self.display_model
+            if image_index is not None:
+                # Pixmap-ul se schimbă doar când se schimbă indexul (modelul ignoră valorile identice)
+                model.set('phase_image', image_index)
+                image_name = self.phase_atlas.file_name(image_index)
                 
                 # Formatăm timestamp-ul pentru afișare
                 if hasattr(self, 'timeshift_datetime'):
@@ -3297,18 +5841,19 @@ class MoonPhaseWindow(QMainWindow):
                 else:
                     time_str = f" (la {reference_time.strftime('%H:%M')})"
                 
-                self.image_name_label.setText(f"Imagine curentă: {image_name}")
-                self.phase_label.setText(
+                model.set('image_name', f"Imagine curentă: {image_name}")
+                model.set('phase_text',
                     f"Faza Lunii: {'descreștere' if is_waning else 'creștere'} {round(illumination)}% vizibilă{time_str}")
-                self.age_label.setText(
+                model.set('age_text',
                     f"Vârsta Lunii: {round(varsta_luna)} zile ({timezone_name})")
             else:
-                print(f"\n!!! EROARE: Nu s-a găsit imaginea: {image_path} !!!\n")
-                self.image_name_label.setText(f"Imagine lipsă: {image_name}")
+                image_name = f'luna_{round(varsta_luna)}.png'
+                ui_log.error("EROARE: Nu s-a găsit imaginea: %s", os.path.join(self.phase_atlas.directory, image_name))
+                model.set('image_name', f"Imagine lipsă: {image_name}")
                 
         except Exception as e:
             if not silent:
-                self.log_event("DATE LUNĂ", str(e), is_error=True)
+                self.log_event("DATE LUNĂ", str(e), is_error=True, logger=net_log)
 
 def main():
     import win32event
@@ -3317,6 +5862,7 @@ def main():
     import sys
     from PyQt5.QtWidgets import QApplication, QMessageBox
     
+    configure_logging()
     mutex_name = 'Global\\MoonHunter_SingleInstance'
     
     try:
@@ -3341,7 +5887,7 @@ def main():
         sys.exit(ret)
         
     except Exception as e:
-        print(f"Eroare la verificarea single instance: {e}")
+        ui_log.error("Eroare la verificarea single instance: %s", e)
         # În caz de eroare, pornim normal
         app = QApplication(sys.argv)
         app.setStyle('Fusion')
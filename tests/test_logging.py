@@ -0,0 +1,33 @@
+import logging
+import os
+import sys
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import moonhunter
+
+
+def test_bad_level_and_category_do_not_stop_configuration(monkeypatch, capsys):
+    monkeypatch.setenv('MOONHUNTER_LOG', 'VERBOSE,BOGUS=DEBUG')
+    monkeypatch.delenv('MOONHUNTER_LOG_FILE', raising=False)
+    moonhunter.configure_logging()
+
+    for category in moonhunter.LOG_CATEGORIES:
+        assert logging.getLogger(f'moonhunter.{category.lower()}').level == logging.INFO
+    output = capsys.readouterr().out
+    assert 'BOGUS' in output
+    assert 'VERBOSE' in output
+
+
+def test_bad_entries_keep_the_valid_ones(monkeypatch, capsys):
+    monkeypatch.setenv('MOONHUNTER_LOG', 'scan=debug,NOPE=DEBUG,NET=LOUD')
+    monkeypatch.delenv('MOONHUNTER_LOG_FILE', raising=False)
+    moonhunter.configure_logging({'UI': 'warning'})
+
+    assert moonhunter.scan_log.level == logging.DEBUG
+    assert moonhunter.net_log.level == logging.INFO
+    assert moonhunter.ui_log.level == logging.WARNING
+    output = capsys.readouterr().out
+    assert output.count('NOPE') == 1
+    assert 'NET=LOUD' in output